@@ -0,0 +1,164 @@
+'''
+Offline benchmark of the page parsers against the saved pages in benchmarks/fixtures.
+
+Times each parser in isolation (no network) and reports pages/sec, MB/sec and the
+peak memory of a single parse. Peak memory is measured with tracemalloc, so it covers
+the Python heap only and not memory allocated inside lxml's C library.
+
+Compare against a stored baseline to catch regressions:
+
+    python benchmarks/bench_parsers.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_parsers.py --baseline benchmarks/baseline.json
+
+benchmarks/baseline.json is the committed baseline, recorded with the lxml parser. Its
+speeds are only meaningful on comparable hardware, so tests/bench_tests.py checks peak
+memory against it (--memory-only), and a full comparison is run by hand before a release.
+
+The run exits with status 1 if any case is slower or uses more memory than the
+baseline by more than the tolerance. Use --record to refresh the fixtures from the
+live site using the urls in fixtures/manifest.json.
+'''
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from power_of_10 import athletes, coaches, dom, rankings, results
+from power_of_10.client import PowerOf10Client
+from power_of_10.exceptions import BroadQueryError, QueryError
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+CASES = {
+    'get_athlete': (athletes.parse_athlete_profile, ['profile_small.html', 'profile_coach.html', 'profile_veteran.html']),
+    'get_rankings': (rankings.parse_ranking_list, ['rankings_400_u20.html', 'rankings_400_full.html', 'rankings_5000_full.html']),
+    'get_results': (results.parse_meeting_results, ['meeting_results_small.html', 'meeting_results_large.html']),
+    'search_event': (results.parse_meeting_search, ['meeting_search.html']),
+    'search_athletes': (athletes.parse_athlete_search, ['athletes_search.html', 'athletes_search_broad.html']),
+    'search_coaches': (coaches.parse_coach_search, ['coaches_search.html']),
+}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def parse(func, text):
+    try:
+        return func(text)
+    except (BroadQueryError, QueryError):
+        return None
+
+
+def run_case(func, pages, min_time):
+    '''Returns pages/sec, MB/sec and peak memory in bytes of parsing the given pages'''
+    size = sum(len(p.encode('utf-8')) for p in pages)
+
+    for page in pages:
+        parse(func, page)
+
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for page in pages:
+            parse(func, page)
+        count += len(pages)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+
+    peak = 0
+    for page in pages:
+        tracemalloc.start()
+        parse(func, page)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        'pages_per_sec': count / elapsed,
+        'mb_per_sec': size * (count / len(pages)) / elapsed / 1e6,
+        'peak_memory': peak
+    }
+
+
+def compare(report, baseline, tolerance, memory_only=False):
+    '''Returns a list of regressions of the report against the baseline'''
+    failures = []
+    for name, stats in report.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        if not memory_only and stats['pages_per_sec'] < base['pages_per_sec'] * (1 - tolerance):
+            failures.append(f"{name}: {stats['pages_per_sec']:.1f} pages/sec vs baseline {base['pages_per_sec']:.1f}")
+        if stats['peak_memory'] > base['peak_memory'] * (1 + tolerance):
+            failures.append(f"{name}: peak memory {stats['peak_memory'] / 1e6:.2f}MB vs baseline {base['peak_memory'] / 1e6:.2f}MB")
+    return failures
+
+
+def record():
+    with open(os.path.join(FIXTURES, 'manifest.json')) as f:
+        manifest = json.load(f)
+    with PowerOf10Client() as client:
+        for name, url in manifest.items():
+            response = client.get(url)
+            with open(os.path.join(FIXTURES, name), 'w', encoding='utf-8') as f:
+                f.write(response.text)
+            print(f'{name}: {len(response.content)} bytes from {url}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Power of 10 page parsers offline.')
+    parser.add_argument('cases', nargs='*', help=f'cases to run (default all): {", ".join(CASES)}')
+    parser.add_argument('--parser', choices=sorted(dom.PARSERS), help='HTML parser to benchmark')
+    parser.add_argument('--min-time', type=float, default=1.0, help='seconds to run each case for')
+    parser.add_argument('--baseline', help='baseline JSON to compare against')
+    parser.add_argument('--save-baseline', help='write this run as a baseline JSON')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown or memory growth (0.25 = 25%%)')
+    parser.add_argument('--memory-only', action='store_true', help='compare peak memory only, which does not depend on the machine')
+    parser.add_argument('--record', action='store_true', help='download fresh fixtures from the live site and exit')
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record()
+        return 0
+
+    if args.parser:
+        dom.set_parser(args.parser)
+
+    names = args.cases or list(CASES)
+    print(f'parser: {dom.get_parser().name}')
+    print(f'{"case":<18}{"pages/sec":>12}{"MB/sec":>10}{"peak MB":>10}')
+    report = {}
+    for name in names:
+        func, files = CASES[name]
+        report[name] = run_case(func, [load_fixture(f) for f in files], args.min_time)
+        stats = report[name]
+        print(f'{name:<18}{stats["pages_per_sec"]:>12.1f}{stats["mb_per_sec"]:>10.2f}{stats["peak_memory"] / 1e6:>10.2f}')
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'parser': dom.get_parser().name, 'cases': report}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('parser') not in (None, dom.get_parser().name):
+            print(f'warning: baseline was recorded with the {baseline["parser"]} parser')
+        failures = compare(report, baseline['cases'], args.tolerance, args.memory_only)
+        if failures:
+            print('\nREGRESSIONS:')
+            for failure in failures:
+                print(f'  {failure}')
+            return 1
+        print('\nNo regressions against baseline.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
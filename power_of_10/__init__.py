@@ -1,4 +1,25 @@
+from .exceptions import *
+from .cache import *
+from .archive import *
+from .client import *
 from .athletes import *
 from .coaches import *
 from .rankings import *
-from .results import *
\ No newline at end of file
+from .results import *
+from .batch import *
+from .async_client import *
+from .sinks import *
+from .bulk import detect_page_type, iter_pages, parse_archive, parse_page
+from .table import *
+from .marks import *
+from .sync import *
+from .store import *
+from .ratelimit import *
+from .crawler import *
+from .graph import *
+from .coalesce import *
+from .instrument import *
+from .records import *
+from .planner import *
+from .replay import ReplayAdapter, ReplayServer, ReplaySite
+from .catalogue import *
@@ -0,0 +1,327 @@
+import glob
+import json
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from .cache import normalise_url
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+__all__ = ['ArchiveWriter', 'ArchiveReader', 'rebuild_index']
+
+
+INDEX = 'index.sqlite'
+EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Compressed bytes fed to a decompressor at a time when scanning a segment
+_CHUNK_SIZE = 64 * 1024
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT,
+    fetched_at REAL,
+    status INTEGER,
+    segment TEXT,
+    offset INTEGER,
+    length INTEGER
+);
+CREATE INDEX IF NOT EXISTS pages_url ON pages (url, fetched_at);
+'''
+
+
+def _compressor(compression):
+    if compression == 'gzip':
+        return _gzip
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError('zstd archives require zstandard. Install it with "pip install zstandard".')
+        return zstandard.ZstdCompressor().compress
+    raise ValueError(f'Unknown compression {compression!r}. Choose from {", ".join(EXTENSIONS)}.')
+
+
+def _gzip(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(segment, data):
+    if segment.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError('zstd archives require zstandard. Install it with "pip install zstandard".')
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data, 31)
+
+
+def _decompressobj(segment):
+    if segment.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError('zstd archives require zstandard. Install it with "pip install zstandard".')
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(31)
+
+
+def _scan(segment, view, offset):
+    '''Returns the header and compressed length of the member at an offset, or None if it is cut short'''
+    member = _decompressobj(segment)
+    head = b''
+    position = offset
+    while not member.eof:
+        if position >= len(view):
+            return None
+        chunk = view[position:position + _CHUNK_SIZE]
+        position += len(chunk)
+        data = member.decompress(chunk)
+        if b'\n' not in head:
+            head += data
+    return _split(head)[0], position - offset - len(member.unused_data)
+
+
+def _record(header, body):
+    return json.dumps(header, separators=(',', ':')).encode('utf-8') + b'\n' + body
+
+
+def _split(record):
+    end = record.index(b'\n')
+    return json.loads(record[:end]), record[end + 1:]
+
+
+class ArchiveWriter:
+    '''
+    Append-only archive of fetched pages, used by PowerOf10Client when passed as 'archive'.
+
+    Pages are written to numbered segment files. Each page is its own compressed member: a JSON
+    header line ('url', 'fetched_at', 'status') followed by the raw body. Gzip segments can
+    be read with zcat. Segments are never rewritten. Every page's segment, offset and
+    length are recorded in an SQLite index by url and fetch time. One process should write to an
+    archive at a time.
+
+            Parameters:
+                    - 'path' (str): Directory of the archive, created if needed
+                    - 'compression' (str): 'gzip' or 'zstd' (requires zstandard)
+                    - 'segment_size' (int): Size in bytes after which a new segment is started
+    '''
+
+    def __init__(self, path='power_of_10_archive', compression='gzip', segment_size=256 * 1024 * 1024):
+        self.path = path
+        self.compression = compression
+        self.segment_size = segment_size
+        self._compress = _compressor(compression)
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(path, INDEX), check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+        segments = sorted(glob.glob(os.path.join(path, 'pages-*' + EXTENSIONS[compression])))
+        self._number = int(os.path.basename(segments[-1])[6:11]) if segments else 0
+        self._file = None
+        self._open_segment()
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._file.close()
+        self._segment = f'pages-{self._number:05d}{EXTENSIONS[self.compression]}'
+        self._file = open(os.path.join(self.path, self._segment), 'ab')
+        self._offset = self._file.tell()
+
+    def write(self, url, body, status=200, fetched_at=None, **headers):
+        '''
+        Appends a page to the archive.
+
+                Parameters:
+                        - 'url' (str): Url the page was fetched from
+                        - 'body' (bytes): Raw body of the response
+                        - 'status' (int): HTTP status of the response
+                        - 'fetched_at' (float): Unix time of the fetch (defaults to now)
+                        - '**headers': Any other values to keep in the page's header, e.g. final_url
+        '''
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        url = normalise_url(url)
+        member = self._compress(_record(dict(headers, url=url, fetched_at=fetched_at, status=status), body))
+        with self._lock:
+            if self._offset and self._offset + len(member) > self.segment_size:
+                self._number += 1
+                self._open_segment()
+            self._file.write(member)
+            self._file.flush()
+            self._db.execute('INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+                             (url, fetched_at, status, self._segment, self._offset, len(member)))
+            self._db.commit()
+            self._offset += len(member)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ArchiveReader:
+    '''
+    Reads an archive written by ArchiveWriter. Segments are memory-mapped, and each page is
+    decompressed straight from the mapping, without reading the segment into memory.
+
+            Parameters:
+                    - 'path' (str): Directory of the archive
+    '''
+
+    def __init__(self, path='power_of_10_archive'):
+        if not os.path.exists(os.path.join(path, INDEX)):
+            raise FileNotFoundError(f'No page archive found at {path}')
+        self.path = path
+        self._db = sqlite3.connect(os.path.join(path, INDEX), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._mappings = []
+        self._maps = {}
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def _map(self, segment):
+        buffer = self._maps.get(segment)
+        if buffer is None or len(buffer) < os.path.getsize(os.path.join(self.path, segment)):
+            # The segment has grown since it was mapped. Pages being read from the old mapping
+            # keep it alive, so it is left to be closed with the reader
+            with open(os.path.join(self.path, segment), 'rb') as f:
+                buffer = self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mappings.append(buffer)
+        return buffer
+
+    def _read(self, segment, offset, length):
+        with self._lock:
+            buffer = self._map(segment)
+        with memoryview(buffer) as view:
+            return _split(_decompress(segment, view[offset:offset + length]))
+
+    def entries(self, url=None, since=None, until=None):
+        '''
+        Returns the index entries of archived pages, in the order they were written.
+
+                Parameters:
+                        - 'url' (str): Optional url to list the fetches of
+                        - 'since' (float): Optional earliest fetch time (Unix time)
+                        - 'until' (float): Optional latest fetch time (Unix time)
+
+                Returns:
+                        - 'entries' (arr): List of dicts of 'url', 'fetched_at', 'status', 'segment', 'offset' and 'length'
+        '''
+        sql, params = 'SELECT url, fetched_at, status, segment, offset, length FROM pages WHERE 1 = 1', []
+        if url is not None:
+            sql += ' AND url = ?'
+            params.append(normalise_url(url))
+        if since is not None:
+            sql += ' AND fetched_at >= ?'
+            params.append(since)
+        if until is not None:
+            sql += ' AND fetched_at <= ?'
+            params.append(until)
+        with self._lock:
+            rows = self._db.execute(sql + ' ORDER BY segment, offset', params).fetchall()
+        return [dict(zip(('url', 'fetched_at', 'status', 'segment', 'offset', 'length'), row)) for row in rows]
+
+    def get(self, url, at=None):
+        '''
+        Returns the body of the latest archived fetch of a url.
+
+                Parameters:
+                        - 'url' (str): Url of the page
+                        - 'at' (float): Optional Unix time, to get the latest fetch at or before it
+
+                Returns:
+                        - 'body' (bytes): Raw body of the page, or None if it is not archived
+        '''
+        entries = self.entries(url, until=at)
+        if not entries:
+            return None
+        latest = max(entries, key=lambda e: e['fetched_at'])
+        return self._read(latest['segment'], latest['offset'], latest['length'])[1]
+
+    def __iter__(self):
+        '''Yields (url, fetched_at, body) for every archived page, in the order they were written'''
+        for entry in self.entries():
+            header, body = self._read(entry['segment'], entry['offset'], entry['length'])
+            yield header['url'], header['fetched_at'], body
+
+    def replay(self, page_type=None, since=None, until=None):
+        '''
+        Parses archived pages again, e.g. after a parser upgrade.
+
+                Parameters:
+                        - 'page_type' (str): Optional page type to parse every page as (see bulk.PAGE_PARSERS),
+                          detected from each page if not given
+                        - 'since', 'until' (float): Optional range of fetch times (Unix time) to replay
+
+                Returns:
+                        - generator of bulk.parse_page records, with the url as 'source'
+        '''
+        from .bulk import parse_page
+        for entry in self.entries(since=since, until=until):
+            if entry['status'] != 200:
+                continue
+            header, body = self._read(entry['segment'], entry['offset'], entry['length'])
+            yield parse_page(header['url'], body, page_type)
+
+    def close(self):
+        with self._lock:
+            for buffer in self._mappings:
+                buffer.close()
+            self._maps.clear()
+            self._mappings.clear()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def rebuild_index(path):
+    '''
+    Rebuilds an archive's index from its segments, e.g. after the index file was lost. Each
+    member is decompressed a chunk at a time, keeping only its header. A member cut short at
+    the end of a segment, e.g. by a crash while writing, is left out of the index.
+
+            Parameters:
+                    - 'path' (str): Directory of the archive
+
+            Returns:
+                    - 'pages' (int): Number of pages indexed
+    '''
+    db = sqlite3.connect(os.path.join(path, INDEX))
+    db.executescript(_SCHEMA)
+    db.execute('DELETE FROM pages')
+    count = 0
+    for name in sorted(os.listdir(path)):
+        if not (name.startswith('pages-') and name.endswith(tuple(EXTENSIONS.values()))):
+            continue
+        if os.path.getsize(os.path.join(path, name)) == 0:
+            continue
+        with open(os.path.join(path, name), 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer, \
+                memoryview(buffer) as view:
+            offset = 0
+            while offset < len(view):
+                scanned = _scan(name, view, offset)
+                if scanned is None:
+                    break
+                header, length = scanned
+                db.execute('INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?)',
+                           (header['url'], header['fetched_at'], header['status'], name, offset, length))
+                offset += length
+                count += 1
+    db.commit()
+    db.close()
+    return count
@@ -0,0 +1,177 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+from . import athletes, coaches, rankings, results
+from .catalogue import normalise_event
+from .client import BASE_URL
+from .table import Table
+from .marks import add_marks
+from .records import AthleteSummary, Meeting, MeetingResult, Performance, RankingEntry, to_records
+from .exceptions import QueryError
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+__all__ = ['AsyncPowerOf10Client']
+
+
+class AsyncPowerOf10Client:
+    '''
+    Asyncio client for fetching many Power of 10 pages concurrently.
+
+    Uses the same url building and page parsing as the synchronous functions, so every
+    method returns exactly what its synchronous counterpart returns. Requires aiohttp.
+
+            Parameters:
+                    - 'concurrency' (int): Maximum number of requests in flight at once
+                    - 'rate' (float): Maximum number of requests started per second against each host
+                    - 'timeout' (float): Total timeout in seconds for each request
+                    - 'retries' (int): Number of retries for 5xx responses and connection errors
+                    - 'backoff_factor' (float): Backoff factor between retries (0.5 waits 0.5s, 1s, 2s, ...)
+                    - 'session' (aiohttp.ClientSession): Optional session to use instead of creating one
+                    - 'transport' (str): Optional base url of another host to send requests for the site to instead,
+                      e.g. a replay.ReplayServer. Returned urls are the site's
+    '''
+
+    def __init__(self, concurrency=10, rate=5.0, timeout=30, retries=3, backoff_factor=0.5, session=None, transport=None):
+        if aiohttp is None:
+            raise ImportError('AsyncPowerOf10Client requires aiohttp. Install it with "pip install aiohttp".')
+
+        self.concurrency = concurrency
+        self.rate = rate
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.transport = transport.rstrip('/') if transport else None
+
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore = None
+        self._host_locks = {}
+        self._host_next = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        '''Closes the underlying session if this client created it'''
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    async def _wait_turn(self, host):
+        if not self.rate:
+            return
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            start = max(now, self._host_next.get(host, now))
+            self._host_next[host] = start + 1.0 / self.rate
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def get(self, url):
+        '''
+        Returns the text of the page at the given url, honouring the concurrency and rate limits.
+
+                Parameters:
+                        - 'url' (str): Full url of the page to fetch
+
+                Returns:
+                        - 'text' (str): Decoded body of the response
+                        - 'final_url' (str): Url of the response after any redirects
+                        - 'redirected' (bool): Whether the request was redirected
+        '''
+        session = self._get_session()
+        if self.transport is not None and url.startswith(BASE_URL):
+            url = self.transport + url[len(BASE_URL):]
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            await self._wait_turn(host)
+            try:
+                async with self._semaphore:
+                    async with session.get(url) as response:
+                        if response.status < 500 or attempt >= self.retries:
+                            final_url = str(response.url)
+                            if self.transport is not None and final_url.startswith(self.transport):
+                                final_url = BASE_URL + final_url[len(self.transport):]
+                            return await response.text(), final_url, len(response.history) > 0
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.retries:
+                    raise
+            await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+            attempt += 1
+
+    async def search_athletes(self, firstname=None, surname=None, club=None, records=False):
+        '''Asynchronous version of athletes.search_athletes'''
+        text, _, _ = await self.get(athletes._search_athletes_url(firstname, surname, club))
+        found = athletes.parse_athlete_search(text)
+        return to_records(found, AthleteSummary) if records else found
+
+    async def get_athlete(self, athlete_id, marks=False, sections=None, lazy=False, records=False):
+        '''Asynchronous version of athletes.get_athlete'''
+        if records and (marks or lazy):
+            raise QueryError('Records cannot be combined with marks or lazy. Use mark() on each record instead of marks.')
+        text, _, _ = await self.get(athletes._athlete_url(athlete_id))
+        athlete = athletes.AthleteProfile(text, sections, marks=marks)
+        if lazy:
+            return athlete
+        athlete = athlete.to_dict()
+        if records and 'performances' in athlete:
+            athlete['performances'] = to_records(athlete['performances'], Performance)
+        return athlete
+
+    async def search_coaches(self, firstname=None, surname=None, club=None):
+        '''Asynchronous version of coaches.search_coaches'''
+        text, final_url, redirected = await self.get(coaches._search_coaches_url(firstname, surname, club))
+        if redirected:
+            return coaches._single_coach(final_url)
+        return coaches.parse_coach_search(text)
+
+    async def get_rankings(self, year, gender, age_group, event, region=None, as_table=False, marks=False, records=False):
+        '''Asynchronous version of rankings.get_rankings'''
+        if marks and records:
+            raise QueryError('Records cannot be combined with marks. Use mark() on each record instead.')
+        text, _, _ = await self.get(rankings._rankings_url(year, gender, age_group, event, region))
+        ranks = rankings.parse_ranking_list(text)
+        if marks:
+            add_marks(ranks, ['performance', 'pb'], normalise_event(event))
+        if as_table:
+            return Table.from_records(ranks, rankings.RANKING_COLUMNS)
+        return to_records(ranks, RankingEntry) if records else ranks
+
+    async def search_event(self, event=None, meeting=None, venue=None, date_from=None, year=None, date_to=None, meeting_type=None, terrain=None, records=False):
+        '''Asynchronous version of results.search_event'''
+        url = results._search_event_url(event, meeting, venue, date_from, year, date_to, meeting_type, terrain)
+        text, _, _ = await self.get(url)
+        meetings = results.parse_meeting_search(text)
+        return to_records(meetings, Meeting) if records else meetings
+
+    async def get_results(self, meeting_id, marks=False, records=False):
+        '''Asynchronous version of results.get_results'''
+        if marks and records:
+            raise QueryError('Records cannot be combined with marks. Use mark() on each record instead.')
+        text, _, _ = await self.get(results._results_url(meeting_id))
+        meeting = results.parse_meeting_results(text)
+        if marks:
+            for race in meeting['results']:
+                add_marks(race['results'], ['perf', 'sb', 'pb'], race['event'])
+        if records:
+            for race in meeting['results']:
+                race['results'] = to_records(race['results'], MeetingResult)
+        return meeting
@@ -1,9 +1,18 @@
-import requests
-from bs4 import BeautifulSoup
+from collections.abc import Mapping
+import numpy as np
+from .client import get_client
+from . import dom
+from .marks import add_marks
+from .records import AthleteSummary, Performance, to_records
+from .table import parse_date
 from .exceptions import BroadQueryError, QueryError
 
 
-def search_athletes(firstname=None, surname=None, club=None):
+__all__ = ['SECTIONS', 'search_athletes', 'parse_athlete_search', 'get_athlete', 'iter_performances',
+           'parse_performances', 'parse_athlete_profile', 'AthleteProfile']
+
+
+def search_athletes(firstname=None, surname=None, club=None, client=None, records=False):
     '''
     Returns a list of athletes with the inputted firstname, surname or club.
 
@@ -11,6 +20,8 @@ def search_athletes(firstname=None, surname=None, club=None):
                     - 'firstname' (str): Optional first name agrument
                     - 'surname' (str): Optional surname argument
                     - 'club' (str): Optional club agrument
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+                    - 'records' (bool): Return compact AthleteSummary records instead of dicts
 
             Returns:
                     - 'list_of_athletes' (arr): List of athlete data in dict
@@ -22,6 +33,13 @@ def search_athletes(firstname=None, surname=None, club=None):
                         - 'club' (str): Athletics club of althete
                         - 'athlete_id' (int): Reference id of athlete (used by PowerOf10)
     '''
+    url = _search_athletes_url(firstname, surname, club)
+    c = get_client(client)
+    found = c.stored('athlete_search', url, lambda: parse_athlete_search(c.get(url).content))
+    return to_records(found, AthleteSummary) if records else found
+
+
+def _search_athletes_url(firstname, surname, club):
     url = f'https://www.thepowerof10.info/athletes/athleteslookup.aspx?'
     if surname is not None:
         url += f'surname={surname.replace(" ","+")}&'
@@ -32,27 +50,39 @@ def search_athletes(firstname=None, surname=None, club=None):
 
     if firstname is None and surname is None and club is None:
         raise QueryError('Please input a firstname, surname or club')
-    
-    html = requests.get(url)
-    soup = BeautifulSoup(html.text, 'html.parser')
+    return url
+
+
+def parse_athlete_search(html):
+    '''
+    Returns the list of athletes on a saved or fetched athlete search page (see search_athletes).
+
+            Parameters:
+                    - 'html' (str, bytes or path): Page html as text or raw bytes, or the path of a saved page as a pathlib.Path
+
+            Returns:
+                    - 'list_of_athletes' (arr): List of athlete data in dict, as returned by search_athletes
+    '''
+    parser = dom.get_parser()
+    soup = parser.parse(html)
 
-    results = soup.find('div', {'id': 'cphBody_pnlResults'}).find_all('tr')
+    results = parser.find_all(parser.find(soup, 'div', id='cphBody_pnlResults'), 'tr')
     
-    if 'cphBody_lblResultsErrorMessage' in str(results[0]):
-        raise BroadQueryError(results[0].text)
+    if parser.find(results[0], 'span', id='cphBody_lblResultsErrorMessage') is not None:
+        raise BroadQueryError(parser.text(results[0]))
 
     list_of_athletes = []
     for r in results[1:-1]:
-        row = BeautifulSoup(str(r), 'html.parser').find_all('td')
+        row = parser.find_all(r, 'td')
         list_of_athletes.append({
-                'firstname': row[0].text, 
-                'surname': row[1].text,
-                'track': row[2].text,
-                'road': row[3].text,
-                'xc': row[4].text,
-                'sex': row[5].text,
-                'club': row[6].text,
-                'athlete_id': str(row[7]).split('"')[3].split('=')[1]})
+                'firstname': parser.text(row[0]), 
+                'surname': parser.text(row[1]),
+                'track': parser.text(row[2]),
+                'road': parser.text(row[3]),
+                'xc': parser.text(row[4]),
+                'sex': parser.text(row[5]),
+                'club': parser.text(row[6]),
+                'athlete_id': parser.link_param(row[7], 'athleteid')})
 
     if list_of_athletes == []:
         raise QueryError('No athletes found. Use broader search terms or amend your queries.')
@@ -60,12 +90,20 @@ def search_athletes(firstname=None, surname=None, club=None):
     return list_of_athletes
 
 
-def get_athlete(athlete_id):
+def get_athlete(athlete_id, client=None, marks=False, sections=None, lazy=False, records=False):
     '''
     Returns a dictionary of athlete data for specified athlete id.
 
             Parameters:
                     - 'athlete_id' (int): reference id of athlete (used by PowerOf10)
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+                    - 'marks' (bool): Add a parsed Mark (seconds, metres or points plus wind, indoor,
+                      hand timing and DNF/DQ flags) alongside each 'pb' and 'performances' value, as '<field>_mark'
+                    - 'sections' (arr): Optional sections to parse, from 'pb', 'performances', 'rankings' and 'coaching'.
+                      Sections not listed are left out and never parsed (defaults to all)
+                    - 'lazy' (bool): Return an AthleteProfile that parses each section the first time it is accessed
+                    - 'records' (bool): Return 'performances' as compact Performance records instead of dicts.
+                      Use performance.mark('value') in place of 'marks'
 
             Returns:
                     - 'athletes' (dict): Dictionary of athlete data
@@ -87,6 +125,7 @@ def get_athlete(athlete_id):
                             - 'venue' (str): Location of event
                             - 'meeting' (str): Meeting title
                             - 'date' (str): Date of event
+                            - 'meeting_id' (int): Reference id of meeting (used by PowerOf10)
                         - 'rankings' (arr): List of notable ranks of athletes
                             - 'event' (str): Event name
                             - 'age group' (str): Age group division at time of rank
@@ -94,6 +133,7 @@ def get_athlete(athlete_id):
                             - 'rank' (int): Rank of athlete
                         - 'coaching' (arr): List of coaching experiences 
                             - 'name' (str): Nmae of athlete coached
+                            - 'athlete_id' (int): Reference id of athlete coached (used by PowerOf10)
                             - 'club' (str): Club of athlete coached
                             - 'age_group' (str): Age group division of athlete coached
                             - 'sex' (str): Gender of athlete coached
@@ -103,110 +143,283 @@ def get_athlete(athlete_id):
                             - 'year' (int): Year that rank was achieved
                             - 'performance' (float): Performance that achieved rank
     '''
+    if records and (marks or lazy):
+        raise QueryError('Records cannot be combined with marks or lazy. Use mark() on each record instead of marks.')
+    url = _athlete_url(athlete_id)
+    c = get_client(client)
+    if c.store is None:
+        if lazy:
+            return AthleteProfile(c.get(url).content, sections, marks=marks)
+        key = ('athlete', str(athlete_id), None if sections is None else tuple(sections), marks)
+        athlete = c.shared(key, lambda: AthleteProfile(c.get(url).content, sections, marks=marks).to_dict())
+    else:
+        athlete = c.stored('athlete', athlete_id, lambda: parse_athlete_profile(c.get(url).content))
+        if sections is not None:
+            athlete = {k: v for k, v in athlete.items() if k not in SECTIONS or k in sections}
+        if marks:
+            athlete = dict(athlete)
+            for section in ('pb', 'performances'):
+                if section in athlete:
+                    athlete[section] = add_marks([dict(r) for r in athlete[section]], ['value'])
+    if records and 'performances' in athlete:
+        athlete = dict(athlete, performances=to_records(athlete['performances'], Performance))
+    return athlete
+
+
+def iter_performances(athlete_id, since=None, event=None, marks=False, client=None):
+    '''
+    Yields an athlete's performances one at a time, newest first, as they are read from the profile.
+
+            Parameters:
+                    - 'athlete_id' (int): reference id of athlete (used by PowerOf10)
+                    - 'since' (str or date): Optional earliest date to yield, e.g. '2024-01-01' or datetime.date(2024, 1, 1).
+                      The history is grouped by year, newest first, so reading stops at the first year before it
+                    - 'event' (str): Optional event to yield performances for, e.g. '400'
+                    - 'marks' (bool): Add a parsed Mark alongside each value, as 'value_mark'
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+
+            Returns:
+                    - generator of performances, as in get_athlete's 'performances'
+    '''
+    url = _athlete_url(athlete_id)
+    html = get_client(client).get(url)
+    yield from parse_performances(html.content, since=since, event=event, marks=marks)
+
+
+def parse_performances(html, since=None, event=None, marks=False):
+    '''
+    Yields the performances on a saved or fetched profile page one at a time (see iter_performances).
+
+            Parameters:
+                    - 'html' (str, bytes or path): Page html as text or raw bytes, or the path of a saved page as a pathlib.Path
+                    - 'since' (str or date): Optional earliest date to yield
+                    - 'event' (str): Optional event to yield performances for
+                    - 'marks' (bool): Add a parsed Mark alongside each value, as 'value_mark'
+
+            Returns:
+                    - generator of performances, as in get_athlete's 'performances'
+    '''
+    if since is not None:
+        since = parse_date(since) if isinstance(since, str) else np.datetime64(since, 'D')
+        if np.isnat(since):
+            raise QueryError('Please input a valid date for since.')
+        since_year = since.astype('datetime64[Y]')
+
+    parser = dom.get_parser()
+    soup = parser.parse(html)
+    if parser.text(parser.find(soup, 'div', id='pnlMainGeneral')).replace('\n','') == 'Profile not found':
+        raise QueryError('Profile not found. Please input a valid athlete id')
+
+    for performance in _iter_performances(parser, soup):
+        if since is not None:
+            date = parse_date(performance['date'])
+            if np.isnat(date):
+                continue
+            if date.astype('datetime64[Y]') < since_year:
+                return
+            if date < since:
+                continue
+        if event is not None and performance['event'] != event:
+            continue
+        if marks:
+            add_marks([performance], ['value'])
+        yield performance
+
+
+def _athlete_url(athlete_id):
     if athlete_id is None:
         raise QueryError('Please input a valid athlete id.')
 
-    url = f'https://www.thepowerof10.info/athletes/profile.aspx?athleteid={athlete_id}'
-    html = requests.get(url)
-    soup = BeautifulSoup(html.text, 'html.parser')
-    
-    if soup.find('div', {'id': 'pnlMainGeneral'}).text.replace('\n','') == 'Profile not found':
+    return f'https://www.thepowerof10.info/athletes/profile.aspx?athleteid={athlete_id}'
+
+
+SECTIONS = ('pb', 'performances', 'rankings', 'coaching')
+
+
+def parse_athlete_profile(html, sections=None, lazy=False):
+    '''
+    Returns a dictionary of athlete data from a saved or fetched profile page (see get_athlete).
+
+            Parameters:
+                    - 'html' (str, bytes or path): Page html as text or raw bytes, or the path of a saved page as a pathlib.Path
+                    - 'sections' (arr): Optional sections to parse, from 'pb', 'performances', 'rankings' and 'coaching' (defaults to all)
+                    - 'lazy' (bool): Return an AthleteProfile that parses each section on first access
+
+            Returns:
+                    - 'athlete' (dict): Dictionary of athlete data, as returned by get_athlete
+    '''
+    profile = AthleteProfile(html, sections)
+    return profile if lazy else profile.to_dict()
+
+
+class AthleteProfile(Mapping):
+    '''
+    Read-only mapping of athlete data that parses the profile details eagerly and each of the
+    heavier sections ('pb', 'performances', 'rankings', 'coaching') only the first time it is
+    accessed. It compares equal to the dict returned by get_athlete.
+
+            Parameters:
+                    - 'html' (str, bytes or path): Page html as text or raw bytes, or the path of a saved page as a pathlib.Path
+                    - 'sections' (arr): Optional sections to make available (defaults to all)
+                    - 'marks' (bool): Add a parsed Mark alongside each 'pb' and 'performances' value
+    '''
+
+    def __init__(self, html, sections=None, marks=False):
+        sections = SECTIONS if sections is None else tuple(sections)
+        for section in sections:
+            if section not in SECTIONS:
+                raise QueryError(f'Unknown profile section {section!r}. Choose from {", ".join(SECTIONS)}.')
+
+        self._parser = dom.get_parser()
+        self._soup = self._parser.parse(html)
+        self._details = _parse_details(self._parser, self._soup)
+        self._sections = [s for s in SECTIONS if s in sections]
+        self._parsed = {}
+        self._marks = marks
+
+    def _section(self, name):
+        if name not in self._parsed:
+            value = _SECTION_PARSERS[name](self._parser, self._soup)
+            if self._marks and name in ('pb', 'performances'):
+                add_marks(value, ['value'])
+            self._parsed[name] = value
+            if len(self._parsed) == len(self._sections):
+                self._soup = None
+        return self._parsed[name]
+
+    def __getitem__(self, key):
+        if key in self._details:
+            return self._details[key]
+        if key in self._sections:
+            return self._section(key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from self._details
+        yield from self._sections
+
+    def __len__(self):
+        return len(self._details) + len(self._sections)
+
+    def __repr__(self):
+        parsed = ', '.join(self._parsed) or 'none'
+        return f'<AthleteProfile {self._details.get("club", "")!r}, sections parsed: {parsed}>'
+
+    def to_dict(self):
+        '''Returns the profile as a plain dict, parsing any sections not yet parsed'''
+        return dict(self.items())
+
+
+def _parse_details(parser, soup):
+    if parser.text(parser.find(soup, 'div', id='pnlMainGeneral')).replace('\n','') == 'Profile not found':
         raise QueryError('Profile not found. Please input a valid athlete id')
 
-    athlete_dets = soup.find('div', {'id': 'cphBody_pnlAthleteDetails'}).find_all('table')[1].text.replace('\n', '').split(':')
-    athlete_abo = soup.find('div', {'id': 'cphBody_pnlAbout'}).find_all('table')[1]
-    
-    coach_dets = soup.find('div', {'id': 'cphBody_pnlAthletesCoached'})
+    athlete_dets = parser.text(parser.find_all(parser.find(soup, 'div', id='cphBody_pnlAthleteDetails'), 'table')[1]).replace('\n', '').split(':')
+    athlete_abo = parser.find_all(parser.find(soup, 'div', id='cphBody_pnlAbout'), 'table')[1]
+
+    if athlete_dets[1] == 'YesClub':
+        return {
+            'club': athlete_dets[2].replace('Gender',''),
+            'gender': athlete_dets[3].replace('County',''),
+            'county': athlete_dets[4].replace('Region',''),
+            'region': athlete_dets[5].replace('Nation',''),
+            'nation': athlete_dets[6].replace('Lead Coach',''),
+            'about': parser.text(athlete_abo)
+        }
+    return {
+        'club': athlete_dets[1].replace('Gender',''),
+        'gender': athlete_dets[2].replace('Age Group',''),
+        'age_group': athlete_dets[3].replace('County', ''),
+        'county': athlete_dets[4].replace('Region',''),
+        'region': athlete_dets[5].replace('Nation',''),
+        'nation': athlete_dets[6].replace('Lead Coach',''),
+        'lead coach': athlete_dets[7],
+        'about': parser.text(athlete_abo)
+    }
+
+
+def _parse_coaching(parser, soup):
+    coach_dets = parser.find(soup, 'div', id='cphBody_pnlAthletesCoached')
     coaching = []
     if coach_dets is not None:
-        s = coach_dets.find('table', {'class': 'alternatingrowspanel'}).find_all('tr')
+        s = parser.find_all(parser.find(coach_dets, 'table', **{'class': 'alternatingrowspanel'}), 'tr')
         for i in s:
-            dets = i.find_all('td')
-            if dets[0].text != 'Name':
+            cells = parser.find_all(i, 'td')
+            dets = [parser.text(td) for td in cells]
+            if dets[0] != 'Name':
                 coaching.append({
-                    'name': dets[0].text,
-                    'club': dets[1].text,
-                    'age_group': dets[2].text,
-                    'sex': dets[3].text,
-                    'best_event': dets[4].text,
-                    'rank': dets[5].text,
-                    'age_group_rank': dets[6].text,
-                    'year': dets[7].text,
-                    'performance': dets[8].text
+                    'name': dets[0],
+                    'athlete_id': parser.link_param(cells[0], 'athleteid') or '',
+                    'club': dets[1],
+                    'age_group': dets[2],
+                    'sex': dets[3],
+                    'best_event': dets[4],
+                    'rank': dets[5],
+                    'age_group_rank': dets[6],
+                    'year': dets[7],
+                    'performance': dets[8]
                 })
+    return coaching
 
-    athlete_rank = soup.find('div', {'id': 'cphBody_pnlMain'}).find('td', {'width': 220, 'valign': 'top'}).find_all('table')
+
+def _parse_rankings(parser, soup):
+    athlete_rank = parser.find_all(parser.find(parser.find(soup, 'div', id='cphBody_pnlMain'), 'td', width='220', valign='top'), 'table')
     rankings = []
     if len(athlete_rank) > 2:
-        for i in athlete_rank[2].find_all('tr'):
-            dets = i.find_all('td')
-            if dets[0].text != 'Event':
+        for i in parser.find_all(athlete_rank[2], 'tr'):
+            dets = parser.find_all(i, 'td')
+            if parser.text(dets[0]) != 'Event':
                 rankings.append({
-                    'event': dets[0].text,
-                    'age group': dets[2].text,
-                    'year': dets[3].text,
-                    'rank': dets[4].text
+                    'event': parser.text(dets[0]),
+                    'age group': parser.text(dets[2]),
+                    'year': parser.text(dets[3]),
+                    'rank': parser.text(dets[4])
                 })
-    
+    return rankings
+
+
+def _parse_performances(parser, soup):
+    return list(_iter_performances(parser, soup))
+
+
+def _iter_performances(parser, soup):
     try:
-        athlete_perf = soup.find('div', {'id': 'cphBody_pnlPerformances'}).find_all('table')[1].find_all('tr')
-        performances = []
-        for i in athlete_perf:
-            if len(i.find_all('td')) > 1 and 'EventPerfPosVenueMeetingDate' != i.text:
-                dets = i.find_all('td')
-                performances.append({
-                    'event': dets[0].text,
-                    'value': dets[1].text,
-                    'position': [dets[5].text, dets[6].text],
-                    'venue': dets[9].text,
-                    'meeting': dets[10].text,
-                    'date': dets[11].text
-                })
+        athlete_perf = parser.find_all(parser.find_all(parser.find(soup, 'div', id='cphBody_pnlPerformances'), 'table')[1], 'tr')
     except Exception as e:
-        performances = []
+        return
+    for i in athlete_perf:
+        dets = parser.find_all(i, 'td')
+        if len(dets) > 1 and 'EventPerfPosVenueMeetingDate' != parser.text(i):
+            yield {
+                'event': parser.text(dets[0]),
+                'value': parser.text(dets[1]),
+                'position': [parser.text(dets[5]), parser.text(dets[6])],
+                'venue': parser.text(dets[9]),
+                'meeting': parser.text(dets[10]),
+                'date': parser.text(dets[11]),
+                'meeting_id': parser.link_param(dets[9], 'meetingid') or ''
+            }
+
 
+def _parse_pb(parser, soup):
     try:
-        athlete_pb = soup.find('div', {'id': 'cphBody_divBestPerformances'}).find_all('tr')
+        athlete_pb = parser.find_all(parser.find(soup, 'div', id='cphBody_divBestPerformances'), 'tr')
         pb = []
         for i in athlete_pb:
-            if i.find('b').text != 'Event':
+            event = parser.text(parser.find(i, 'b'))
+            if event != 'Event':
                 pb.append({
-                    'event': i.find('b').text,
-                    'value': i.find_all('td')[1].text
+                    'event': event,
+                    'value': parser.text(parser.find_all(i, 'td')[1])
                 })
     except Exception as e:
         pb = []
-        
-    if 'Login to add some details about this athlete' in athlete_abo:
-        athlete_abo = None
+    return pb
 
-    if athlete_dets[1] == 'YesClub':
-        athlete = {
-            'club': athlete_dets[2].replace('Gender',''),
-            'gender': athlete_dets[3].replace('County',''),
-            'county': athlete_dets[4].replace('Region',''),
-            'region': athlete_dets[5].replace('Nation',''),
-            'nation': athlete_dets[6].replace('Lead Coach',''),
-            'about': athlete_abo.text,
-            'pb': pb,
-            'performances': performances,
-            'rankings': rankings,
-            'coaching': coaching
-        }
-    else:
-        athlete = {
-            'club': athlete_dets[1].replace('Gender',''),
-            'gender': athlete_dets[2].replace('Age Group',''),
-            'age_group': athlete_dets[3].replace('County', ''),
-            'county': athlete_dets[4].replace('Region',''),
-            'region': athlete_dets[5].replace('Nation',''),
-            'nation': athlete_dets[6].replace('Lead Coach',''),
-            'lead coach': athlete_dets[7],
-            'about': athlete_abo.text,
-            'pb': pb,
-            'performances': performances,
-            'rankings': rankings,
-            'coaching': coaching
-        }
 
-    return athlete
+_SECTION_PARSERS = {
+    'pb': _parse_pb,
+    'performances': _parse_performances,
+    'rankings': _parse_rankings,
+    'coaching': _parse_coaching,
+}
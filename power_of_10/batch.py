@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .athletes import get_athlete
+from .results import get_results
+from .client import get_client
+
+
+__all__ = ['fetch_many', 'get_athletes', 'get_results_many']
+
+
+def fetch_many(func, ids, workers=8, client=None):
+    '''
+    Calls a lookup function for every id across a thread pool and yields results as they finish.
+
+    Repeated ids are only fetched once. An exception raised for one id (for example a
+    QueryError for a missing profile) is yielded in place of its result and the batch carries on.
+
+            Parameters:
+                    - 'func' (function): Lookup function taking an id and a 'client' keyword, e.g. get_athlete
+                    - 'ids' (iterable): Ids to look up
+                    - 'workers' (int): Number of threads fetching at once
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client).
+                        Its pool_size should be at least 'workers' so every thread keeps a warm connection
+
+            Returns:
+                    - generator of (id, result_or_exception) tuples in completion order
+    '''
+    client = get_client(client)
+    seen = set()
+    pending = {}
+    ids = iter(ids)
+
+    def submit_next(executor):
+        for i in ids:
+            if i in seen:
+                continue
+            seen.add(i)
+            pending[executor.submit(func, i, client=client)] = i
+            return True
+        return False
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        while len(pending) < workers * 2 and submit_next(executor):
+            pass
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                try:
+                    yield i, future.result()
+                except Exception as e:
+                    yield i, e
+                submit_next(executor)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def get_athletes(athlete_ids, workers=8, client=None):
+    '''
+    Returns a generator of athlete data for many athlete ids, fetched concurrently.
+
+            Parameters:
+                    - 'athlete_ids' (iterable): Reference ids of athletes (used by PowerOf10)
+                    - 'workers' (int): Number of threads fetching at once
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+
+            Returns:
+                    - generator of (athlete_id, athlete) tuples in completion order, where 'athlete' is the
+                      dict returned by get_athlete or the exception raised for that id
+    '''
+    return fetch_many(get_athlete, athlete_ids, workers=workers, client=client)
+
+
+def get_results_many(meeting_ids, workers=8, client=None):
+    '''
+    Returns a generator of meeting results for many meeting ids, fetched concurrently.
+
+            Parameters:
+                    - 'meeting_ids' (iterable): Reference ids of meetings (used by PowerOf10)
+                    - 'workers' (int): Number of threads fetching at once
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+
+            Returns:
+                    - generator of (meeting_id, meeting) tuples in completion order, where 'meeting' is the
+                      dict returned by get_results or the exception raised for that id
+    '''
+    return fetch_many(get_results, meeting_ids, workers=workers, client=client)
@@ -0,0 +1,218 @@
+import argparse
+import fnmatch
+import os
+import pathlib
+import sys
+import tarfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from .archive import ArchiveReader, INDEX
+from .athletes import parse_athlete_search, parse_athlete_profile
+from .coaches import parse_coach_search
+from .rankings import parse_ranking_list
+from .results import parse_meeting_search, parse_meeting_results
+from .sinks import open_sink, SINKS
+
+
+__all__ = ['PAGE_PARSERS', 'detect_page_type', 'iter_pages', 'parse_page', 'parse_archive', 'main']
+
+
+PAGE_PARSERS = {
+    'athlete_search': parse_athlete_search,
+    'athlete_profile': parse_athlete_profile,
+    'coach_search': parse_coach_search,
+    'ranking_list': parse_ranking_list,
+    'meeting_search': parse_meeting_search,
+    'meeting_results': parse_meeting_results,
+}
+
+_MARKERS = [
+    (b'cphBody_dgP', 'meeting_results'),
+    (b'cphBody_dgMeetings', 'meeting_search'),
+    (b'cphBody_lblCachedRankingList', 'ranking_list'),
+    (b'cphBody_pnlAthleteDetails', 'athlete_profile'),
+    (b'coacheslookup.aspx', 'coach_search'),
+    (b'athleteslookup.aspx', 'athlete_search'),
+    (b'cphBody_pnlResults', 'athlete_search'),
+    (b'results.aspx', 'meeting_results'),
+    (b'profile.aspx', 'athlete_profile'),
+]
+
+
+def detect_page_type(markup):
+    '''
+    Returns the type of a saved Power of 10 page from markers in its html, without parsing it.
+
+            Parameters:
+                    - 'markup' (str or bytes): Page html
+
+            Returns:
+                    - 'page_type' (str): One of the keys of PAGE_PARSERS, or None if the page is not recognised
+    '''
+    if isinstance(markup, str):
+        markup = markup.encode('utf-8', 'ignore')
+    for marker, page_type in _MARKERS:
+        if marker in markup:
+            return page_type
+    return None
+
+
+def iter_pages(path, pattern='*.htm*'):
+    '''
+    Yields the saved pages in a directory tree, a page archive (see ArchiveWriter), a tarball
+    (optionally compressed) or a single file. Directory pages are yielded as pathlib paths so they can be
+    read by the worker that parses them; archive and tarball pages are yielded as bytes.
+
+            Parameters:
+                    - 'path' (str): Directory, page archive, tarball or file to read
+                    - 'pattern' (str): Glob that page file names must match
+
+            Returns:
+                    - generator of (name, source) tuples, where 'source' is a path or the page bytes
+    '''
+    if os.path.isdir(path) and os.path.exists(os.path.join(path, INDEX)):
+        with ArchiveReader(path) as archive:
+            for url, fetched_at, body in archive:
+                yield url, body
+    elif os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if fnmatch.fnmatch(name, pattern):
+                    full = os.path.join(root, name)
+                    yield os.path.relpath(full, path), pathlib.Path(full)
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path, mode='r|*') as tar:
+            for member in tar:
+                if member.isfile() and fnmatch.fnmatch(os.path.basename(member.name), pattern):
+                    yield member.name, tar.extractfile(member).read()
+    else:
+        yield os.path.basename(path), pathlib.Path(path)
+
+
+def parse_page(name, source, page_type=None):
+    '''
+    Returns a record of a parsed saved page.
+
+            Parameters:
+                    - 'name' (str): Name of the page, e.g. its path within the archive
+                    - 'source' (str, path or bytes): Path of the page, or its html as bytes
+                    - 'page_type' (str): Optional page type, detected from the html if not given
+
+            Returns:
+                    - 'record' (dict):
+                        - 'source' (str): Name of the page
+                        - 'page_type' (str): Type of the page
+                        - 'data' (dict or arr): Output of the matching parse function
+                        - 'error' (str): Error message if the page could not be parsed
+    '''
+    if isinstance(source, str):
+        source = pathlib.Path(source)
+    try:
+        if page_type is None:
+            if isinstance(source, bytes):
+                page_type = detect_page_type(source)
+            else:
+                with open(source, 'rb') as f:
+                    page_type = detect_page_type(f.read())
+        if page_type is None:
+            return {'source': name, 'page_type': None, 'data': None, 'error': 'Unrecognised page'}
+        return {'source': name, 'page_type': page_type, 'data': PAGE_PARSERS[page_type](source), 'error': None}
+    except Exception as e:
+        return {'source': name, 'page_type': page_type, 'data': None, 'error': f'{type(e).__name__}: {e}'}
+
+
+def _parse_chunk(chunk, page_type):
+    return [parse_page(name, source, page_type) for name, source in chunk]
+
+
+def _chunks(pages, chunksize):
+    chunk = []
+    for page in pages:
+        chunk.append(page)
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_archive(path, output, workers=None, chunksize=64, format=None, pattern='*.htm*', page_type=None, progress=None):
+    '''
+    Parses every saved page in a directory or tarball across a process pool and streams the
+    records to JSON Lines or Parquet. Only a bounded number of chunks is in flight at once,
+    so memory stays flat however large the archive is.
+
+            Parameters:
+                    - 'path' (str): Directory, tarball or file of saved pages
+                    - 'output' (str or sink): Output path ('-' for stdout) or an object with write(record)
+                    - 'workers' (int): Number of worker processes (defaults to the number of CPUs)
+                    - 'chunksize' (int): Number of pages handed to a worker at a time
+                    - 'format' (str): Optional output format, 'csv', 'jsonl' or 'parquet' (defaults from the extension)
+                    - 'pattern' (str): Glob that page file names must match
+                    - 'page_type' (str): Optional page type for every page, skipping detection
+                    - 'progress' (function): Optional callback called with the running counts after each chunk
+
+            Returns:
+                    - 'counts' (dict): Number of pages parsed, per page type, and number of errors
+    '''
+    workers = workers or os.cpu_count() or 1
+    counts = {'pages': 0, 'errors': 0}
+    sink = open_sink(output, format) if not hasattr(output, 'write') or hasattr(output, 'fileno') else output
+    chunks = _chunks(iter_pages(path, pattern), chunksize)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for chunk in chunks:
+                pending.add(executor.submit(_parse_chunk, chunk, page_type))
+                if len(pending) >= workers * 2:
+                    break
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for record in future.result():
+                        sink.write(record)
+                        counts['pages'] += 1
+                        if record['error'] is not None:
+                            counts['errors'] += 1
+                        else:
+                            counts[record['page_type']] = counts.get(record['page_type'], 0) + 1
+                    if progress is not None:
+                        progress(counts)
+                    chunk = next(chunks, None)
+                    if chunk is not None:
+                        pending.add(executor.submit(_parse_chunk, chunk, page_type))
+    finally:
+        if sink is not output:
+            sink.close()
+
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parse an archive of saved Power of 10 pages into CSV, JSON Lines or Parquet.')
+    parser.add_argument('path', help='directory, tarball or file of saved pages')
+    parser.add_argument('output', nargs='?', default='-', help='output file (default stdout)')
+    parser.add_argument('--format', choices=sorted(SINKS), help='output format (default from the output extension)')
+    parser.add_argument('--workers', type=int, help='number of worker processes (default: number of CPUs)')
+    parser.add_argument('--chunksize', type=int, default=64, help='pages handed to a worker at a time')
+    parser.add_argument('--pattern', default='*.htm*', help='glob that page file names must match')
+    parser.add_argument('--page-type', choices=sorted(PAGE_PARSERS), help='type of every page, skipping detection')
+    args = parser.parse_args(argv)
+
+    start = time.monotonic()
+
+    def progress(counts):
+        rate = counts['pages'] / max(time.monotonic() - start, 1e-9)
+        print(f"\r{counts['pages']} pages, {counts['errors']} errors, {rate:.0f} pages/sec", end='', file=sys.stderr)
+
+    counts = parse_archive(args.path, args.output, workers=args.workers, chunksize=args.chunksize,
+                           format=args.format, pattern=args.pattern, page_type=args.page_type, progress=progress)
+    print(file=sys.stderr)
+    return 1 if counts['pages'] and counts['errors'] == counts['pages'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
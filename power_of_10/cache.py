@@ -0,0 +1,247 @@
+import datetime
+import json
+import sqlite3
+import threading
+import time
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+__all__ = ['MINUTE', 'HOUR', 'DAY', 'normalise_url', 'default_ttl', 'ResponseCache']
+
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+
+def normalise_url(url):
+    '''
+    Returns a canonical form of a Power of 10 url so equivalent urls share one cache entry.
+    The scheme and host are lower-cased, empty parameters dropped and the query sorted.
+
+            Parameters:
+                    - 'url' (str): Url to normalise
+
+            Returns:
+                    - 'url' (str): Normalised url
+    '''
+    parts = urlsplit(url)
+    query = sorted((k.lower(), v) for k, v in parse_qsl(parts.query) if v != '')
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ''))
+
+
+def default_ttl(url):
+    '''
+    Returns how many seconds a cached page stays fresh, based on the page it is for.
+
+    Ranking lists and meeting searches for past years are kept for a month, the current
+    season for a day or an hour. Meeting results are kept for a week and profiles for a day.
+
+            Parameters:
+                    - 'url' (str): Normalised url of the page
+
+            Returns:
+                    - 'ttl' (int): Seconds before the cached page must be revalidated
+    '''
+    parts = urlsplit(url)
+    page = parts.path.rsplit('/', 1)[-1].lower()
+    query = dict(parse_qsl(parts.query))
+    this_year = datetime.date.today().year
+
+    try:
+        past_year = int(query.get('year', this_year)) < this_year
+    except ValueError:
+        past_year = False
+
+    if page == 'rankinglist.aspx':
+        return 30 * DAY if past_year else DAY
+    if page == 'resultslookup.aspx':
+        return 30 * DAY if past_year else HOUR
+    if page == 'results.aspx':
+        return 7 * DAY
+    if page in ('profile.aspx', 'athleteslookup.aspx', 'coacheslookup.aspx'):
+        return DAY
+    return HOUR
+
+
+class ResponseCache:
+    '''
+    Persistent SQLite cache of fetched pages, used by PowerOf10Client when passed as 'cache'.
+
+    Entries are keyed on the normalised url. Fresh entries are served without touching the
+    network; stale entries are revalidated with If-None-Match/If-Modified-Since when the
+    site sent an ETag or Last-Modified header. When the cache grows past 'max_size' bytes the
+    least recently used pages are evicted.
+
+            Parameters:
+                    - 'path' (str): Path of the SQLite database file (':memory:' for a throwaway cache)
+                    - 'max_size' (int): Maximum total size in bytes of cached page bodies
+                    - 'ttl' (function or dict): Function of the url returning a TTL in seconds, or a dict of
+                        page name (e.g. 'profile.aspx') to TTL overriding default_ttl
+    '''
+
+    def __init__(self, path='power_of_10_cache.sqlite', max_size=512 * 1024 * 1024, ttl=None):
+        self.path = path
+        self.max_size = max_size
+        if isinstance(ttl, dict):
+            overrides = {k.lower(): v for k, v in ttl.items()}
+            self.ttl = lambda url: overrides.get(urlsplit(url).path.rsplit('/', 1)[-1].lower(), default_ttl(url))
+        else:
+            self.ttl = ttl if ttl is not None else default_ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('''CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY,
+            final_url TEXT,
+            status INTEGER,
+            headers TEXT,
+            encoding TEXT,
+            content BLOB,
+            size INTEGER,
+            fetched_at REAL,
+            expires_at REAL,
+            accessed_at REAL)''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)')
+        self._db.commit()
+
+    def lookup(self, url):
+        '''
+        Returns the cached entry for a url, or None if the url has never been cached.
+
+                Parameters:
+                        - 'url' (str): Url of the page
+
+                Returns:
+                        - 'entry' (dict): Cached entry with 'response', 'fresh', 'etag' and 'last_modified' keys
+        '''
+        key = normalise_url(url)
+        with self._lock:
+            row = self._db.execute('SELECT final_url, status, headers, encoding, content, expires_at FROM pages WHERE url = ?', (key,)).fetchone()
+        if row is None:
+            return None
+
+        final_url, status, headers, encoding, content, expires_at = row
+        headers = CaseInsensitiveDict(json.loads(headers))
+        response = requests.Response()
+        response.status_code = status
+        response.url = final_url
+        response.headers = headers
+        response.encoding = encoding
+        response._content = content
+        response.from_cache = True
+
+        return {
+            'response': response,
+            'fresh': expires_at > time.time(),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified')
+        }
+
+    def conditional_headers(self, entry):
+        '''Returns the revalidation request headers for a stale cache entry'''
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def hit(self, url, entry, revalidated=False):
+        '''Records that a cached entry was served, refreshing its expiry if it was revalidated'''
+        key = normalise_url(url)
+        now = time.time()
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(entry['response'].content)
+            if revalidated:
+                self.revalidated += 1
+                self._db.execute('UPDATE pages SET accessed_at = ?, expires_at = ? WHERE url = ?', (now, now + self.ttl(key), key))
+            else:
+                self._db.execute('UPDATE pages SET accessed_at = ? WHERE url = ?', (now, key))
+            self._db.commit()
+
+    def store(self, url, response):
+        '''
+        Stores a successful response, then evicts least recently used pages if over 'max_size'.
+
+                Parameters:
+                        - 'url' (str): Url that was requested
+                        - 'response' (requests.Response): Response to cache
+        '''
+        key = normalise_url(url)
+        headers = {k: v for k, v in response.headers.items() if k.lower() in ('content-type', 'etag', 'last-modified')}
+        content = response.content
+        now = time.time()
+        with self._lock:
+            self.misses += 1
+            self.stores += 1
+            self._db.execute('INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+                key, response.url, response.status_code, json.dumps(headers), response.encoding,
+                content, len(content), now, now + self.ttl(key), now))
+            self._evict()
+            self._db.commit()
+
+    def miss(self):
+        '''Records a request that could not be served from the cache'''
+        with self._lock:
+            self.misses += 1
+
+    def _evict(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()[0]
+        if total <= self.max_size:
+            return
+        for url, size in self._db.execute('SELECT url, size FROM pages ORDER BY accessed_at').fetchall():
+            if total <= self.max_size:
+                break
+            self._db.execute('DELETE FROM pages WHERE url = ?', (url,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        '''
+        Returns the cache counters.
+
+                Returns:
+                        - 'stats' (dict):
+                            - 'hits' (int): Requests served from the cache, including revalidated ones
+                            - 'misses' (int): Requests that had to download the page
+                            - 'revalidated' (int): Stale entries confirmed unchanged by a 304 response
+                            - 'stores' (int): Pages written to the cache
+                            - 'evictions' (int): Pages evicted to stay under 'max_size'
+                            - 'bytes_saved' (int): Page bytes served from the cache instead of downloaded
+                            - 'entries' (int): Pages currently cached
+                            - 'size' (int): Total bytes of cached page bodies
+        '''
+        with self._lock:
+            entries, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages').fetchone()
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated': self.revalidated,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'bytes_saved': self.bytes_saved,
+                'entries': entries,
+                'size': size
+            }
+
+    def clear(self):
+        '''Removes every cached page'''
+        with self._lock:
+            self._db.execute('DELETE FROM pages')
+            self._db.commit()
+
+    def close(self):
+        '''Closes the database connection'''
+        with self._lock:
+            self._db.close()
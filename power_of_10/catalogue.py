@@ -0,0 +1,154 @@
+import re
+from .exceptions import InvalidQueryError
+
+
+__all__ = ['GENDERS', 'AGE_GROUPS', 'REGIONS', 'MEETING_TYPES', 'TERRAINS', 'TRACK_EVENTS', 'EVENT_CODES', 'ALIASES',
+           'normalise_gender', 'normalise_age_group', 'normalise_region', 'normalise_meeting_type', 'normalise_terrain',
+           'normalise_event', 'normalise_year']
+
+
+GENDERS = ('M', 'W')
+
+AGE_GROUPS = ('ALL', 'U11', 'U13', 'U15', 'U17', 'U20', 'U23', 'SEN', 'V35', 'V40', 'V45', 'V50', 'V55', 'V60',
+              'V65', 'V70', 'V75', 'V80', 'V85', 'V90')
+
+# Area ids of the regional ranking lists
+REGIONS = {
+    'east': 66, 'east midlands': 65, 'england': 91, 'london': 67, 'north east': 61, 'north ireland': 94, 'north west': 63,
+    'scotland': 92, 'south east': 68, 'south west': 69, 'wales': 93, 'west midlands': 64, 'yorkshire': 62
+}
+
+# Query parameter and value selecting each type of meeting in a meeting search
+MEETING_TYPES = {
+    'UK Calendar': ('ukcalendar', 'y'), 'World Calendar': ('worldcalendar', 'y'), 'BMC': ('bmc', 'y'),
+    'NAL': ('meetingtypeid', '53'), 'YDL': ('meetingtypeid', '45'), 'SAL': ('meetingtypeid', '44'),
+    'NEL': ('meetingtypeid', '26'), 'MJL': ('meetingtypeid', '34')
+}
+
+# Terrain type codes of a meeting search
+TERRAINS = {
+    'any': 'A', 'virtual': 'V', 'disability': 'D', 'walks': 'W', 'mountain': 'H', 'fell': 'F', 'road/multi/xc': 'RMX',
+    'road/multi': 'RM', '5k/10k/hm/mar': 'B', 'xc': 'X', 'multi': 'M', 'indoor': 'I', 'road': 'R', 'track': 'T',
+    'track/10k/hm/mar/xc': 'TIDEX'
+}
+
+# Track distances ranked by the site, in metres
+TRACK_EVENTS = ('50', '60', '70', '75', '80', '100', '150', '200', '300', '400', '600', '800', '1000', '1200', '1500',
+                '1600', '2000', '3000', '5000', '10000')
+
+# Event codes the site writes in mixed case, by their upper-case form
+EVENT_CODES = {'MILE': 'Mile', 'MAR': 'Mar', 'PARKRUN': 'parkrun', 'DEC': 'Dec', 'HEP': 'Hep', 'PEN': 'Pen', 'OCT': 'Oct'}
+
+ALIASES = {
+    'gender': {'men': 'M', 'man': 'M', 'male': 'M', 'women': 'W', 'woman': 'W', 'female': 'W', 'f': 'W'},
+    'age_group': {'senior': 'SEN', 'seniors': 'SEN', 'overall': 'ALL'},
+    'region': {'northern ireland': 'north ireland', 'ni': 'north ireland', 'eastern': 'east', 'east of england': 'east'},
+    'meeting_type': {'ukcalendar': 'UK Calendar', 'uk': 'UK Calendar', 'worldcalendar': 'World Calendar', 'world': 'World Calendar'},
+    'terrain': {'all': 'any', 'cross country': 'xc', 'cross-country': 'xc', 'walk': 'walks', 'hill': 'mountain', 'hills': 'mountain'},
+    'event': {
+        'marathon': 'Mar', 'half marathon': 'HM', 'high jump': 'HJ', 'pole vault': 'PV', 'long jump': 'LJ', 'triple jump': 'TJ',
+        'shot': 'SP', 'shot put': 'SP', 'discus': 'DT', 'hammer': 'HT', 'javelin': 'JT', 'decathlon': 'Dec',
+        'heptathlon': 'Hep', 'pentathlon': 'Pen', 'octathlon': 'Oct'
+    },
+}
+
+_EVENT = re.compile(r'''^(?:
+    \d+(?:\.\d+)?(?:K|M|MT)(?:XC|MT)?       # road and cross country distances, e.g. 5K, 10M
+    | \d+H\w*                               # hurdles, e.g. 110H, 80HU15W
+    | \d+SC\w*                              # steeplechase, e.g. 3000SC
+    | \d+(?:\.\d+)?(?:K|M)?W\w*             # walks, e.g. 3000W, 20KW
+    | (?:HJ|PV|LJ|TJ|SLJ|SHJ)\w*            # jumps
+    | (?:SP|DT|HT|JT|WT)[\w.]*              # throws, with any implement, e.g. SP7.26K, JT800
+    | (?:DEC|HEP|PEN|OCT|TETRA|QUAD|HEX)\w* # multi events
+    | HM|XC
+)$''', re.X)
+
+# Relays, e.g. 4X400 or 4X100M, which the site writes as '4x400'
+_RELAY = re.compile(r'^(\d+)X(\d+)M?$')
+
+
+def _index(names, aliases):
+    index = {str(name).lower(): name for name in names}
+    index.update({alias: index[name.lower()] for alias, name in aliases.items()})
+    return index
+
+
+_INDEX = {
+    'gender': _index(GENDERS, ALIASES['gender']),
+    'age_group': _index(AGE_GROUPS, ALIASES['age_group']),
+    'region': _index(REGIONS, ALIASES['region']),
+    'meeting_type': _index(MEETING_TYPES, ALIASES['meeting_type']),
+    'terrain': _index(TERRAINS, ALIASES['terrain']),
+}
+
+
+def _lookup(kind, value, choices):
+    found = _INDEX[kind].get(' '.join(str(value).split()).lower())
+    if found is None:
+        raise InvalidQueryError(f'{value!r} is not a valid {kind.replace("_", " ")}. Choose from {", ".join(map(str, choices))}.')
+    return found
+
+
+def normalise_gender(gender):
+    '''Returns the site's code for a gender ('M' or 'W'), accepting e.g. 'men' or 'F'. Raises InvalidQueryError if unknown'''
+    return _lookup('gender', gender, GENDERS)
+
+
+def normalise_age_group(age_group):
+    '''Returns the site's code for an age group, e.g. 'U20' for 'u20' or 'SEN' for 'senior'. Raises InvalidQueryError if unknown'''
+    return _lookup('age_group', age_group, AGE_GROUPS)
+
+
+def normalise_region(region):
+    '''Returns the name of a region in REGIONS, e.g. 'north ireland' for 'Northern Ireland'. Raises InvalidQueryError if unknown'''
+    return _lookup('region', region, REGIONS)
+
+
+def normalise_meeting_type(meeting_type):
+    '''Returns the name of a meeting type in MEETING_TYPES, e.g. 'UK Calendar' for 'uk calendar'. Raises InvalidQueryError if unknown'''
+    return _lookup('meeting_type', meeting_type, MEETING_TYPES)
+
+
+def normalise_terrain(terrain):
+    '''Returns the name of a terrain in TERRAINS, e.g. 'xc' for 'Cross Country'. Raises InvalidQueryError if unknown'''
+    return _lookup('terrain', terrain, TERRAINS)
+
+
+def normalise_event(event):
+    '''
+    Returns the site's code for an event.
+
+            Parameters:
+                    - 'event' (str or int): Event code in any case, e.g. 400, '400m', 'sp7.26k', 'mar' or '4X400',
+                      or a name such as 'Half Marathon'. A trailing 'm' is dropped from track distances in
+                      metres, so '10m' stays 10 miles
+
+            Returns:
+                    - 'event' (str): Event code as used by Power of 10, e.g. '400', 'SP7.26K', 'Mar' or '4x400'
+    '''
+    name = ' '.join(str(event).split())
+    if name.lower() in ALIASES['event']:
+        return ALIASES['event'][name.lower()]
+    code = name.replace(' ', '').upper()
+    if code.endswith('M') and code[:-1] in TRACK_EVENTS:
+        code = code[:-1]
+    if code in TRACK_EVENTS:
+        return code
+    relay = _RELAY.match(code)
+    if relay:
+        return f'{relay[1]}x{relay[2]}'
+    if code in EVENT_CODES:
+        return EVENT_CODES[code]
+    if _EVENT.match(code):
+        # Multi events keep the site's case of their name, e.g. 'HepI'
+        prefix = code[:3]
+        return EVENT_CODES[prefix] + code[3:] if prefix in ('DEC', 'HEP', 'PEN', 'OCT') else code
+    raise InvalidQueryError(f'{event!r} is not a valid event. Use a Power of 10 event code, e.g. 400, 5K, HM, LJ or SP7.26K.')
+
+
+def normalise_year(year):
+    '''Returns a year as an int, raising InvalidQueryError if it is not a number'''
+    try:
+        return int(str(year).strip())
+    except ValueError:
+        raise InvalidQueryError(f'{year!r} is not a valid year.') from None
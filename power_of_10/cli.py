@@ -0,0 +1,284 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from .athletes import get_athlete
+from .batch import fetch_many
+from .client import PowerOf10Client
+from .coaches import search_coaches
+from .crawler import RankingCrawler
+from .planner import QueryPlanner
+from .results import get_results
+from .sinks import APPENDABLE, SINKS, open_sink, sink_format
+
+
+__all__ = ['parse_ids', 'Checkpoint', 'Progress', 'export', 'main']
+
+
+def parse_ids(values, stdin=None):
+    '''
+    Yields ids from command-line values, one at a time, so a long id list is never held in memory.
+
+            Parameters:
+                    - 'values' (arr): Values, each an id, an inclusive range ('100-200'), '@path' of a file of
+                      ids or ranges (one per line, '#' starts a comment), or '-' for the same read from stdin
+                    - 'stdin' (file): Optional file to read '-' from (defaults to sys.stdin)
+
+            Returns:
+                    - generator of ids, as strings
+    '''
+    for value in values:
+        if value == '-' or value.startswith('@'):
+            f = (stdin or sys.stdin) if value == '-' else open(value[1:], encoding='utf-8')
+            try:
+                for line in f:
+                    line = line.split('#', 1)[0].strip()
+                    if line:
+                        yield from parse_ids([line])
+            finally:
+                if f is not stdin and f is not sys.stdin:
+                    f.close()
+        else:
+            start, sep, stop = value.partition('-')
+            if sep and start.isdigit() and stop.isdigit():
+                yield from (str(i) for i in range(int(start), int(stop) + 1))
+            else:
+                yield value
+
+
+class Checkpoint:
+    '''
+    File of the keys an export has finished, one per line. A key is only added once its rows
+    have been written and flushed, so an interrupted export started again skips exactly those.
+
+            Parameters:
+                    - 'path' (str): Optional path of the checkpoint file (None keeps nothing)
+    '''
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = set()
+        if path is not None and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.done = {line.rstrip('\n') for line in f if line.strip()}
+
+    def add(self, key):
+        if self.path is None:
+            return
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(f'{key}\n')
+        self.done.add(str(key))
+
+
+class Progress:
+    '''
+    Progress callback printing a single updating line of counts and throughput.
+
+            Parameters:
+                    - 'unit' (str): Name of the items being exported, e.g. 'athletes'
+                    - 'file' (file): File to print to (defaults to stderr)
+                    - 'interval' (float): Minimum seconds between updates
+    '''
+
+    def __init__(self, unit='items', file=None, interval=0.5):
+        self.unit = unit
+        self.file = file or sys.stderr
+        self.interval = interval
+        self.start = time.monotonic()
+        self._last = 0.0
+
+    def __call__(self, counts, final=False):
+        now = time.monotonic()
+        if not final and now - self._last < self.interval:
+            return
+        self._last = now
+        elapsed = max(now - self.start, 1e-9)
+        done = counts.get(self.unit, 0)
+        line = (f"\r{done} {self.unit}, {counts.get('rows', 0)} rows, {counts.get('errors', 0)} errors, "
+                f"{counts.get('skipped', 0)} skipped | {done / elapsed:.1f} {self.unit}/sec, "
+                f"{counts.get('rows', 0) / elapsed:.0f} rows/sec, {elapsed:.0f}s")
+        print(line, end='\n' if final else '', file=self.file, flush=True)
+
+
+def export(func, keys, output, format=None, workers=8, checkpoint=None, client=None, unit='items', progress=None, errors=None):
+    '''
+    Fetches every key with a function returning rows, concurrently, and streams the rows to a sink
+    as each key finishes. Keys are read lazily and rows are written as they arrive, so memory stays
+    flat however many keys there are.
+
+            Parameters:
+                    - 'func' (function): Function taking a key and a 'client' keyword and returning a list of row dicts
+                    - 'keys' (iterable): Keys to fetch
+                    - 'output' (str or sink): Output path ('-' for stdout) or an object with write(record)
+                    - 'format' (str): Optional output format, 'csv', 'jsonl' or 'parquet' (defaults from the extension)
+                    - 'workers' (int): Number of keys fetched at once
+                    - 'checkpoint' (str): Optional path of a checkpoint file. Keys recorded in it are skipped and
+                      the output is appended to, so an interrupted export can be resumed
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+                    - 'unit' (str): Name of the keys in the counts, e.g. 'athletes'
+                    - 'progress' (function): Optional callback called with the running counts after each key
+                    - 'errors' (function): Optional callback called with (key, exception) for each key that failed
+
+            Returns:
+                    - 'counts' (dict): Number of '<unit>' done, 'rows' written, 'errors' and 'skipped' (already done) keys
+    '''
+    done = Checkpoint(checkpoint)
+    counts = {unit: 0, 'rows': 0, 'errors': 0, 'skipped': 0}
+
+    def remaining():
+        for key in keys:
+            if str(key) in done.done:
+                counts['skipped'] += 1
+            else:
+                yield key
+
+    resume = bool(done.done) and not hasattr(output, 'write')
+    if resume and sink_format(output, format) not in APPENDABLE:
+        raise ValueError('Resuming an export needs CSV or JSON Lines output, as a partly written Parquet file cannot be appended to.')
+    sink = output if hasattr(output, 'write') and not hasattr(output, 'fileno') else open_sink(output, format, append=resume)
+
+    try:
+        for key, rows in fetch_many(func, remaining(), workers=workers, client=client):
+            if isinstance(rows, Exception):
+                counts['errors'] += 1
+                if errors is not None:
+                    errors(key, rows)
+            else:
+                for row in rows:
+                    sink.write(row)
+                if checkpoint is not None and hasattr(sink, 'flush'):
+                    sink.flush()
+                done.add(key)
+                counts[unit] += 1
+                counts['rows'] += len(rows)
+            if progress is not None:
+                progress(counts)
+    finally:
+        if sink is not output:
+            sink.close()
+    return counts
+
+
+def _result_rows(meeting_id, client=None):
+    meeting = get_results(meeting_id, client=client)
+    return [dict(result, meeting_id=meeting_id, title=meeting['title'], meeting_date=meeting['date'],
+                 location=meeting['location'], event=race['event'], event_age_group=race['age_group'], race=race['race'])
+            for race in meeting['results'] for result in race['results']]
+
+
+def _athlete_rows(athlete_id, client=None):
+    return [dict(get_athlete(athlete_id, client=client), athlete_id=athlete_id)]
+
+
+def _performance_rows(athlete_id, client=None):
+    athlete = get_athlete(athlete_id, client=client, sections=('performances',))
+    return [dict(performance, athlete_id=athlete_id) for performance in athlete['performances']]
+
+
+def _coaching_rows(coach_id, client=None):
+    athlete = get_athlete(coach_id, client=client, sections=('coaching',))
+    return [dict(coached, coach_id=coach_id) for coached in athlete['coaching']]
+
+
+def _coach_search_rows(query, client=None):
+    found = search_coaches(**{query[0]: query[1]}, client=client)
+    if isinstance(found, str):
+        # A search matching one coach redirects to their profile
+        return [{'athlete_id': found, query[0]: query[1]}]
+    return found
+
+
+def _years(values):
+    return [int(year) for year in parse_ids(values)]
+
+
+def _cache_path(value):
+    '''Returns the cache file for --cache, which may name the file or a directory to keep cache.sqlite in'''
+    if value is None or not (os.path.isdir(value) or value.endswith(('/', os.sep))):
+        return value
+    os.makedirs(value, exist_ok=True)
+    return os.path.join(value, 'cache.sqlite')
+
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='powerof10', description='Export Power of 10 rankings, meetings, results, athletes and coaches.')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-o', '--output', default='-', help='output file (default stdout)')
+    common.add_argument('--format', choices=sorted(SINKS), help='output format (default from the output extension, else jsonl)')
+    common.add_argument('--workers', type=int, default=8, help='number of concurrent fetches')
+    common.add_argument('--rate', type=float, default=2.0, help='maximum requests per second, adapted to the site\'s latency (0 for no limit)')
+    common.add_argument('--checkpoint', help='checkpoint file, to resume an interrupted export')
+    common.add_argument('--cache', help='cache file of fetched pages, or a directory to keep cache.sqlite in')
+    common.add_argument('--archive', help='directory of a page archive to keep every fetched page in')
+    common.add_argument('--transport', help='base url to send requests to instead of the site, e.g. a local replay server')
+    common.add_argument('-q', '--quiet', action='store_true', help='do not show progress')
+    ids = argparse.ArgumentParser(add_help=False)
+    ids.add_argument('ids', nargs='*', default=['-'], help='ids, ranges (e.g. 100-200), @file of ids, or - for stdin (the default)')
+
+    commands = parser.add_subparsers(dest='command', required=True)
+    rankings = commands.add_parser('rankings', parents=[common], help='ranking lists of a range of years, events, age groups and genders')
+    rankings.add_argument('--years', nargs='+', required=True, help='years or ranges, e.g. 2010-2024')
+    rankings.add_argument('--events', nargs='+', required=True, help='events, e.g. 100 200 400')
+    rankings.add_argument('--age-groups', nargs='+', default=['SEN'], help='age groups (default SEN)')
+    rankings.add_argument('--genders', nargs='+', default=['M', 'W'], help='genders (default M W)')
+    rankings.add_argument('--regions', nargs='+', help='regions (default the national lists)')
+    rankings.add_argument('--top', action='store_true', help='fetch only the top of each list rather than every ranked athlete')
+
+    meetings = commands.add_parser('meetings', parents=[common], help='meetings held in a range of years, split into narrower searches as needed')
+    meetings.add_argument('--years', nargs='+', required=True, help='years or ranges, e.g. 2010-2024')
+    for name in ('event', 'meeting', 'venue', 'meeting-type', 'terrain'):
+        meetings.add_argument(f'--{name}', help=f'{name.replace("-", " ")} to search for')
+
+    commands.add_parser('results', parents=[common, ids], help='results of meetings by meeting id, one row per result')
+    athletes = commands.add_parser('athletes', parents=[common, ids], help='athlete profiles by athlete id')
+    athletes.add_argument('--performances', action='store_true', help='write one row per performance instead of one per athlete')
+    coaches = commands.add_parser('coaches', parents=[common, ids], help='athletes coached, by coach id, one row per athlete coached')
+    coaches.add_argument('--search', choices=['surname', 'club'], help='treat the ids as coach surnames or clubs to search for instead')
+    return parser
+
+
+# Name of the keys each command's progress and counts are in
+UNITS = {'rankings': 'slices', 'meetings': 'years'}
+
+
+def main(argv=None, client=None):
+    args = _parser().parse_args(argv)
+    if client is None:
+        client = PowerOf10Client(pool_size=max(10, args.workers), cache=_cache_path(args.cache), rate_limit=args.rate or None, archive=args.archive,
+                                 transport=args.transport)
+    unit = UNITS.get(args.command, args.command)
+    progress = None if args.quiet else Progress(unit)
+
+    def error(key, e):
+        print(f'\n{key}: {type(e).__name__}: {e}', file=sys.stderr)
+
+    if args.command == 'rankings':
+        crawler = RankingCrawler(_years(args.years), args.events, args.age_groups, args.genders, args.regions or (None,),
+                                 workers=args.workers, rate=None, checkpoint=args.checkpoint, full=not args.top, client=client)
+        counts = crawler.run(args.output, args.format, progress=progress)
+    else:
+        if args.command == 'meetings':
+            planner = QueryPlanner(client=client, workers=args.workers)
+            query = {'event': args.event, 'meeting': args.meeting, 'venue': args.venue, 'meeting_type': args.meeting_type, 'terrain': args.terrain}
+            func = lambda year, client=None: [dict(m, year=year) for m in planner.search_event(year=year, **query)]
+            keys, workers = _years(args.years), 1
+        elif args.command == 'results':
+            func, keys, workers = _result_rows, parse_ids(args.ids), args.workers
+        elif args.command == 'athletes':
+            func, keys, workers = _performance_rows if args.performances else _athlete_rows, parse_ids(args.ids), args.workers
+        elif args.search:
+            func, keys, workers = _coach_search_rows, ((args.search, value) for value in parse_ids(args.ids)), args.workers
+        else:
+            func, keys, workers = _coaching_rows, parse_ids(args.ids), args.workers
+        counts = export(func, keys, args.output, args.format, workers=workers, checkpoint=args.checkpoint,
+                        client=client, unit=unit, progress=progress, errors=error)
+
+    if progress is not None:
+        progress(counts, final=True)
+    return 1 if counts['errors'] and not counts[unit] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
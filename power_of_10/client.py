@@ -0,0 +1,353 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .archive import ArchiveWriter
+from .cache import ResponseCache, normalise_url
+from .coalesce import SingleFlight, MemoCache
+from .instrument import Metrics, current_call, instrumented, _rows
+from .ratelimit import AdaptiveRateLimiter
+from .store import LocalStore
+
+
+__all__ = ['BASE_URL', 'HostAdapter', 'PowerOf10Client', 'get_default_client', 'set_default_client', 'get_client']
+
+
+BASE_URL = 'https://www.thepowerof10.info'
+
+
+class _LimitedRetry(Retry):
+    '''
+    Retry that goes through a rate limiter. Before each retry, the failure is recorded with the
+    limiter and the retry waits for its turn like any other request.
+    '''
+
+    def __init__(self, *args, limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.limiter = self.limiter
+        return retry
+
+    def sleep(self, response=None):
+        if self.limiter is not None:
+            self.limiter.record(0.0, error=True)
+        super().sleep(response)
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+
+class HostAdapter(HTTPAdapter):
+    '''
+    Requests adapter that sends requests for the site to another host, e.g. a local replay server.
+    Responses keep the site's urls, so everything downstream sees the same urls as against the site.
+
+            Parameters:
+                    - 'base_url' (str): Scheme and host to send requests to, e.g. 'http://127.0.0.1:8000'
+                    - '**kwargs': Passed to requests' HTTPAdapter, e.g. 'pool_maxsize' and 'max_retries'
+    '''
+
+    def __init__(self, base_url, **kwargs):
+        self.base_url = base_url.rstrip('/')
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if request.url.startswith(BASE_URL):
+            request.url = self.base_url + request.url[len(BASE_URL):]
+        response = super().send(request, **kwargs)
+        if response.url.startswith(self.base_url):
+            response.url = BASE_URL + response.url[len(self.base_url):]
+        return response
+
+
+class PowerOf10Client:
+    '''
+    HTTP client shared by every Power of 10 lookup.
+
+    Holds a keep-alive requests.Session with a pooled adapter so repeated calls
+    reuse open connections instead of paying a new TCP and TLS handshake each time.
+    Server errors (5xx) and dropped connections are retried with exponential backoff.
+
+            Parameters:
+                    - 'pool_size' (int): Maximum number of pooled connections kept open to the site
+                    - 'timeout' (float or tuple): Connect/read timeout in seconds passed to each request
+                    - 'retries' (int): Number of retries for 5xx responses and connection errors
+                    - 'backoff_factor' (float): Backoff factor between retries (0.5 waits 0.5s, 1s, 2s, ...)
+                    - 'session' (requests.Session): Optional session to use instead of creating one
+                    - 'cache' (ResponseCache or str): Optional response cache, or the path of one to open
+                    - 'store' (LocalStore or str): Optional local store that lookups read through, or the path of one to open
+                    - 'coalesce' (bool): Share one fetch and parse between concurrent lookups of the same page
+                    - 'memo_size' (int): Number of parsed results to keep in memory for repeat lookups (0 to keep none)
+                    - 'memo_ttl' (float): Seconds a parsed result is kept in memory
+                    - 'rate_limit' (float or RateLimiter): Optional limit on requests started per second. A number
+                      starts an AdaptiveRateLimiter at that rate; pass a limiter opened with a path to share it between processes.
+                      Retries of failed requests also wait for the limiter, and count as errors with an adaptive one
+                    - 'hooks' (arr): Optional functions called with an event dict after every lookup (see instrument.instrumented)
+                    - 'metrics' (bool): Collect timing histograms and counters of every lookup in client.metrics
+                    - 'archive' (ArchiveWriter or str): Optional archive that every fetched page is written to, or the
+                      directory of one to open
+                    - 'transport' (str or requests adapter): Optional transport for requests to the site: the base url of
+                      another host to send them to instead (e.g. a replay.ReplayServer), or a requests adapter (e.g. a
+                      replay.ReplayAdapter). Urls, caches, stores and archives are unchanged
+    '''
+
+    def __init__(self, pool_size=10, timeout=30, retries=3, backoff_factor=0.5, session=None, cache=None, store=None,
+                 coalesce=True, memo_size=0, memo_ttl=30.0, rate_limit=None, hooks=None, metrics=False, archive=None,
+                 transport=None):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.cache = ResponseCache(cache) if isinstance(cache, str) else cache
+        self.store = LocalStore(store) if isinstance(store, str) else store
+        self.flights = SingleFlight() if coalesce else None
+        self.memo = MemoCache(memo_size, memo_ttl) if memo_size else None
+        self.rate_limit = AdaptiveRateLimiter(rate_limit) if isinstance(rate_limit, (int, float)) else rate_limit
+        self.archive = ArchiveWriter(archive) if isinstance(archive, str) else archive
+        self.hooks = list(hooks or [])
+        self.metrics = Metrics() if metrics else None
+        if self.metrics is not None:
+            self.hooks.append(self.metrics)
+
+        self.session = session if session is not None else requests.Session()
+        retry = _LimitedRetry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False,
+            limiter=self.rate_limit
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.transport = transport
+        if isinstance(transport, str):
+            self.session.mount(BASE_URL, HostAdapter(transport, pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry))
+        elif transport is not None:
+            self.session.mount(BASE_URL, transport)
+
+    def get(self, url, headers=None):
+        '''
+        Returns the response for a GET request to the given url using the pooled session.
+        When the client has a cache, fresh cached pages are returned without a request and
+        stale ones are revalidated with a conditional request.
+
+                Parameters:
+                        - 'url' (str): Full url of the page to fetch
+                        - 'headers' (dict): Optional extra request headers
+
+                Returns:
+                        - 'response' (requests.Response): Response of the request
+        '''
+        call = current_call()
+        if call is None and self.hooks:
+            with instrumented(self.hooks, 'page', url):
+                return self.get(url, headers)
+        if self.cache is None:
+            return self._send(url, headers)
+
+        entry = self.cache.lookup(url)
+        if entry is not None and entry['fresh']:
+            self.cache.hit(url, entry)
+            if call is not None:
+                call.update(url=url, source='cache', cache='hit')
+            return entry['response']
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            request_headers.update(self.cache.conditional_headers(entry))
+        response = self._send(url, request_headers)
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.hit(url, entry, revalidated=True)
+            if call is not None:
+                call['cache'] = 'revalidated'
+            return entry['response']
+        if response.status_code == 200:
+            self.cache.store(url, response)
+        else:
+            self.cache.miss()
+        if call is not None:
+            call['cache'] = 'miss'
+        return response
+
+    def _send(self, url, headers):
+        call = current_call()
+        if self.rate_limit is None and call is None and self.archive is None:
+            return self.session.get(url, headers=headers, timeout=self.timeout)
+        if self.rate_limit is not None:
+            self.rate_limit.acquire()
+        start = time.monotonic()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            if self.rate_limit is not None:
+                self.rate_limit.record(time.monotonic() - start, error=True)
+            raise
+        latency = time.monotonic() - start
+        if self.rate_limit is not None:
+            self.rate_limit.record(latency, error=response.status_code == 429 or response.status_code >= 500)
+        if call is not None:
+            retries = getattr(getattr(response.raw, 'retries', None), 'history', ())
+            call.update(url=url, status=response.status_code, source='network', retries=call['retries'] + len(retries))
+            call['bytes'] += len(response.content)
+            call['latency'] += latency
+        if self.archive is not None and response.status_code == 200:
+            final = {'final_url': response.url} if response.url and response.url != url else {}
+            self.archive.write(url, response.content, response.status_code, **final)
+        return response
+
+    def shared(self, key, fetch):
+        '''
+        Returns fetch(), sharing the result with concurrent calls for the same key and, when the
+        client has a memo, with calls made again within memo_ttl seconds. Shared results are the
+        same object for every caller and should be treated as read-only.
+
+                Parameters:
+                        - 'key' (tuple): Key of the lookup, e.g. ('athlete', '64524')
+                        - 'fetch' (function): Function with no arguments that fetches and parses the data
+
+                Returns:
+                        - 'data' (dict or arr): Data as returned by fetch
+        '''
+        if self.hooks and current_call() is None:
+            with instrumented(self.hooks, key[0], key[1]) as call:
+                data = self.shared(key, fetch)
+                call['rows'] = _rows(data)
+                return data
+
+        if self.memo is not None:
+            data = self.memo.get(key, _MISSING)
+            if data is not _MISSING:
+                call = current_call()
+                if call is not None:
+                    call['source'] = 'memo'
+                return data
+
+            def fetch(fetch=fetch):
+                data = fetch()
+                self.memo.put(key, data)
+                return data
+
+        if self.flights is None:
+            return fetch()
+        return self.flights.do(key, fetch)
+
+    def stored(self, kind, key, fetch):
+        '''
+        Returns the data for a lookup from the local store if the client has one and it holds
+        the data, otherwise calls 'fetch' and ingests what it returns into the store. Concurrent
+        lookups of the same page share one fetch and parse (see shared).
+
+                Parameters:
+                        - 'kind' (str): Kind of lookup (see LocalStore.lookup)
+                        - 'key' (str): Athlete or meeting id, or the url of a search or ranking list
+                        - 'fetch' (function): Function with no arguments that fetches and parses the data
+
+                Returns:
+                        - 'data' (dict or arr): Data as returned by the lookup
+        '''
+        flight = str(key)
+        if flight.startswith('http'):
+            flight = normalise_url(flight)
+        return self.shared((kind, flight), fetch if self.store is None else lambda: self._read_through(kind, key, fetch))
+
+    def _read_through(self, kind, key, fetch):
+        data = self.store.lookup(kind, key)
+        if data is None:
+            data = fetch()
+            self.store.ingest(kind, key, data)
+        else:
+            call = current_call()
+            if call is not None:
+                call['source'] = 'store'
+        return data
+
+    def close(self):
+        '''Closes the session and every pooled connection'''
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def search_athletes(self, firstname=None, surname=None, club=None, records=False):
+        from .athletes import search_athletes
+        return search_athletes(firstname=firstname, surname=surname, club=club, client=self, records=records)
+
+    def get_athlete(self, athlete_id, marks=False, sections=None, lazy=False, records=False):
+        from .athletes import get_athlete
+        return get_athlete(athlete_id, client=self, marks=marks, sections=sections, lazy=lazy, records=records)
+
+    def iter_performances(self, athlete_id, since=None, event=None, marks=False):
+        from .athletes import iter_performances
+        return iter_performances(athlete_id, since=since, event=event, marks=marks, client=self)
+
+    def search_coaches(self, firstname=None, surname=None, club=None):
+        from .coaches import search_coaches
+        return search_coaches(firstname=firstname, surname=surname, club=club, client=self)
+
+    def get_rankings(self, year, gender, age_group, event, region=None, as_table=False, marks=False, records=False):
+        from .rankings import get_rankings
+        return get_rankings(year, gender, age_group, event, region=region, client=self, as_table=as_table, marks=marks, records=records)
+
+    def search_event(self, event=None, meeting=None, venue=None, date_from=None, year=None, date_to=None, meeting_type=None, terrain=None, records=False):
+        from .results import search_event
+        return search_event(event=event, meeting=meeting, venue=venue, date_from=date_from, year=year,
+                            date_to=date_to, meeting_type=meeting_type, terrain=terrain, client=self, records=records)
+
+    def get_results(self, meeting_id, marks=False, records=False):
+        from .results import get_results
+        return get_results(meeting_id, client=self, marks=marks, records=records)
+
+    def get_athletes(self, athlete_ids, workers=8):
+        from .batch import get_athletes
+        return get_athletes(athlete_ids, workers=workers, client=self)
+
+    def get_results_many(self, meeting_ids, workers=8):
+        from .batch import get_results_many
+        return get_results_many(meeting_ids, workers=workers, client=self)
+
+
+_MISSING = object()
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_default_client():
+    '''
+    Returns the package-wide client used when no client is passed to a lookup function.
+    The client is created on first use.
+    '''
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = PowerOf10Client()
+    return _default_client
+
+
+def set_default_client(client):
+    '''
+    Replaces the package-wide client used by the module-level lookup functions.
+
+            Parameters:
+                    - 'client' (PowerOf10Client): Client to use, or None to reset to a fresh default
+    '''
+    global _default_client
+    with _default_lock:
+        _default_client = client
+
+
+def get_client(client=None):
+    '''Returns the given client, falling back to the package-wide default client'''
+    return client if client is not None else get_default_client()
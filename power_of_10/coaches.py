@@ -1,8 +1,12 @@
-import requests
-from bs4 import BeautifulSoup
+from .client import get_client
+from . import dom
 from .exceptions import QueryError, BroadQueryError
 
-def search_coaches(firstname=None, surname=None, club=None):
+
+__all__ = ['search_coaches', 'parse_coach_search']
+
+
+def search_coaches(firstname=None, surname=None, club=None, client=None):
     '''
     Returns a list of coaches with the inputted firstname, surname or club.
 
@@ -10,6 +14,7 @@ def search_coaches(firstname=None, surname=None, club=None):
                     - 'firstname' (str): Optional first name of coach argument
                     - 'surname' (str): Optiona surname of coach argument
                     - 'club' (str): Optional club of coach argument
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
 
             Returns:
                     - 'coaches' (arr): List of coach data in dict
@@ -19,6 +24,19 @@ def search_coaches(firstname=None, surname=None, club=None):
                         - 'club' (str): Club of coach
                         - 'athlete_id' (int): reference id of athlete (used by PowerOf10)
     '''
+    url = _search_coaches_url(firstname, surname, club)
+    c = get_client(client)
+
+    def fetch():
+        html = c.get(url)
+        if html.history != [] or 'profile.aspx' in html.url:
+            return _single_coach(html.url)
+        return parse_coach_search(html.content)
+
+    return c.stored('coach_search', url, fetch)
+
+
+def _search_coaches_url(firstname, surname, club):
     url = f'https://www.thepowerof10.info/coaches/coacheslookup.aspx?'
     if surname is not None:
         url += f'surname={surname.replace(" ","+")}&'
@@ -29,30 +47,42 @@ def search_coaches(firstname=None, surname=None, club=None):
 
     if firstname is None and surname is None and club is None:
         raise QueryError('Please input a firstname, surname or club')
+    return url
+
 
-    html = requests.get(url)
-    soup = BeautifulSoup(html.text, 'html.parser')
+def _single_coach(url):
+    ath = url.split('=')[1]
+    print(f'Only one athlete found with athlete_id: {ath}')
+    return ath
 
-    if html.history != []:
-        ath = html.url.split('=')[1]
-        print(f'Only one athlete found with athlete_id: {ath}')
-        return ath
 
-    results = soup.find('div', {'id': 'cphBody_pnlResults'}).find_all('tr')
+def parse_coach_search(html):
+    '''
+    Returns the list of coaches on a saved or fetched coach search page (see search_coaches).
+
+            Parameters:
+                    - 'html' (str, bytes or path): Page html as text or raw bytes, or the path of a saved page as a pathlib.Path
+
+            Returns:
+                    - 'coaches' (arr): List of coach data in dict, as returned by search_coaches
+    '''
+    parser = dom.get_parser()
+    soup = parser.parse(html)
 
-    if 'cphBody_lblResultsErrorMessage' in str(results[0]):
-        raise QueryError(results[0].text)
+    results = parser.find_all(parser.find(soup, 'div', id='cphBody_pnlResults'), 'tr')
+
+    if parser.find(results[0], 'span', id='cphBody_lblResultsErrorMessage') is not None:
+        raise QueryError(parser.text(results[0]))
 
     coaches = []
     for i in results[1:-1]:
-        dets = i.find_all('td')
+        dets = parser.find_all(i, 'td')
         coaches.append({
-            'firstname': dets[0].text,
-            'surname': dets[1].text,
-            'sex': dets[2].text,
-            'club': dets[3].text,
-            'athlete_id': str(dets[4]).split('"')[1].split('=')[1]
+            'firstname': parser.text(dets[0]),
+            'surname': parser.text(dets[1]),
+            'sex': parser.text(dets[2]),
+            'club': parser.text(dets[3]),
+            'athlete_id': parser.link_param(dets[4], 'athleteid')
         })
 
     return coaches
-
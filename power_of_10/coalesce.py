@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+__all__ = ['SingleFlight', 'MemoCache']
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    '''
+    Collapses concurrent calls for the same key into one: the first caller runs the function and
+    every caller that arrives while it is running waits for it and gets the same result (or exception).
+    '''
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, func):
+        '''
+        Returns func() for the key, sharing the result of a call for the same key already in flight.
+
+                Parameters:
+                        - 'key' (hashable): Key identifying the call
+                        - 'func' (function): Function with no arguments to run if no call for the key is in flight
+
+                Returns:
+                        - 'result': Result of func, the same object for every coalesced caller
+        '''
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def in_flight(self):
+        '''Returns the number of keys currently being fetched'''
+        with self._lock:
+            return len(self._calls)
+
+
+class MemoCache:
+    '''
+    Small thread-safe in-memory LRU of parsed results that expire after a few seconds.
+
+            Parameters:
+                    - 'max_size' (int): Maximum number of results kept
+                    - 'ttl' (float): Seconds a result is kept (None to keep until evicted)
+    '''
+
+    def __init__(self, max_size=256, ttl=30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        '''Returns the result stored for the key, or default if there is none or it has expired'''
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl is not None and entry[0] + self.ttl < time.monotonic()):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        '''Stores a result, evicting the least recently used ones past max_size'''
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
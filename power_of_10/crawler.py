@@ -0,0 +1,174 @@
+import itertools
+import os
+import threading
+import numpy as np
+from .batch import fetch_many
+from .client import get_client
+from .marks import parse_mark
+from .rankings import _rankings_url, parse_ranking_list
+from .ratelimit import RateLimiter
+from .sinks import APPENDABLE, open_sink, sink_format
+from .table import parse_date
+
+
+__all__ = ['ranking_slices', 'RankingCrawler']
+
+
+# Query parameter of the site's "show all" link, which lists every ranked athlete instead of the top of the list
+SHOW_ALL = 'limit=0'
+
+
+def ranking_slices(years, events, age_groups, genders, regions=(None,)):
+    '''
+    Returns every (year, gender, age_group, event, region) ranking list slice of the given ranges.
+
+            Parameters:
+                    - 'years' (arr): Years, e.g. range(2010, 2025)
+                    - 'events' (arr): Events, e.g. ['100', '200', '400']
+                    - 'age_groups' (arr): Age groups, e.g. ['U17', 'U20', 'SEN']
+                    - 'genders' (arr): Genders, e.g. ['M', 'W']
+                    - 'regions' (arr): Regions, with None for the national list (defaults to national only)
+
+            Returns:
+                    - 'slices' (arr): List of (year, gender, age_group, event, region) tuples
+    '''
+    return [(year, gender, age_group, event, region)
+            for year, event, age_group, gender, region in itertools.product(years, events, age_groups, genders, regions)]
+
+
+def _slice_key(ranking_slice):
+    return '|'.join('' if v is None else str(v) for v in ranking_slice)
+
+
+def _typed_row(ranking_slice, rank):
+    year, gender, age_group, event, region = ranking_slice
+    date = parse_date(rank['date'])
+    performance = parse_mark(rank['performance'], event).value
+    pb = parse_mark(rank['pb'], event).value
+    return dict(
+        rank,
+        season=year,
+        gender=gender,
+        ranking_age_group=age_group,
+        event=event,
+        region=region,
+        rank=int(rank['rank']) if rank['rank'].isdigit() else None,
+        performance_value=None if performance != performance else performance,
+        pb_value=None if pb != pb else pb,
+        date=None if np.isnat(date) else str(date),
+        raw_date=rank['date'],
+    )
+
+
+class RankingCrawler:
+    '''
+    Crawls every ranking list in a cartesian range of years, events, age groups, genders and
+    regions, fetching slices concurrently under one rate limit and streaming typed rows to a sink.
+
+    Finished slices are appended to a checkpoint file once their rows have been written, so an
+    interrupted crawl started again with the same checkpoint skips them.
+
+            Parameters:
+                    - 'years', 'events', 'age_groups', 'genders', 'regions': Ranges to crawl (see ranking_slices)
+                    - 'workers' (int): Number of slices fetched at once
+                    - 'rate' (float or RateLimiter): Maximum requests per second across all workers, or a limiter
+                      to share (None for no limit)
+                    - 'checkpoint' (str): Optional path of the checkpoint file
+                    - 'full' (bool): Fetch the "show all" list of each slice rather than the top of it
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+    '''
+
+    def __init__(self, years, events, age_groups, genders, regions=(None,), workers=4, rate=2.0, checkpoint=None, full=True, client=None):
+        self.slices = ranking_slices(years, events, age_groups, genders, regions)
+        self.workers = workers
+        self.limiter = rate if isinstance(rate, RateLimiter) else RateLimiter(rate) if rate else None
+        self.checkpoint = checkpoint
+        self.full = full
+        self.client = client
+        self._lock = threading.Lock()
+
+    def done(self):
+        '''Returns the keys of the slices recorded in the checkpoint file'''
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return set()
+        with open(self.checkpoint, encoding='utf-8') as f:
+            return {line.rstrip('\n') for line in f if line.strip()}
+
+    def _mark_done(self, ranking_slice):
+        if self.checkpoint is None:
+            return
+        with self._lock, open(self.checkpoint, 'a', encoding='utf-8') as f:
+            f.write(_slice_key(ranking_slice) + '\n')
+
+    def _fetch(self, ranking_slice, client=None):
+        url = _rankings_url(*ranking_slice)
+        if self.full:
+            url += '&' + SHOW_ALL
+
+        def fetch():
+            if self.limiter is not None:
+                self.limiter.acquire()
+            return parse_ranking_list(client.get(url).content)
+
+        return client.stored('rankings', url, fetch)
+
+    def crawl(self):
+        '''
+        Yields the result of each remaining slice as it finishes.
+
+                Returns:
+                        - generator of (slice, rows_or_exception) tuples, where 'rows' are typed ranking rows:
+                          the get_rankings fields plus 'season', 'gender', 'ranking_age_group', 'event', 'region',
+                          'rank' as an int, 'performance_value'/'pb_value' in seconds or metres and 'date' as 'YYYY-MM-DD'
+        '''
+        done = self.done()
+        remaining = [s for s in self.slices if _slice_key(s) not in done]
+        for ranking_slice, ranks in fetch_many(self._fetch, remaining, workers=self.workers, client=get_client(self.client)):
+            if isinstance(ranks, Exception):
+                yield ranking_slice, ranks
+            else:
+                yield ranking_slice, [_typed_row(ranking_slice, r) for r in ranks]
+
+    def run(self, output, format=None, progress=None):
+        '''
+        Crawls every remaining slice and writes the rows to a sink.
+
+                Parameters:
+                        - 'output' (str or sink): Output path ('-' for stdout) or an object with write(record)
+                        - 'format' (str): Optional output format, 'csv', 'jsonl' or 'parquet' (defaults from the extension)
+                        - 'progress' (function): Optional callback called with the running counts after each slice
+
+                Returns:
+                        - 'counts' (dict): Number of 'slices', 'rows', 'errors' and 'skipped' (already done) slices
+        '''
+        skipped = len(self._done_slices())
+        if hasattr(output, 'write') and not hasattr(output, 'fileno'):
+            sink = output
+        elif skipped and sink_format(output, format) not in APPENDABLE:
+            raise ValueError('Resuming a crawl needs CSV or JSON Lines output, as a partly written Parquet file cannot be appended to.')
+        else:
+            sink = open_sink(output, format, append=skipped > 0)
+
+        counts = {'slices': 0, 'rows': 0, 'errors': 0, 'skipped': skipped}
+        try:
+            for ranking_slice, rows in self.crawl():
+                if isinstance(rows, Exception):
+                    counts['errors'] += 1
+                else:
+                    for row in rows:
+                        sink.write(row)
+                    if self.checkpoint is not None and hasattr(sink, 'flush'):
+                        sink.flush()
+                    self._mark_done(ranking_slice)
+                    counts['slices'] += 1
+                    counts['rows'] += len(rows)
+                if progress is not None:
+                    progress(counts)
+        finally:
+            if sink is not output:
+                sink.close()
+        return counts
+
+    def _done_slices(self):
+        done = self.done()
+        return {s for s in self.slices if _slice_key(s) in done}
@@ -0,0 +1,216 @@
+import mmap
+import os
+import re
+import time
+from html import escape
+from bs4 import BeautifulSoup
+from .instrument import current_call
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:
+    lxml = None
+
+
+__all__ = ['Parser', 'SoupParser', 'LxmlParser', 'PARSERS', 'get_parser', 'set_parser']
+
+
+MMAP_THRESHOLD = 1024 * 1024
+CHUNK_SIZE = 256 * 1024
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+
+class Parser:
+    '''
+    Minimal tree API the page parsers are written against, so each page is
+    parsed once and walked the same way whichever HTML library is in use.
+    '''
+    name = None
+
+    def parse(self, source):
+        '''
+        Returns the root element of a page.
+
+                Parameters:
+                        - 'source' (str, bytes or path): Page html as text or raw bytes, or the os.PathLike path of a
+                            saved page (a str is always html). Files of MMAP_THRESHOLD bytes or more are memory-mapped rather than read
+
+                Returns:
+                        - 'root' (element): Root element of the parsed page
+        '''
+        call = current_call()
+        if call is None:
+            return self._parse(source)
+        start = time.perf_counter()
+        root = self._parse(source)
+        call['parse'] += time.perf_counter() - start
+        return root
+
+    def _parse(self, source):
+        if isinstance(source, os.PathLike):
+            return self.parse_file(os.fspath(source))
+        if isinstance(source, (bytearray, memoryview)):
+            source = bytes(source)
+        return self.parse_markup(source)
+
+    def parse_file(self, path):
+        '''Returns the root element of a saved page'''
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+                return self.parse_markup(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return self.parse_buffer(buffer)
+
+    def parse_buffer(self, buffer):
+        '''Returns the root element of a page held in a memory-mapped buffer'''
+        return self.parse_markup(buffer[:])
+
+    def parse_markup(self, markup):
+        raise NotImplementedError
+
+    def find(self, node, tag, **attrs):
+        raise NotImplementedError
+
+    def find_all(self, node, tag):
+        raise NotImplementedError
+
+    def text(self, node):
+        raise NotImplementedError
+
+    def inner_html(self, node):
+        raise NotImplementedError
+
+    def href(self, node):
+        raise NotImplementedError
+
+    def link_param(self, node, key):
+        '''
+        Returns the value of a query parameter in the first link within a node.
+
+                Parameters:
+                        - 'node' (element): Element that is, or contains, the link
+                        - 'key' (str): Name of the query parameter, e.g. 'athleteid'
+
+                Returns:
+                        - 'value' (str): Value of the parameter, or None if there is no such link or parameter
+        '''
+        href = self.href(node)
+        if href is None:
+            return None
+        start = href.lower().find(key + '=')
+        if start == -1:
+            return None
+        start += len(key) + 1
+        end = href.find('&', start)
+        return href[start:] if end == -1 else href[start:end]
+
+
+class SoupParser(Parser):
+    '''Parser backed by BeautifulSoup and Python's built-in html.parser'''
+    name = 'html.parser'
+
+    def parse_markup(self, markup):
+        return BeautifulSoup(markup, 'html.parser')
+
+    def find(self, node, tag, **attrs):
+        return node.find(tag, attrs)
+
+    def find_all(self, node, tag):
+        return node.find_all(tag)
+
+    def text(self, node):
+        return node.text
+
+    def inner_html(self, node):
+        return node.decode_contents()
+
+    def href(self, node):
+        link = node if node.name == 'a' else node.find('a', href=True)
+        return None if link is None else link.get('href')
+
+
+class LxmlParser(Parser):
+    '''Parser backed by lxml's C HTML parser, reading elements and attributes directly'''
+    name = 'lxml'
+
+    def parse_markup(self, markup):
+        if isinstance(markup, str):
+            markup = markup.encode('utf-8')
+            parser = lxml.html.HTMLParser(encoding='utf-8')
+        else:
+            parser = self._bytes_parser(markup)
+        try:
+            return lxml.html.document_fromstring(markup, parser=parser)
+        except lxml.etree.ParserError:
+            return lxml.html.document_fromstring('<html></html>')
+
+    def parse_buffer(self, buffer):
+        parser = self._bytes_parser(buffer)
+        for start in range(0, len(buffer), CHUNK_SIZE):
+            parser.feed(buffer[start:start + CHUNK_SIZE])
+        root = parser.close()
+        return root if root is not None else lxml.html.document_fromstring('<html></html>')
+
+    def _bytes_parser(self, markup):
+        # Pages that declare a charset are decoded with it, anything else is read as utf-8
+        if _CHARSET.search(markup[:4096]) is not None:
+            return lxml.html.HTMLParser()
+        return lxml.html.HTMLParser(encoding='utf-8')
+
+    def find(self, node, tag, **attrs):
+        for element in node.iterdescendants(tag):
+            if all(element.get(k) == v or (k == 'class' and v in element.get(k, '').split()) for k, v in attrs.items()):
+                return element
+        return None
+
+    def find_all(self, node, tag):
+        return list(node.iterdescendants(tag))
+
+    def text(self, node):
+        return node.text_content()
+
+    def inner_html(self, node):
+        return escape(node.text or '', quote=False) + ''.join(
+            self._outer_html(child) + escape(child.tail or '', quote=False) for child in node)
+
+    def _outer_html(self, node):
+        if not isinstance(node.tag, str):
+            return ''
+        attrs = ''.join(f' {k}="{escape(v)}"' for k, v in sorted(node.attrib.items()))
+        if node.tag in VOID_ELEMENTS:
+            return f'<{node.tag}{attrs}/>'
+        return f'<{node.tag}{attrs}>{self.inner_html(node)}</{node.tag}>'
+
+    def href(self, node):
+        if node.tag == 'a' and node.get('href') is not None:
+            return node.get('href')
+        for link in node.iterdescendants('a'):
+            if link.get('href') is not None:
+                return link.get('href')
+        return None
+
+
+_CHARSET = re.compile(rb'charset\s*=', re.IGNORECASE)
+
+PARSERS = {'lxml': LxmlParser, 'html.parser': SoupParser}
+_parser = LxmlParser() if lxml is not None else SoupParser()
+
+
+def get_parser():
+    '''Returns the parser used for every page'''
+    return _parser
+
+
+def set_parser(name):
+    '''
+    Sets the HTML parser used for every page.
+    Defaults to 'lxml' when it is installed and to Python's built-in 'html.parser' otherwise.
+
+            Parameters:
+                    - 'name' (str): 'lxml' or 'html.parser'
+    '''
+    global _parser
+    if name == 'lxml' and lxml is None:
+        raise ImportError('lxml is not installed. Install it with "pip install lxml".')
+    _parser = PARSERS[name]()
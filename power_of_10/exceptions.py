@@ -4,7 +4,12 @@ class QueryError(Exception):
     pass
 
 
-class BroadQueryError(Exception):
-    '''Exception raised when too many results are returned'''
+class BroadQueryError(QueryError):
+    '''Exception raised when too many results are returned. A QueryError, so handlers of QueryError also catch it'''
     pass
 
+
+class InvalidQueryError(QueryError, KeyError):
+    '''Exception raised when a query parameter is not one the site accepts, before any request is made. Also a KeyError'''
+    __str__ = Exception.__str__
+
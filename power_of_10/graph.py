@@ -0,0 +1,226 @@
+from array import array
+from functools import partial
+import numpy as np
+from .athletes import get_athlete, search_athletes
+from .batch import fetch_many
+from .client import get_client
+from .results import get_results
+
+
+__all__ = ['NODE_KINDS', 'EDGE_KINDS', 'RELATIONS', 'Graph', 'build_graph']
+
+
+NODE_KINDS = ('athlete', 'club', 'meeting')
+EDGE_KINDS = ('coaches', 'member_of', 'competed_at')
+RELATIONS = ('coaching', 'club', 'meetings')
+
+
+class Graph:
+    '''
+    Compact graph of athletes, clubs and meetings.
+
+    Nodes are numbered from 0 in the order they are added. Edges are held in three parallel
+    integer arrays (source node, target node, edge kind) rather than as Python objects, and
+    can be exported as numpy arrays or a JSON-friendly dict. Duplicate edges are dropped on
+    export, with numpy, rather than looked up as each edge is added.
+
+    Edge kinds are 'coaches' (coach athlete -> athlete), 'member_of' (athlete -> club) and
+    'competed_at' (athlete -> meeting).
+    '''
+
+    def __init__(self):
+        self._index = {}
+        self._kinds = array('b')
+        self._keys = []
+        self._names = []
+        self._source = array('q')
+        self._target = array('q')
+        self._edge_kinds = array('b')
+        self._unique = 0
+        self.errors = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, node):
+        return node in self._index
+
+    def add_node(self, kind, key, name=None):
+        '''Returns the number of the (kind, key) node, adding it if it is new'''
+        key = str(key)
+        node = self._index.get((kind, key))
+        if node is None:
+            node = self._index[(kind, key)] = len(self._keys)
+            self._kinds.append(NODE_KINDS.index(kind))
+            self._keys.append(key)
+            self._names.append(name)
+        elif name and not self._names[node]:
+            self._names[node] = name
+        return node
+
+    def add_edge(self, kind, source, target):
+        '''Adds an edge between two node numbers. Duplicates are dropped when the edges are exported'''
+        self._source.append(source)
+        self._target.append(target)
+        self._edge_kinds.append(EDGE_KINDS.index(kind))
+
+    def node(self, number):
+        '''Returns a node as a dict of 'kind', 'key' and 'name\''''
+        return {'kind': NODE_KINDS[self._kinds[number]], 'key': self._keys[number], 'name': self._names[number]}
+
+    def nodes(self, kind=None):
+        '''Returns the (kind, key) of every node, optionally only those of one kind'''
+        return [(NODE_KINDS[k], key) for k, key in zip(self._kinds, self._keys) if kind is None or NODE_KINDS[k] == kind]
+
+    def neighbours(self, kind, key, edge=None):
+        '''
+        Returns the nodes an edge leads to or from, as (kind, key) tuples.
+
+                Parameters:
+                        - 'kind' (str): Kind of the node, 'athlete', 'club' or 'meeting'
+                        - 'key' (str): Athlete or meeting id, or club name
+                        - 'edge' (str): Optional edge kind to follow ('coaches', 'member_of' or 'competed_at')
+
+                Returns:
+                        - 'neighbours' (arr): List of (kind, key) tuples
+        '''
+        node = self._index.get((kind, str(key)))
+        if node is None:
+            return []
+        edges = self.edges()
+        mask = np.ones(len(edges['source']), dtype=bool) if edge is None else edges['kind'] == EDGE_KINDS.index(edge)
+        found = np.concatenate([edges['target'][mask & (edges['source'] == node)], edges['source'][mask & (edges['target'] == node)]])
+        return [(NODE_KINDS[self._kinds[n]], self._keys[n]) for n in found]
+
+    def edges(self):
+        '''
+        Returns the edges as numpy arrays, each edge once, in the order they were first added.
+
+                Returns:
+                        - 'edges' (dict):
+                            - 'source' (int64 arr): Source node numbers
+                            - 'target' (int64 arr): Target node numbers
+                            - 'kind' (int8 arr): Index into EDGE_KINDS
+        '''
+        source = np.array(self._source, dtype=np.int64)
+        target = np.array(self._target, dtype=np.int64)
+        kind = np.array(self._edge_kinds, dtype=np.int8)
+        if self._unique < len(source):
+            # Keeps the first of each (source, target, kind) row, and compacts the stored edges so
+            # duplicates are only held until the next export
+            _, first = np.unique(np.stack([source, target, kind.astype(np.int64)], axis=1), axis=0, return_index=True)
+            first.sort()
+            source, target, kind = source[first], target[first], kind[first]
+            self._source, self._target, self._edge_kinds = array('q', source.tobytes()), array('q', target.tobytes()), array('b', kind.tobytes())
+            self._unique = len(source)
+        return {'source': source, 'target': target, 'kind': kind}
+
+    def to_dict(self):
+        '''Returns the graph as a dict of 'nodes' and 'edges' lists, e.g. for saving as JSON'''
+        edges = self.edges()
+        return {
+            'nodes': [dict(self.node(n), id=n) for n in range(len(self))],
+            'edges': [[s, t, EDGE_KINDS[k]] for s, t, k in zip(edges['source'].tolist(), edges['target'].tolist(), edges['kind'].tolist())],
+        }
+
+    def save(self, path):
+        '''Saves the graph's nodes and edges to a compressed numpy .npz file'''
+        edges = self.edges()
+        np.savez_compressed(path, node_kinds=np.array(self._kinds, dtype=np.int8),
+                            node_keys=np.array(self._keys, dtype=str), node_names=np.array([n or '' for n in self._names], dtype=str),
+                            source=edges['source'], target=edges['target'], edge_kinds=edges['kind'])
+
+
+def build_graph(seeds, depth=2, follow=('coaching',), relations=RELATIONS, max_athletes=1000, max_meetings=1000, max_clubs=100,
+                workers=8, client=None):
+    '''
+    Builds a graph by breadth-first expansion from seed athletes. Each level's new athletes,
+    meetings and clubs are fetched as one concurrent batch, and every node is fetched once.
+
+            Parameters:
+                    - 'seeds' (arr): Athlete ids to start from
+                    - 'depth' (int): Number of levels to expand beyond the seeds
+                    - 'follow' (arr): Relations to expand through: 'coaching' (athletes a coach coaches),
+                      'club' (athletes found by searching the club) and 'meetings' (athletes in the results
+                      of meetings the athlete competed at)
+                    - 'relations' (arr): Relations to record as edges (defaults to all)
+                    - 'max_athletes' (int): Maximum number of athlete profiles to fetch
+                    - 'max_meetings' (int): Maximum number of meeting results to fetch when following 'meetings'
+                    - 'max_clubs' (int): Maximum number of club searches to make when following 'club'
+                    - 'workers' (int): Number of requests in flight at once
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+
+            Returns:
+                    - 'graph' (Graph): Graph of athletes, clubs and meetings. Ids that could not be
+                      fetched are listed in graph.errors with their exception
+    '''
+    client = get_client(client)
+    relations = set(relations) | set(follow)
+    sections = [s for s, r in (('coaching', 'coaching'), ('performances', 'meetings')) if r in relations]
+    fetch_athlete = partial(get_athlete, sections=sections)
+
+    graph = Graph()
+    fetched, fetched_meetings, fetched_clubs = set(), set(), set()
+    frontier = [str(s) for s in dict.fromkeys(seeds)]
+
+    for level in range(depth + 1):
+        frontier = [a for a in frontier if a not in fetched][:max_athletes - len(fetched)]
+        if not frontier:
+            break
+        fetched.update(frontier)
+
+        found, meetings, clubs = [], set(), set()
+        for athlete_id, athlete in fetch_many(fetch_athlete, frontier, workers=workers, client=client):
+            if isinstance(athlete, Exception):
+                graph.errors[('athlete', athlete_id)] = athlete
+                continue
+            node = graph.add_node('athlete', athlete_id)
+            if 'club' in relations and athlete.get('club'):
+                graph.add_edge('member_of', node, graph.add_node('club', athlete['club']))
+                clubs.add(athlete['club'])
+            for coached in athlete.get('coaching', []):
+                if coached['athlete_id']:
+                    graph.add_edge('coaches', node, graph.add_node('athlete', coached['athlete_id'], coached['name']))
+                    found.append(coached['athlete_id'])
+            for performance in athlete.get('performances', []):
+                if performance.get('meeting_id'):
+                    graph.add_edge('competed_at', node, graph.add_node('meeting', performance['meeting_id'], performance['meeting']))
+                    meetings.add(performance['meeting_id'])
+
+        if level == depth:
+            break
+
+        next_frontier = found if 'coaching' in follow else []
+        if 'meetings' in follow:
+            new = [m for m in meetings if m not in fetched_meetings][:max_meetings - len(fetched_meetings)]
+            fetched_meetings.update(new)
+            for meeting_id, meeting in fetch_many(get_results, new, workers=workers, client=client):
+                if isinstance(meeting, Exception):
+                    graph.errors[('meeting', meeting_id)] = meeting
+                    continue
+                target = graph.add_node('meeting', meeting_id, meeting['title'])
+                for race in meeting['results']:
+                    for result in race['results']:
+                        if result['athlete_id']:
+                            graph.add_edge('competed_at', graph.add_node('athlete', result['athlete_id'], result['name']), target)
+                            next_frontier.append(result['athlete_id'])
+        if 'club' in follow:
+            new = [c for c in clubs if c not in fetched_clubs][:max_clubs - len(fetched_clubs)]
+            fetched_clubs.update(new)
+            for club, members in fetch_many(_search_club, new, workers=workers, client=client):
+                if isinstance(members, Exception):
+                    graph.errors[('club', club)] = members
+                    continue
+                target = graph.add_node('club', club)
+                for member in members:
+                    if member['athlete_id']:
+                        name = f"{member['firstname']} {member['surname']}"
+                        graph.add_edge('member_of', graph.add_node('athlete', member['athlete_id'], name), target)
+                        next_frontier.append(member['athlete_id'])
+        frontier = list(dict.fromkeys(next_frontier))
+
+    return graph
+
+
+def _search_club(club, client=None):
+    return search_athletes(club=club, client=client)
@@ -0,0 +1,188 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+
+__all__ = ['SECONDS_BUCKETS', 'BYTES_BUCKETS', 'ROWS_BUCKETS', 'current_call', 'instrumented', 'Histogram', 'Metrics']
+
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+ROWS_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000)
+
+_local = threading.local()
+
+
+def current_call():
+    '''Returns the event of the lookup running in this thread, or None when no lookup is being instrumented'''
+    return getattr(_local, 'call', None)
+
+
+def _rows(data):
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict):
+        if isinstance(data.get('results'), list):
+            return sum(len(race.get('results', ())) for race in data['results'] if isinstance(race, dict))
+        return sum(len(v) for v in data.values() if isinstance(v, list))
+    return 0
+
+
+@contextmanager
+def instrumented(hooks, kind, key):
+    '''
+    Times a lookup and passes its event to every hook when it finishes, successfully or not.
+
+    Each event is a dict of:
+        - 'kind' (str): Kind of lookup, e.g. 'athlete', 'rankings' or 'page' for a bare client.get
+        - 'key' (str): Athlete or meeting id, or url, of the lookup
+        - 'url' (str): Url fetched, if any
+        - 'status' (int): HTTP status of the response, if one was fetched
+        - 'bytes' (int): Bytes downloaded
+        - 'latency' (float): Seconds spent waiting on the network
+        - 'parse' (float): Seconds spent parsing html into a tree
+        - 'extract' (float): Seconds spent pulling rows out of the tree
+        - 'total' (float): Seconds the whole lookup took
+        - 'rows' (int): Number of rows returned
+        - 'source' (str): Where the data came from: 'network', 'cache', 'store', 'memo' or 'coalesced'
+          (shared with a concurrent lookup of the same page)
+        - 'cache' (str): Response cache outcome, 'hit', 'revalidated' or 'miss' (None without a cache)
+        - 'retries' (int): Number of times the request was retried
+        - 'error' (str): Name of the exception raised, if any
+
+            Parameters:
+                    - 'hooks' (arr): Functions called with each event
+                    - 'kind' (str): Kind of lookup
+                    - 'key' (str): Key of the lookup
+    '''
+    call = {'kind': kind, 'key': str(key), 'url': None, 'status': None, 'bytes': 0, 'latency': 0.0, 'parse': 0.0,
+            'extract': 0.0, 'total': 0.0, 'rows': 0, 'source': None, 'cache': None, 'retries': 0, 'error': None}
+    outer = current_call()
+    _local.call = call
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        call['error'] = type(e).__name__
+        raise
+    finally:
+        _local.call = outer
+        call['total'] = time.perf_counter() - start
+        if call['parse']:
+            call['extract'] = max(0.0, call['total'] - call['latency'] - call['parse'])
+        if call['source'] is None and call['error'] is None:
+            call['source'] = 'coalesced'
+        for hook in hooks:
+            hook(call)
+
+
+class Histogram:
+    '''Cumulative histogram of observed values, as used by Prometheus'''
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        cumulative, total = {}, 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            total += n
+            cumulative[bound] = total
+        return {'count': self.count, 'sum': self.sum, 'buckets': cumulative}
+
+
+class Metrics:
+    '''
+    Built-in metrics collector. Use it as a client hook (PowerOf10Client(metrics=True) adds one)
+    to keep, for each kind of lookup, histograms of network latency, parse, extraction and total
+    time, bytes and rows, plus counts of lookups by source, cache outcome, errors and retries.
+    '''
+
+    HISTOGRAMS = {'latency': SECONDS_BUCKETS, 'parse': SECONDS_BUCKETS, 'extract': SECONDS_BUCKETS,
+                  'total': SECONDS_BUCKETS, 'bytes': BYTES_BUCKETS, 'rows': ROWS_BUCKETS}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+
+    def _count(self, name, labels, n=1):
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + n
+
+    def __call__(self, event):
+        kind = event['kind']
+        with self._lock:
+            self._count('calls', (('kind', kind), ('source', event['source'] or 'error')))
+            if event['cache'] is not None:
+                self._count('cache', (('kind', kind), ('result', event['cache'])))
+            if event['error'] is not None:
+                self._count('errors', (('kind', kind), ('error', event['error'])))
+            if event['retries']:
+                self._count('retries', (('kind', kind),), event['retries'])
+            for name, buckets in self.HISTOGRAMS.items():
+                if name in ('latency', 'bytes') and event['source'] != 'network':
+                    continue
+                if name in ('parse', 'extract') and not event['parse']:
+                    continue
+                histogram = self._histograms.get((name, kind))
+                if histogram is None:
+                    histogram = self._histograms[(name, kind)] = Histogram(buckets)
+                histogram.observe(event[name])
+
+    def snapshot(self):
+        '''
+        Returns the metrics collected so far as plain dicts.
+
+                Returns:
+                        - 'metrics' (dict):
+                            - 'counters' (dict): Counter name ('calls', 'cache', 'errors', 'retries') to a list of
+                              {'labels': dict, 'value': int}
+                            - 'histograms' (dict): Histogram name ('latency', 'parse', 'extract', 'total', 'bytes',
+                              'rows') to kind of lookup to {'count', 'sum', 'buckets'}, with cumulative bucket counts
+                              keyed by upper bound
+        '''
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items(), key=lambda i: (i[0][0], str(i[0][1]))):
+                counters.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+            histograms = {}
+            for (name, kind), histogram in self._histograms.items():
+                histograms.setdefault(name, {})[kind] = histogram.snapshot()
+        return {'counters': counters, 'histograms': histograms}
+
+    def to_prometheus(self, prefix='powerof10'):
+        '''Returns the metrics in the Prometheus text exposition format'''
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in snapshot['counters'].items():
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            for s in series:
+                lines.append(f'{prefix}_{name}_total{_labels(s["labels"])} {s["value"]}')
+        for name, kinds in snapshot['histograms'].items():
+            unit = '_bytes' if name == 'bytes' else '' if name == 'rows' else '_seconds'
+            metric = f'{prefix}_{"response" if name == "bytes" else name}{unit}'
+            lines.append(f'# TYPE {metric} histogram')
+            for kind, histogram in kinds.items():
+                for bound, n in histogram['buckets'].items():
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f'{metric}_bucket{_labels({"kind": kind, "le": le})} {n}')
+                lines.append(f'{metric}_sum{_labels({"kind": kind})} {histogram["sum"]}')
+                lines.append(f'{metric}_count{_labels({"kind": kind})} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
@@ -0,0 +1,168 @@
+import re
+from typing import NamedTuple
+import numpy as np
+
+
+__all__ = ['FIELD_EVENTS', 'MULTI_EVENTS', 'STATUSES', 'Mark', 'event_unit', 'parse_mark', 'parse_marks', 'add_marks']
+
+
+FIELD_EVENTS = ('HJ', 'PV', 'LJ', 'TJ', 'SP', 'DT', 'HT', 'JT', 'WT', 'SLJ', 'SHJ')
+MULTI_EVENTS = ('DEC', 'HEP', 'PEN', 'OCT', 'TETRA', 'QUAD', 'HEX')
+STATUSES = ('DNF', 'DNS', 'DQ', 'NM', 'NH', 'NT', 'DNQ', 'FS', 'R')
+
+_MARK = re.compile(r'^(?:(\d+):)?(?:(\d+):)?(\d+)(?:\.(\d+))?([A-Za-z+*#]*)$')
+_POINTS = re.compile(r'^\d{1,3}(?:,\d{3})+$')
+
+
+class Mark(NamedTuple):
+    '''
+    Performance mark parsed from a Power of 10 string.
+
+            Fields:
+                    - 'value' (float): Seconds, metres or points, nan if there is no mark
+                    - 'unit' (str): 's', 'm' or 'pts', or None if it cannot be told from the mark and event
+                    - 'wind_assisted' (bool): Mark was set with an illegal following wind ('w')
+                    - 'indoor' (bool): Mark was set indoors ('i')
+                    - 'hand_timed' (bool): Time is hand timed (shown to a tenth of a second)
+                    - 'status' (str): 'DNF', 'DNS', 'DQ', 'NM', ... if there is no mark, otherwise None
+                    - 'raw' (str): Original string
+    '''
+    value: float
+    unit: str
+    wind_assisted: bool
+    indoor: bool
+    hand_timed: bool
+    status: str
+    raw: str
+
+    @property
+    def legal(self):
+        '''Whether the mark is valid for records and rankings: a mark with legal wind'''
+        return self.status is None and self.value == self.value and not self.wind_assisted
+
+
+def event_unit(event):
+    '''
+    Returns the unit marks for an event are measured in.
+
+            Parameters:
+                    - 'event' (str): Event code as used by Power of 10, e.g. '400', 'HM', 'LJ', 'SP7.26K', 'Dec'
+
+            Returns:
+                    - 'unit' (str): 'm' for field events, 'pts' for multi events, 's' for everything else,
+                      or None if no event is given
+    '''
+    if not event:
+        return None
+    event = str(event).upper().replace(' ', '')
+    if event.startswith(MULTI_EVENTS):
+        return 'pts'
+    if event.startswith(FIELD_EVENTS):
+        return 'm'
+    return 's'
+
+
+def parse_mark(mark, event=None):
+    '''
+    Returns a performance string as a Mark.
+
+            Parameters:
+                    - 'mark' (str): Performance as shown on Power of 10, e.g. '14:32.45', '2:03:11', '10.8w', '7.12i', 'DNF', '5,432'
+                    - 'event' (str): Optional event code, used to tell times, distances and points apart
+
+            Returns:
+                    - 'mark' (Mark): Parsed mark
+    '''
+    return _parse(mark, event_unit(event))
+
+
+def _parse(raw, unit):
+    text = ('' if raw is None else str(raw)).strip()
+    if _POINTS.match(text):
+        return Mark(float(text.replace(',', '')), 'pts', False, False, False, None, raw)
+
+    match = _MARK.match(text)
+    if match is None:
+        status = text.upper()
+        return Mark(np.nan, unit, False, False, False, status if status in STATUSES else None, raw)
+
+    hours, minutes, whole, decimals, flags = match.groups()
+    value = float(f'{whole}.{decimals}' if decimals else whole)
+    if minutes is not None:
+        value += int(hours) * 3600 + int(minutes) * 60
+    elif hours is not None:
+        value += int(hours) * 60
+    if unit is None and hours is not None:
+        unit = 's'
+    flags = flags.lower()
+    hand_timed = unit == 's' and decimals is not None and len(decimals) == 1
+    return Mark(value, unit, 'w' in flags, 'i' in flags, hand_timed, None, raw)
+
+
+def parse_marks(marks, event=None):
+    '''
+    Parses a whole column of performance strings at once.
+
+    Each distinct (mark, unit) pair is parsed once and broadcast back to every row, so long
+    columns of repeated marks cost little more than a dict lookup per row.
+
+            Parameters:
+                    - 'marks' (arr): Performance strings
+                    - 'event' (str or arr): Optional event code for every mark, or a list with one per mark
+
+            Returns:
+                    - 'marks' (dict): Numpy arrays with one entry per mark
+                        - 'value' (float64): Seconds, metres or points, nan if there is no mark
+                        - 'unit' (str): 's', 'm', 'pts' or '' if unknown
+                        - 'wind_assisted' (bool): Wind assisted
+                        - 'indoor' (bool): Indoor
+                        - 'hand_timed' (bool): Hand timed
+                        - 'status' (str): 'DNF', 'DNS', ... or '' for a mark
+    '''
+    marks = list(marks)
+    if event is None or isinstance(event, str):
+        unit = event_unit(event)
+        keys = marks
+        units = None
+    else:
+        unit_of = {e: event_unit(e) for e in set(event)}
+        units = [unit_of[e] for e in event]
+        keys = list(zip(marks, units))
+
+    index = {}
+    codes = np.fromiter((index.setdefault(k, len(index)) for k in keys), dtype=np.intp, count=len(keys))
+    parsed = [_parse(k, unit) if units is None else _parse(*k) for k in index]
+
+    return {
+        'value': np.array([m.value for m in parsed], dtype=np.float64)[codes],
+        'unit': np.array([m.unit or '' for m in parsed], dtype='<U3')[codes],
+        'wind_assisted': np.array([m.wind_assisted for m in parsed], dtype=bool)[codes],
+        'indoor': np.array([m.indoor for m in parsed], dtype=bool)[codes],
+        'hand_timed': np.array([m.hand_timed for m in parsed], dtype=bool)[codes],
+        'status': np.array([m.status or '' for m in parsed], dtype='<U3')[codes],
+    }
+
+
+def add_marks(records, fields, event=None):
+    '''
+    Adds a parsed Mark alongside each performance field of a list of dicts, as '<field>_mark'.
+
+            Parameters:
+                    - 'records' (arr): List of dicts, updated in place
+                    - 'fields' (arr): Names of the performance fields to parse
+                    - 'event' (str): Optional event code for every record, otherwise each record's 'event' is used
+
+            Returns:
+                    - 'records' (arr): The same list of dicts
+    '''
+    cache = {}
+    for record in records:
+        unit = event_unit(event if event is not None else record.get('event'))
+        for field in fields:
+            if field in record:
+                key = (record[field], unit)
+                mark = cache.get(key)
+                if mark is None:
+                    mark = cache[key] = _parse(*key)
+                record[field + '_mark'] = mark
+    return records
@@ -0,0 +1,219 @@
+import datetime
+import json
+import os
+import string
+import threading
+from .athletes import search_athletes
+from .batch import fetch_many
+from .catalogue import normalise_meeting_type, normalise_terrain
+from .client import get_client
+from .exceptions import BroadQueryError, InvalidQueryError, QueryError
+from .results import search_event
+
+
+__all__ = ['TERRAIN_PARTS', 'NAME_CHARACTERS', 'QueryPlanner']
+
+
+DATE_FORMATS = ('%d-%b-%Y', '%d/%m/%Y', '%Y-%m-%d', '%d %b %Y')
+
+# Terrains that cover several narrower ones, which a broad meeting search is split into
+TERRAIN_PARTS = {
+    None: ['track', 'indoor', 'road', 'xc', 'multi', 'walks', 'fell', 'mountain', 'virtual'],
+    'any': ['track', 'indoor', 'road', 'xc', 'multi', 'walks', 'fell', 'mountain', 'virtual'],
+    'road/multi/xc': ['road', 'multi', 'xc'],
+    'road/multi': ['road', 'multi'],
+    'track/10k/hm/mar/xc': ['track', '5k/10k/hm/mar', 'xc'],
+}
+
+# Characters a name prefix is extended by when an athlete search is split. A space only follows
+# a non-empty prefix, e.g. 'de ' for 'De Souza'
+NAME_CHARACTERS = string.ascii_lowercase + " '-" + 'àáâãäåæçèéêëìíîïñòóôõöøœùúûüýÿ'
+
+
+def _parse_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(str(value), fmt).date(), fmt
+        except ValueError:
+            continue
+    raise QueryError(f'Please input dates as e.g. 1-Jan-2014 or 01/01/2014, not {value}.')
+
+
+def _shape(kind, query):
+    return kind + ':' + ','.join(sorted(k for k, v in query.items() if v is not None))
+
+
+class QueryPlanner:
+    '''
+    Runs searches that may be too broad for the site, splitting any that are into narrower
+    sub-queries. search_event is split into date windows, then into terrains. search_athletes
+    is split by surname prefix, plus the first initial of athletes whose surname is the prefix
+    itself. Sub-queries run concurrently and their rows are merged and deduplicated by
+    meeting_id or athlete_id.
+
+    For each query shape (which parameters are set), the planner remembers how narrow the
+    sub-queries had to be: the narrowest date window a meeting search needed, or that an athlete
+    search had to be split by surname. Later queries of the same shape are split that far up
+    front, instead of probing again.
+
+            Parameters:
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+                    - 'workers' (int): Number of sub-queries run at once
+                    - 'path' (str): Optional JSON file to keep what was learned about each query shape between runs
+                    - 'min_days' (int): Narrowest date window a meeting search is split into
+                    - 'max_queries' (int): Most sub-queries one search may make before it raises BroadQueryError
+    '''
+
+    def __init__(self, client=None, workers=4, path=None, min_days=1, max_queries=2000):
+        self.client = client
+        self.workers = workers
+        self.path = path
+        self.min_days = min_days
+        self.max_queries = max_queries
+        self._lock = threading.Lock()
+        self.granularity = {}
+        if path is not None and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.granularity = json.load(f)
+
+    def _learn(self, shape, key, value):
+        with self._lock:
+            learned = self.granularity.setdefault(shape, {})
+            if learned.get(key) == value or (key == 'days' and learned.get(key, value) < value):
+                return
+            learned[key] = value
+        self.save()
+
+    def _run(self, func, queries, split, id_key):
+        '''Runs queries breadth first, replacing each broad one by its splits, and returns the merged rows'''
+        client = get_client(self.client)
+        nodes = [[tuple(sorted(q.items())), None] for q in queries]
+        made = 0
+        while True:
+            pending = {node[0] for node in nodes if node[1] is None}
+            if not pending:
+                break
+            made += len(pending)
+            if made > self.max_queries:
+                raise BroadQueryError(f'Splitting this search needs more than {self.max_queries} queries. Please narrow it, or raise max_queries.')
+            done = dict(fetch_many(lambda q, client=None: func(client=client, **dict(q)), pending, workers=self.workers, client=client))
+
+            expanded = []
+            for query, rows in nodes:
+                if rows is not None:
+                    expanded.append([query, rows])
+                    continue
+                result = done[query]
+                if isinstance(result, BroadQueryError):
+                    children = split(dict(query))
+                    if not children:
+                        raise result
+                    expanded.extend([tuple(sorted(c.items())), None] for c in children)
+                elif isinstance(result, InvalidQueryError):
+                    raise result
+                elif isinstance(result, QueryError):
+                    expanded.append([query, []])
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    expanded.append([query, result])
+            nodes = expanded
+
+        merged, seen = [], set()
+        for query, rows in nodes:
+            for row in rows:
+                key = row[id_key] or tuple(sorted(row.items()))
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(row)
+        return merged
+
+    def search_event(self, event=None, meeting=None, venue=None, date_from=None, year=None, date_to=None, meeting_type=None, terrain=None):
+        '''
+        Returns every meeting matching a search_event query, however many there are.
+
+                Parameters:
+                        - Same as results.search_event. A date range ('date_from' and 'date_to', or 'year') lets
+                          the search be split into date windows; otherwise only terrains can be split
+
+                Returns:
+                        - 'results' (arr): List of meetings, as returned by search_event, in date window order
+        '''
+        query = {'event': event, 'meeting': meeting, 'venue': venue, 'date_from': date_from, 'year': year, 'date_to': date_to,
+                 'meeting_type': None if meeting_type is None else normalise_meeting_type(meeting_type),
+                 'terrain': None if terrain is None else normalise_terrain(terrain)}
+        if year is not None and date_from is None and date_to is None:
+            query.update(date_from=f'1-Jan-{year}', date_to=f'31-Dec-{year}')
+        query = {k: v for k, v in query.items() if v is not None}
+        shape = _shape('search_event', query)
+
+        queries = [query]
+        learned = self.granularity.get(shape, {})
+        if 'days' in learned and 'date_from' in query and 'date_to' in query:
+            queries = self._date_windows(query, learned['days'])
+
+        def split(q):
+            if 'date_from' in q and 'date_to' in q:
+                start, end = _parse_date(q['date_from'])[0], _parse_date(q['date_to'])[0]
+                days = (end - start).days + 1
+                if days > self.min_days:
+                    half = max(self.min_days, (days + 1) // 2)
+                    self._learn(shape, 'days', half)
+                    return self._date_windows(q, half)
+            parts = TERRAIN_PARTS.get(q.get('terrain'))
+            if parts:
+                return [dict(q, terrain=t) for t in parts]
+            return []
+
+        return self._run(search_event, queries, split, 'meeting_id')
+
+    def _date_windows(self, query, days):
+        start, fmt = _parse_date(query['date_from'])
+        end = _parse_date(query['date_to'])[0]
+        windows = []
+        while start <= end:
+            stop = min(end, start + datetime.timedelta(days=days - 1))
+            windows.append(dict(query, date_from=start.strftime(fmt), date_to=stop.strftime(fmt)))
+            start = stop + datetime.timedelta(days=1)
+        return windows
+
+    def search_athletes(self, firstname=None, surname=None, club=None):
+        '''
+        Returns every athlete matching a search_athletes query, however many there are.
+
+                Parameters:
+                        - Same as athletes.search_athletes
+
+                Returns:
+                        - 'list_of_athletes' (arr): List of athletes, as returned by search_athletes, in surname order
+        '''
+        query = {k: v for k, v in {'firstname': firstname, 'surname': surname, 'club': club}.items() if v is not None}
+        shape = _shape('search_athletes', query)
+        by_initial = set()
+
+        def split(q):
+            # Extending the surname prefix misses athletes whose surname is the prefix itself, so
+            # those are fetched by first initial. A query already narrowed that way, or given a
+            # first name, cannot be narrowed further without missing some of its athletes.
+            if tuple(sorted(q.items())) in by_initial:
+                return []
+            prefix = q.get('surname', '')
+            if prefix.strip() and 'firstname' in q:
+                return []
+            self._learn(shape, 'split', True)
+            children = [dict(q, surname=prefix + c) for c in NAME_CHARACTERS if c != ' ' or prefix.strip() and not prefix.endswith(' ')]
+            if prefix.strip() and not prefix.endswith(' '):
+                initials = [dict(q, firstname=c) for c in NAME_CHARACTERS if c != ' ']
+                by_initial.update(tuple(sorted(i.items())) for i in initials)
+                children += initials
+            return children
+
+        queries = (self.granularity.get(shape, {}).get('split') and split(query)) or [query]
+
+        return self._run(search_athletes, queries, split, 'athlete_id')
+
+    def save(self):
+        '''Writes what has been learned about query shapes to the planner's path'''
+        if self.path is not None:
+            with self._lock, open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.granularity, f, indent=1, sort_keys=True)
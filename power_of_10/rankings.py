@@ -1,17 +1,39 @@
-import requests
-from bs4 import BeautifulSoup
+from functools import lru_cache
+from urllib.parse import urlencode
+from .catalogue import REGIONS, normalise_age_group, normalise_event, normalise_gender, normalise_region, normalise_year
+from .client import BASE_URL, get_client
+from . import dom
 from .exceptions import QueryError, BroadQueryError
+from .table import Table
+from .marks import add_marks
+from .records import RankingEntry, to_records
 
-def get_rankings(year, gender, age_group, event, region=None):
+
+__all__ = ['RANKING_COLUMNS', 'get_rankings', 'parse_ranking_list']
+
+
+RANKING_COLUMNS = {
+    'rank': 'int', 'performance': 'float', 'pb': 'float', 'name': 'str', 'year': 'int', 'coach': 'str',
+    'club': 'str', 'venue': 'str', 'date': 'date', 'athlete_id': 'int', 'meeting_id': 'int'
+}
+
+def get_rankings(year, gender, age_group, event, region=None, client=None, as_table=False, marks=False, records=False):
     '''
     Returns a list of ranks for given year, region, gender, age group and event.
 
             Parameters:
                     - 'year' (int): Year of event rankings 
-                    - 'region' (str): Region for event rankings
+                    - 'region' (str): Optional region for event rankings (defaults to the national list)
                     - 'gender' (str): Gender for event rankings
                     - 'age_group' (str): Age group of event rankings
                     - 'event' (str): Event for rankings
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+                    - 'as_table' (bool): Return a Table of typed numpy columns instead of a list of dicts.
+                      Performances are floats (seconds or metres), dates datetime64 and ids ints (-1 if missing).
+                    - 'marks' (bool): Add a parsed Mark (seconds, metres or points plus wind, indoor,
+                      hand timing and DNF/DQ flags) alongside 'performance' and 'pb', as '<field>_mark'
+                    - 'records' (bool): Return RankingEntry records, which take a fraction of the memory of dicts,
+                      instead of dicts. Use entry.mark('performance', event) in place of 'marks'
 
             Returns:
                     - 'rankings' (arr): list of ranks
@@ -27,43 +49,66 @@ def get_rankings(year, gender, age_group, event, region=None):
                         - 'athlete_id' (int): Reference id of athlete (used by PowerOf10)
                         - 'meeting_id' (int): Reference id of event (used by PowerOf10)
     '''
-    if None in (year, region, gender, age_group, event):
+    if marks and records:
+        raise QueryError('Records cannot be combined with marks. Use mark() on each record instead.')
+    url = _rankings_url(year, gender, age_group, event, region)
+    c = get_client(client)
+    rankings = c.stored('rankings', url, lambda: parse_ranking_list(c.get(url).content))
+    if marks:
+        rankings = add_marks([dict(r) for r in rankings], ['performance', 'pb'], normalise_event(event))
+    if as_table:
+        return Table.from_records(rankings, RANKING_COLUMNS)
+    if records:
+        return to_records(rankings, RankingEntry)
+    return rankings
+
+
+@lru_cache(maxsize=4096)
+def _rankings_url(year, gender, age_group, event, region):
+    if None in (year, gender, age_group, event):
         raise QueryError('Please ensure all search fields are filled.')
 
-    url = f'https://www.thepowerof10.info/rankings/rankinglist.aspx?event={event.replace(" ","+")}&agegroup={age_group}&sex={gender}&year={year}'
-    
-    locs = {'east': 66, 'east midlands': 65, 'england': 91, 'london': 67, 'north east': 61, 'north ireland': 94, 
-    'north west': 63, 'scotland': 92, 'south east': 68, 'south west': 69, 'wales': 93, 'west midlands': 64, 'yorkshire': 62}
+    query = {'event': normalise_event(event), 'agegroup': normalise_age_group(age_group), 'sex': normalise_gender(gender),
+             'year': normalise_year(year)}
     if region is not None:
-        try:
-            url += f'&areaid={locs[region.lower()]}'
-        except Exception as e:
-            raise QueryError('Please ensure the location you have provided is valid.')
-        
-    html = requests.get(url)
-    soup = BeautifulSoup(html.text, 'html.parser')
+        query['areaid'] = REGIONS[normalise_region(region)]
+    return f'{BASE_URL}/rankings/rankinglist.aspx?{urlencode(query)}'
+
+
+def parse_ranking_list(html):
+    '''
+    Returns the list of ranks on a saved or fetched ranking list page (see get_rankings).
+
+            Parameters:
+                    - 'html' (str, bytes or path): Page html as text or raw bytes, or the path of a saved page as a pathlib.Path
+
+            Returns:
+                    - 'rankings' (arr): List of ranks, as returned by get_rankings
+    '''
+    parser = dom.get_parser()
+    soup = parser.parse(html)
     results = []
     try:
-        results = soup.find('span', {'id': 'cphBody_lblCachedRankingList'}).find_all('tr')
+        results = parser.find_all(parser.find(soup, 'span', id='cphBody_lblCachedRankingList'), 'tr')
     except Exception as e:
         QueryError('Please ensure all fields are filled correctly.')
 
     rankings = []
     for i in results[2:]:
-        dets = i.find_all('td')
-        if dets[0].text != '' and len(dets) > 11:
+        dets = parser.find_all(i, 'td')
+        if parser.text(dets[0]) != '' and len(dets) > 11:
             rankings.append({
-                'rank': dets[0].text,
-                'performance': dets[1].text,
-                'pb': dets[4].text,
-                'name': dets[6].text,
-                'year': dets[8].text,
-                'coach': dets[9].text,
-                'club': dets[10].text,
-                'venue': dets[11].text,
-                'date': dets[12].text,
-                'athlete_id': str(dets[6]).split('"')[1].split('=')[1],
-                'meeting_id': str(dets[11]).split('=')[2].split('&')[0]
+                'rank': parser.text(dets[0]),
+                'performance': parser.text(dets[1]),
+                'pb': parser.text(dets[4]),
+                'name': parser.text(dets[6]),
+                'year': parser.text(dets[8]),
+                'coach': parser.text(dets[9]),
+                'club': parser.text(dets[10]),
+                'venue': parser.text(dets[11]),
+                'date': parser.text(dets[12]),
+                'athlete_id': parser.link_param(dets[6], 'athleteid'),
+                'meeting_id': parser.link_param(dets[11], 'meetingid')
             })
     
     return rankings
\ No newline at end of file
@@ -0,0 +1,161 @@
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+__all__ = ['RateLimiter', 'AdaptiveRateLimiter']
+
+
+_STATE = struct.Struct('3d')
+
+
+class RateLimiter:
+    '''
+    Thread-safe token bucket limiting how often requests are started.
+
+    Given a 'path', the bucket is kept in that file under an exclusive file lock, so every
+    limiter opened on the same path, in any process, shares one rate. This needs fcntl (POSIX),
+    and raises OSError on other platforms.
+
+            Parameters:
+                    - 'rate' (float): Requests allowed per second on average
+                    - 'burst' (int): Number of requests that may start back to back after a quiet spell
+                    - 'path' (str): Optional path of a file to share the bucket through
+    '''
+
+    def __init__(self, rate, burst=1, path=None):
+        if rate <= 0:
+            raise ValueError(f'A rate limit needs a rate above 0 requests per second, not {rate}. Pass no limiter for no limit.')
+        if path is not None and fcntl is None:
+            raise OSError(f'Sharing a rate limit between processes needs fcntl (POSIX), which is not available on {sys.platform}.')
+        self.rate = rate
+        self.burst = burst
+        self.path = path
+        self.waiting = 0
+        self.acquired = 0
+        self.waited = 0.0
+        self._clock = time.monotonic if path is None else time.time
+        self._tokens = float(burst)
+        self._updated = self._clock()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _bucket(self):
+        '''Holds the lock on the bucket, loading and saving the shared state when there is a path'''
+        with self._lock:
+            if self.path is None:
+                yield
+                return
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                data = os.pread(fd, _STATE.size, 0)
+                if len(data) == _STATE.size:
+                    self._tokens, self._updated, self.rate = _STATE.unpack(data)
+                yield
+                os.pwrite(fd, _STATE.pack(self._tokens, self._updated, self.rate), 0)
+            finally:
+                os.close(fd)
+
+    def acquire(self):
+        '''Blocks until a request may start and returns the number of seconds waited'''
+        with self._bucket():
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.acquired += 1
+            if wait > 0:
+                self.waiting += 1
+        if wait > 0:
+            time.sleep(wait)
+            with self._lock:
+                self.waiting -= 1
+                self.waited += wait
+        return wait
+
+    def record(self, latency, error=False):
+        '''Records how a request went. A fixed rate limiter ignores it'''
+
+    def stats(self):
+        '''
+        Returns the limiter's current state, for monitoring and tuning.
+
+                Returns:
+                        - 'stats' (dict):
+                            - 'rate' (float): Current requests allowed per second
+                            - 'waiting' (int): Requests in this process currently waiting for their turn
+                            - 'acquired' (int): Requests started through this limiter
+                            - 'waited' (float): Total seconds requests have waited
+        '''
+        with self._lock:
+            return {'rate': self.rate, 'waiting': self.waiting, 'acquired': self.acquired, 'waited': self.waited}
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    '''
+    Token bucket that adjusts its own rate to how the site is responding. Each error (a
+    connection failure, 5xx or 429) or latency spike cuts the rate by 'backoff', and each
+    healthy response raises it by 'increase' requests per second, between 'min_rate' and 'max_rate'.
+    With a 'path', the adjusted rate is shared along with the bucket.
+
+            Parameters:
+                    - 'rate' (float): Starting requests per second
+                    - 'min_rate' (float): Lowest rate to back off to (defaults to a tenth of 'rate')
+                    - 'max_rate' (float): Highest rate to recover to (defaults to 'rate')
+                    - 'burst' (int): Number of requests that may start back to back after a quiet spell
+                    - 'backoff' (float): Factor the rate is multiplied by after an error or slow response
+                    - 'increase' (float): Requests per second added after each healthy response
+                    - 'spike' (float): A response is slow when it takes this many times the average latency
+                    - 'min_slow' (float): Responses quicker than this many seconds are never counted as slow
+                    - 'path' (str): Optional path of a file to share the bucket and rate through
+    '''
+
+    def __init__(self, rate, min_rate=None, max_rate=None, burst=1, backoff=0.5, increase=0.05, spike=3.0, min_slow=1.0, path=None):
+        super().__init__(rate, burst=burst, path=path)
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.backoff = backoff
+        self.increase = increase
+        self.spike = spike
+        self.min_slow = min_slow
+        self.latency = None
+        self.errors = 0
+        self.slow = 0
+
+    def record(self, latency, error=False):
+        '''
+        Adjusts the rate after a request.
+
+                Parameters:
+                        - 'latency' (float): Seconds the request took
+                        - 'error' (bool): Whether the request failed or was throttled by the site
+        '''
+        slow = not error and self.latency is not None and latency > max(self.min_slow, self.spike * self.latency)
+        with self._bucket():
+            if error or slow:
+                self.rate = max(self.min_rate, self.rate * self.backoff)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+        with self._lock:
+            if error:
+                self.errors += 1
+            else:
+                if slow:
+                    self.slow += 1
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+
+    def stats(self):
+        '''Returns the limiter's current state (see RateLimiter.stats), plus 'latency', 'errors' and 'slow' responses'''
+        stats = super().stats()
+        stats.update(latency=self.latency, errors=self.errors, slow=self.slow)
+        return stats
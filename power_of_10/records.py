@@ -0,0 +1,162 @@
+import sys
+from typing import NamedTuple
+from .marks import parse_mark
+
+
+__all__ = ['Performance', 'RankingEntry', 'MeetingResult', 'AthleteSummary', 'Meeting', 'to_records']
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _from_dict(cls, row):
+    '''
+    Returns a record from a row dict. Values that repeat across rows (clubs, venues, dates,
+    marks, ...) are interned, so every record holding one shares a single string.
+    '''
+    return cls._make([_intern(row.get(f)) if f in cls.INTERNED else row.get(f) for f in cls._fields])
+
+
+def _to_dict(self):
+    '''Returns the record as the dict the lookups return by default'''
+    return dict(zip(self._fields, self))
+
+
+def _mark(self, field, event=None):
+    '''Returns a field parsed as a Mark (see marks.parse_mark), using the record's event if it has one'''
+    return parse_mark(getattr(self, field), event if event is not None else getattr(self, 'event', None))
+
+
+class Performance(NamedTuple):
+    '''
+    Performance from an athlete's profile, as in get_athlete's 'performances'.
+
+            Fields:
+                    - 'event', 'value', 'venue', 'meeting', 'date', 'meeting_id' (str)
+                    - 'position' (tuple): (position, race identifier)
+    '''
+    event: str
+    value: str
+    position: tuple
+    venue: str
+    meeting: str
+    date: str
+    meeting_id: str
+
+    INTERNED = frozenset(['event', 'value', 'venue', 'meeting', 'date'])
+    mark = _mark
+
+    @classmethod
+    def from_dict(cls, row):
+        '''Returns a record from a row dict, interning the values that repeat across rows'''
+        return _from_dict(cls, dict(row, position=tuple(row.get('position') or ())))
+
+    def to_dict(self):
+        '''Returns the record as the dict the lookups return by default'''
+        return dict(zip(self._fields, self), position=list(self.position))
+
+
+class RankingEntry(NamedTuple):
+    '''
+    Row of a ranking list, as returned by get_rankings.
+
+            Fields:
+                    - 'rank', 'performance', 'pb', 'name', 'year', 'coach', 'club', 'venue', 'date',
+                      'athlete_id', 'meeting_id' (str)
+    '''
+    rank: str
+    performance: str
+    pb: str
+    name: str
+    year: str
+    coach: str
+    club: str
+    venue: str
+    date: str
+    athlete_id: str
+    meeting_id: str
+
+    INTERNED = frozenset(['rank', 'performance', 'pb', 'year', 'coach', 'club', 'venue', 'date'])
+    from_dict = classmethod(_from_dict)
+    to_dict = _to_dict
+    mark = _mark
+
+
+class MeetingResult(NamedTuple):
+    '''
+    Athlete's result in a race, as in get_results' 'results' of each race.
+
+            Fields:
+                    - 'pos', 'perf', 'name', 'athlete_id', 'age_group', 'gender', 'year', 'coach', 'club', 'sb', 'pb' (str)
+    '''
+    pos: str
+    perf: str
+    name: str
+    athlete_id: str
+    age_group: str
+    gender: str
+    year: str
+    coach: str
+    club: str
+    sb: str
+    pb: str
+
+    INTERNED = frozenset(['pos', 'perf', 'age_group', 'gender', 'year', 'coach', 'club', 'sb', 'pb'])
+    from_dict = classmethod(_from_dict)
+    to_dict = _to_dict
+    mark = _mark
+
+
+class AthleteSummary(NamedTuple):
+    '''
+    Athlete found by search_athletes.
+
+            Fields:
+                    - 'firstname', 'surname', 'track', 'road', 'xc', 'sex', 'club', 'athlete_id' (str)
+    '''
+    firstname: str
+    surname: str
+    track: str
+    road: str
+    xc: str
+    sex: str
+    club: str
+    athlete_id: str
+
+    INTERNED = frozenset(['firstname', 'track', 'road', 'xc', 'sex', 'club'])
+    from_dict = classmethod(_from_dict)
+    to_dict = _to_dict
+
+
+class Meeting(NamedTuple):
+    '''
+    Meeting found by search_event.
+
+            Fields:
+                    - 'date', 'meeting', 'venue', 'type', 'meeting_id' (str)
+    '''
+    date: str
+    meeting: str
+    venue: str
+    type: str
+    meeting_id: str
+
+    INTERNED = frozenset(['date', 'venue', 'type'])
+    from_dict = classmethod(_from_dict)
+    to_dict = _to_dict
+
+
+def to_records(rows, record):
+    '''
+    Returns row dicts as records of the given type.
+
+            Parameters:
+                    - 'rows' (arr): List of row dicts, as returned by a lookup
+                    - 'record' (type): Performance, RankingEntry, MeetingResult, AthleteSummary or Meeting
+
+            Returns:
+                    - 'records' (arr): List of records
+    '''
+    from_dict = record.from_dict
+    return [from_dict(row) for row in rows]
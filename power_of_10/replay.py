@@ -0,0 +1,277 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import BaseAdapter
+from .archive import ArchiveReader, INDEX
+from .cache import normalise_url
+from .client import BASE_URL
+
+
+__all__ = ['ReplaySite', 'ReplayAdapter', 'ReplayServer', 'main']
+
+
+# Pages of the site a replay serves, by the file name of their path
+ENDPOINTS = ('athleteslookup.aspx', 'profile.aspx', 'coacheslookup.aspx', 'rankinglist.aspx', 'resultslookup.aspx', 'results.aspx')
+
+
+def _endpoint(url):
+    return os.path.basename(urlsplit(url).path).lower()
+
+
+class ReplaySite:
+    '''
+    Recorded copy of the site's pages, answering requests with injected latency, errors and
+    throttling. Served over HTTP by ReplayServer, or in-process by ReplayAdapter.
+
+    A request for a recorded url gets that page. Any other request to one of the ENDPOINTS gets the
+    first recorded page of that endpoint (when 'fallback' is set), so load tests can use any ids.
+
+            Parameters:
+                    - 'source' (dict or str): Dict of url to page body, a directory of saved pages with a
+                      manifest.json of file name to url (like benchmarks/fixtures), or a page archive directory
+                    - 'latency' (float): Seconds every response is delayed by
+                    - 'jitter' (float): Maximum random seconds added to the latency
+                    - 'error_rate' (float): Fraction of requests answered with a 503 error
+                    - 'rate' (float): Optional requests per second allowed before requests are answered with a 429 error
+                    - 'burst' (int): Number of requests allowed at once above 'rate'
+                    - 'fallback' (bool): Answer unrecorded urls of known endpoints with a recorded page of the endpoint
+                    - 'seed' (int): Optional seed of the latency and error randomness, for reproducible runs
+    '''
+
+    def __init__(self, source, latency=0.0, jitter=0.0, error_rate=0.0, rate=None, burst=1, fallback=True, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate = rate
+        self.burst = burst
+        self.fallback = fallback
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self.stats = {'requests': 0, 'served': 0, 'errors': 0, 'throttled': 0, 'missing': 0}
+
+        self._archive = None
+        self._pages = {}
+        if isinstance(source, dict):
+            self._pages = {normalise_url(url): body.encode('utf-8') if isinstance(body, str) else body for url, body in source.items()}
+            urls = list(self._pages)
+        elif os.path.exists(os.path.join(source, INDEX)):
+            self._archive = ArchiveReader(source)
+            urls = [e['url'] for e in self._archive.entries() if e['status'] == 200]
+        else:
+            with open(os.path.join(source, 'manifest.json'), encoding='utf-8') as f:
+                manifest = json.load(f)
+            for name, url in manifest.items():
+                with open(os.path.join(source, name), 'rb') as f:
+                    self._pages[normalise_url(url)] = f.read()
+            urls = list(self._pages)
+
+        self._defaults = {}
+        for url in urls:
+            self._defaults.setdefault(_endpoint(url), url)
+
+    def __len__(self):
+        return len(self._archive) if self._archive is not None else len(self._pages)
+
+    def page(self, url):
+        '''
+        Returns the recorded body for a url, without any injected latency, errors or throttling.
+
+                Parameters:
+                        - 'url' (str): Url of the page on the site
+
+                Returns:
+                        - 'body' (bytes): Body of the page, or None if there is none to serve
+        '''
+        url = normalise_url(url)
+        body = self._get(url)
+        endpoint = _endpoint(url)
+        if body is None and self.fallback and endpoint in ENDPOINTS and endpoint in self._defaults:
+            body = self._get(self._defaults[endpoint])
+        return body
+
+    def _get(self, url):
+        if self._archive is not None:
+            return self._archive.get(url)
+        return self._pages.get(url)
+
+    def _throttled(self):
+        if not self.rate:
+            return False
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+    def respond(self, url):
+        '''
+        Answers a request for a url of the site, after the injected latency.
+
+                Parameters:
+                        - 'url' (str): Url of the page on the site
+
+                Returns:
+                        - 'status' (int): HTTP status, 200, 404, 429 (throttled) or 503 (injected error)
+                        - 'headers' (dict): Response headers
+                        - 'body' (bytes): Response body
+        '''
+        with self._lock:
+            self.stats['requests'] += 1
+            throttled = self._throttled()
+            error = not throttled and self.error_rate and self._random.random() < self.error_rate
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+        if throttled:
+            status, body, headers = 429, b'Too many requests', {'Retry-After': str(max(1, round(1 / self.rate)))}
+        elif error:
+            status, body, headers = 503, b'Service unavailable', {}
+        else:
+            body = self.page(url)
+            status, headers = (200, {}) if body is not None else (404, {})
+            body = body if body is not None else b'Not found'
+
+        with self._lock:
+            key = {200: 'served', 404: 'missing', 429: 'throttled', 503: 'errors'}[status]
+            self.stats[key] += 1
+        headers = dict(headers, **{'Content-Type': 'text/html; charset=utf-8', 'Content-Length': str(len(body))})
+        return status, headers, body
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    '''
+    Requests adapter answering requests from a ReplaySite in-process, without a server or sockets.
+    Pass it as a PowerOf10Client's 'transport'.
+
+            Parameters:
+                    - 'site' (ReplaySite): Site to answer from
+    '''
+
+    def __init__(self, site):
+        super().__init__()
+        self.site = site
+
+    def send(self, request, **kwargs):
+        status, headers, body = self.site.respond(request.url)
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = body
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        status, headers, body = self.server.site.respond(BASE_URL + self.path)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ReplayServer:
+    '''
+    Local HTTP server serving a ReplaySite on a background thread. Point a client at it with
+    PowerOf10Client(transport=server.url), or AsyncPowerOf10Client(transport=server.url).
+
+            Parameters:
+                    - 'site' (ReplaySite or dict or str): Site to serve, or the source of one (see ReplaySite)
+                    - 'host' (str): Address to listen on
+                    - 'port' (int): Port to listen on (0 picks a free port)
+                    - '**kwargs': Passed to ReplaySite when 'site' is a source
+    '''
+
+    def __init__(self, site, host='127.0.0.1', port=0, **kwargs):
+        self.site = site if isinstance(site, ReplaySite) else ReplaySite(site, **kwargs)
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.site = self.site
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        '''Starts serving on a background thread and returns the server'''
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        '''Serves on the current thread until interrupted'''
+        self._server.serve_forever()
+
+    def stop(self):
+        '''Stops serving, if the server was started, and closes the socket and the site'''
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        self.site.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve recorded Power of 10 pages locally, with injected latency, errors and throttling.')
+    parser.add_argument('source', help='page archive directory, or directory of saved pages with a manifest.json')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds every response is delayed by')
+    parser.add_argument('--jitter', type=float, default=0.0, help='maximum random seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with a 503 error')
+    parser.add_argument('--rate', type=float, help='requests per second allowed before answering with 429 errors')
+    parser.add_argument('--burst', type=int, default=1, help='number of requests allowed at once above the rate')
+    parser.add_argument('--seed', type=int, help='seed of the latency and error randomness')
+    args = parser.parse_args(argv)
+
+    server = ReplayServer(args.source, args.host, args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          rate=args.rate, burst=args.burst, seed=args.seed)
+    print(f'Serving {len(server.site)} pages at {server.url}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(json.dumps(server.site.stats), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,18 @@
-import requests
-from bs4 import BeautifulSoup
+from functools import lru_cache
+from urllib.parse import urlencode
+from .catalogue import MEETING_TYPES, TERRAINS, normalise_event, normalise_meeting_type, normalise_terrain
+from .client import BASE_URL, get_client
+from . import dom
 from .exceptions import QueryError, BroadQueryError
+from .table import Table
+from .marks import add_marks
+from .records import Meeting, MeetingResult, to_records
 
 
+__all__ = ['RESULT_COLUMNS', 'search_event', 'parse_meeting_search', 'MeetingResults', 'get_results', 'parse_meeting_results']
 
-def search_event(event=None, meeting=None, venue=None, date_from=None, year=None, date_to=None, meeting_type=None, terrain=None):
+
+def search_event(event=None, meeting=None, venue=None, date_from=None, year=None, date_to=None, meeting_type=None, terrain=None, client=None, records=False):
     '''
     Returns a dict of events that correspond to the query parameters
 
@@ -17,6 +25,8 @@ def search_event(event=None, meeting=None, venue=None, date_from=None, year=None
                     - 'year' (int): Optional year to search within
                     - 'meeting_type' (str): Optional type of meeting
                     - 'terrain' (str): Optional type of terrain event was on
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+                    - 'records' (bool): Return compact Meeting records instead of dicts
 
             Returns:
                     - 'results' (arr): List of results corresponding to event parameters
@@ -26,58 +36,108 @@ def search_event(event=None, meeting=None, venue=None, date_from=None, year=None
                         - 'type' (str): Type of terrain it was held on
                         - 'meeting_id' (int): Reference id of meeting (used by PowerOf10)
     '''
-    url = 'https://www.thepowerof10.info/results/resultslookup.aspx?'
-
-    if event is not None:
-        url += f'event={str(event).replace(" ","+")}&'
-    if meeting is not None:
-        url += f'title={meeting.replace(" ","+")}&'
-    if venue is not None:
-        url += f'venue={venue.replace(" ","+")}&'
-    if date_from is not None:
-        url += f'datefrom={date_from}&'
-    if date_to is not None:
-        url += f'dateto={date_to}&'
-    if year is not None:
-        url += f'year={year}&'
+    url = _search_event_url(event, meeting, venue, date_from, year, date_to, meeting_type, terrain)
+    c = get_client(client)
+    meetings = c.stored('meeting_search', url, lambda: parse_meeting_search(c.get(url).content))
+    return to_records(meetings, Meeting) if records else meetings
+
+
+@lru_cache(maxsize=4096)
+def _search_event_url(event, meeting, venue, date_from, year, date_to, meeting_type, terrain):
+    query = {'event': None if event is None else normalise_event(event), 'title': meeting, 'venue': venue,
+             'datefrom': date_from, 'dateto': date_to, 'year': year}
+    query = {k: v for k, v in query.items() if v is not None}
     if meeting_type is not None:
-        mt = {'UK Calendar': 'ukcalendar=y&', 'World Calendar': 'worldcalendar=y&', 'BMC': 'bmc=y&', 'NAL': 'meetingtypeid=53&', 'YDL': 'meetingtypeid=45&', 'SAL': 'meetingtypeid=44&', 'NEL': 'meetingtypeid=26&', 'MJL': 'meetingtypeid=34&'}
-        url += mt[meeting_type]
+        name, value = MEETING_TYPES[normalise_meeting_type(meeting_type)]
+        query[name] = value
     if terrain is not None:
-        tt = {'any': 'terraintypecodes=A&', 'virtual': 'terraintypecodes=V&', 'disability': 'terraintypecodes=D&', 'walks': 'terraintypecodes=W&', 'mountain': 'terraintypecodes=H&', 'fell': 'terraintypecodes=F&', 'road/multi/xc': 'terraintypecodes=RMX&', 'road/multi': 'terraintypecodes=RM&', '5k/10k/hm/mar': 'terraintypecodes=B&', 'xc': 'terraintypecodes=X&', 'multi': 'terraintypecodes=M&', 'indoor': 'terraintypecodes=I&', 'road': 'terraintypecodes=R&', 'track': 'terraintypecodes=T&', 'track/10k/hm/mar/xc': 'terraintypecodes=TIDEX&'}
-        url += tt[terrain]
+        query['terraintypecodes'] = TERRAINS[normalise_terrain(terrain)]
+    return f'{BASE_URL}/results/resultslookup.aspx?{urlencode(query)}'
+
 
-    html = requests.get(url)
-    soup = BeautifulSoup(html.text, 'html.parser')
+def parse_meeting_search(html):
+    '''
+    Returns the list of meetings on a saved or fetched results lookup page (see search_event).
+
+            Parameters:
+                    - 'html' (str, bytes or path): Page html as text or raw bytes, or the path of a saved page as a pathlib.Path
+
+            Returns:
+                    - 'results' (arr): List of meetings, as returned by search_event
+    '''
+    parser = dom.get_parser()
+    soup = parser.parse(html)
 
     try:
-        table = soup.find('table', {'id': 'cphBody_dgMeetings'}).find_all('tr')
+        table = parser.find_all(parser.find(soup, 'table', id='cphBody_dgMeetings'), 'tr')
     except Exception as e:
+        message = parser.find(soup, 'span', **{'class': 'errormessage'})
+        if message is not None and 'too many' in parser.text(message).lower():
+            raise BroadQueryError(parser.text(message))
         raise QueryError('No meetings found.')
 
     results = []
     for i in table:
-        dets = i.find_all('td')
-        if dets[0].text != 'Date':
+        dets = parser.find_all(i, 'td')
+        date = parser.text(dets[0])
+        if date != 'Date':
             results.append({
-                'date': dets[0].text,
-                'meeting': dets[1].text.replace('\n','').replace('\r','').replace('     ','').replace('Info',''),
-                'venue': dets[2].text,
-                'type': dets[3].text,
-                'meeting_id': str(dets[2]).split('"')[1].split('=')[1]
+                'date': date,
+                'meeting': parser.text(dets[1]).replace('\n','').replace('\r','').replace('     ','').replace('Info',''),
+                'venue': parser.text(dets[2]),
+                'type': parser.text(dets[3]),
+                'meeting_id': parser.link_param(dets[2], 'meetingid')
             })
             
     return results
 
 
-def get_results(meeting_id):
+RESULT_COLUMNS = {
+    'event': 'str', 'event_age_group': 'str', 'race': 'str', 'pos': 'int', 'perf': 'float', 'name': 'str',
+    'athlete_id': 'int', 'age_group': 'str', 'gender': 'str', 'year': 'int', 'coach': 'str', 'club': 'str',
+    'sb': 'float', 'pb': 'float'
+}
+
+
+class MeetingResults(dict):
+    '''
+    Dict of meeting information and results, as returned by get_results, that can also be
+    flattened into a Table with one row per athlete result.
+    '''
+
+    def to_table(self):
+        '''
+        Returns the results of every race at the meeting as a single table.
+
+                Returns:
+                        - 'table' (Table): Typed numpy columns, one row per result, with the race's
+                          'event', 'event_age_group' and 'race' alongside each athlete's result.
+                          Performances are floats (seconds or metres) and ids ints (-1 if missing).
+        '''
+        rows = []
+        for race in self['results']:
+            for result in race['results']:
+                if not isinstance(result, dict):
+                    result = result.to_dict()
+                row = dict(result, event=race['event'], event_age_group=race['age_group'], race=race['race'])
+                rows.append(row)
+        return Table.from_records(rows, RESULT_COLUMNS)
+
+
+def get_results(meeting_id, client=None, marks=False, records=False):
     '''
     Returns a dict of information for a particular meeting 
 
             Parameters:
                     - 'meeting_id' (int): Reference id of meeting (used by PowerOf10)
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+                    - 'marks' (bool): Add a parsed Mark (seconds, metres or points plus wind, indoor,
+                      hand timing and DNF/DQ flags) alongside each result's 'perf', 'sb' and 'pb', as '<field>_mark'
+                    - 'records' (bool): Return each race's results as compact MeetingResult records instead of dicts.
+                      Use result.mark('perf', race['event']) in place of 'marks'
 
             Returns:
+                    - 'meeting' (MeetingResults): Dict of meeting data, with to_table() to flatten the results
                     - 'title' (str): Name of meeting
                     - 'location' (str): Location of meeting
                     - 'date' (str): Date of meeting
@@ -98,25 +158,55 @@ def get_results(meeting_id):
                             - 'sb' (float): Seasons best
                             - 'pb' (float): Personal best
     '''
+    if marks and records:
+        raise QueryError('Records cannot be combined with marks. Use mark() on each record instead.')
+    url = _results_url(meeting_id)
+    c = get_client(client)
+    meeting = MeetingResults(c.stored('results', meeting_id, lambda: parse_meeting_results(c.get(url).content)))
+    if marks:
+        meeting['results'] = [dict(race, results=add_marks([dict(r) for r in race['results']], ['perf', 'sb', 'pb'], race['event']))
+                              for race in meeting['results']]
+    if records:
+        meeting['results'] = [dict(race, results=to_records(race['results'], MeetingResult)) for race in meeting['results']]
+    return meeting
+
+
+def _results_url(meeting_id):
     if meeting_id is None:
         raise QueryError('Please input a valud meeting id')
 
-    url = f'https://www.thepowerof10.info/results/results.aspx?meetingid={meeting_id}'
-    html = requests.get(url)
-    soup = BeautifulSoup(html.text, 'html.parser')
+    return f'https://www.thepowerof10.info/results/results.aspx?meetingid={meeting_id}'
+
+
+def parse_meeting_results(html):
+    '''
+    Returns a dict of information for a meeting from a saved or fetched results page (see get_results).
+
+            Parameters:
+                    - 'html' (str, bytes or path): Page html as text or raw bytes, or the path of a saved page as a pathlib.Path
+
+            Returns:
+                    - 'meeting' (dict): Meeting data, as returned by get_results
+    '''
+    parser = dom.get_parser()
+    soup = parser.parse(html)
 
-    if 'Could not find meeting' in soup.find('div', {'id': 'pnlMainGeneral'}).text.replace('\n','') or 'No results found' in soup.find('div', {'id': 'pnlMainGeneral'}).text.replace('\n',''):
+    main = parser.find(soup, 'div', id='pnlMainGeneral')
+    main_text = parser.text(main).replace('\n','')
+    if 'Could not find meeting' in main_text or 'No results found' in main_text:
         raise QueryError('Meeting not found. Please input a valid meeting id')
 
-    meeting_dets = soup.find('div', {'id': 'pnlMainGeneral'}).find_all('table')[0].find('span')
-    meeting_res = soup.find('table', {'id': 'cphBody_dgP'}).find_all('tr')[1:]
+    meeting_dets = parser.find(parser.find_all(main, 'table')[0], 'span')
+    meeting_res = parser.find_all(parser.find(soup, 'table', id='cphBody_dgP'), 'tr')[1:]
 
     results = []
     count = -1
     for i in meeting_res:
-        dets = i.find_all('td')
-        if len(dets) == 1 and '\xa0' not in str(dets[0]):
-            vals = str(dets[0].text).split(" ")
+        cells = parser.find_all(i, 'td')
+        dets = [parser.text(td) for td in cells]
+        first = dets[0]
+        if len(dets) == 1 and '\xa0' not in first:
+            vals = first.split(" ")
             results.append({
                 'event': vals[0],
                 'age_group': vals[1],
@@ -126,27 +216,28 @@ def get_results(meeting_id):
             count += 1
             
         else:
-            if '\xa0' not in str(dets[0]) and 'Pos' not in str(dets[0].text) :
+            if '\xa0' not in first and 'Pos' not in first:
                 results[count]['results'].append({
-                    'pos': dets[0].text,
-                    'perf': dets[1].text,
-                    'name': dets[2].text,
-                    'athlete_id': str(dets[2]).split('"')[1].split('=')[1] if len(str(dets[2]).split('"')) > 1 else '',
-                    'age_group': dets[4].text,
-                    'gender': dets[5].text,
-                    'year': dets[6].text,
-                    'coach': dets[7].text if dets[7].text != '\xa0' else '',
-                    'club': dets[8].text,
-                    'sb': dets[9].text,
-                    'pb': dets[10].text
+                    'pos': first,
+                    'perf': dets[1],
+                    'name': dets[2],
+                    'athlete_id': parser.link_param(cells[2], 'athleteid') or '',
+                    'age_group': dets[4],
+                    'gender': dets[5],
+                    'year': dets[6],
+                    'coach': dets[7] if dets[7] != '\xa0' else '',
+                    'club': dets[8],
+                    'sb': dets[9],
+                    'pb': dets[10]
                 })
 
-    meeting = {
-        'title': str(meeting_dets).split('<b>')[1].split('</b')[0],
-        'location': str(meeting_dets).split('<br/>')[1],
-        'date': str(meeting_dets).split('<br/>')[2].split('</span>')[0],
+    meeting_lines = parser.inner_html(meeting_dets).split('<br/>')
+    meeting = MeetingResults({
+        'title': parser.inner_html(parser.find(meeting_dets, 'b')),
+        'location': meeting_lines[1],
+        'date': meeting_lines[2],
         'results': results
-    }
+    })
     
     return meeting
 
@@ -0,0 +1,211 @@
+import csv
+import json
+import os
+import sys
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+__all__ = ['JsonLinesSink', 'CsvSink', 'ParquetSink', 'parquet_schema', 'SINKS', 'APPENDABLE', 'sink_format', 'open_sink']
+
+
+class JsonLinesSink:
+    '''
+    Writes records as JSON Lines, one record per line, as they arrive.
+
+            Parameters:
+                    - 'output' (str or file): Path of the output file, '-' for stdout, or an open text file
+                    - 'append' (bool): Append to an existing output file instead of replacing it
+    '''
+
+    def __init__(self, output, append=False):
+        if hasattr(output, 'write'):
+            self.file, self._owns_file = output, False
+        elif output == '-':
+            self.file, self._owns_file = sys.stdout, False
+        else:
+            self.file, self._owns_file = open(output, 'a' if append else 'w', encoding='utf-8'), True
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self._owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink:
+    '''
+    Writes records as CSV rows as they arrive. The columns are those of the first record (or, when
+    appending, the header of the existing file). Keys missing from a record are left empty, other
+    keys are dropped, and nested values (lists and dicts) are written as JSON strings.
+
+            Parameters:
+                    - 'output' (str or file): Path of the output file, '-' for stdout, or an open text file
+                    - 'append' (bool): Append to an existing output file instead of replacing it
+    '''
+
+    def __init__(self, output, append=False):
+        self._columns = None
+        if hasattr(output, 'write'):
+            self.file, self._owns_file = output, False
+        elif output == '-':
+            self.file, self._owns_file = sys.stdout, False
+        else:
+            if append and os.path.exists(output) and os.path.getsize(output):
+                with open(output, newline='', encoding='utf-8') as f:
+                    self._columns = next(csv.reader(f), None)
+            self.file, self._owns_file = open(output, 'a' if append else 'w', newline='', encoding='utf-8'), True
+        self._writer = None
+
+    def write(self, record):
+        if self._writer is None:
+            header = self._columns is None
+            self._columns = self._columns or list(record)
+            self._writer = csv.DictWriter(self.file, self._columns, extrasaction='ignore')
+            if header:
+                self._writer.writeheader()
+        self._writer.writerow({k: json.dumps(v, ensure_ascii=False, default=str) if isinstance(v, (list, dict)) else v
+                               for k, v in record.items()})
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self._owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetSink:
+    '''
+    Writes records to a Parquet file in row groups of 'batch_size' records, so memory stays flat.
+    Nested values (lists and dicts) are stored as JSON strings. Requires pyarrow.
+
+    Unless a schema is given, each column's type is taken from the first row group. Columns with
+    no values in it are stored as nullable strings, so later row groups can fill them in.
+
+            Parameters:
+                    - 'output' (str): Path of the output file
+                    - 'batch_size' (int): Number of records buffered before a row group is written
+                    - 'schema' (pyarrow.Schema): Optional schema of the file, e.g. from parquet_schema
+    '''
+
+    def __init__(self, output, batch_size=10000, schema=None):
+        if pyarrow is None:
+            raise ImportError('Writing Parquet requires pyarrow. Install it with "pip install pyarrow".')
+        self.output = output
+        self.batch_size = batch_size
+        self.schema = schema
+        self._rows = []
+        self._writer = None
+
+    def write(self, record):
+        self._rows.append({k: json.dumps(v, ensure_ascii=False, default=str) if isinstance(v, (list, dict)) else v
+                           for k, v in record.items()})
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        if self.schema is None:
+            columns = list(dict.fromkeys(k for row in self._rows for k in row))
+            self.schema = parquet_schema({c: pyarrow.array([row.get(c) for row in self._rows]).type for c in columns})
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(self.output, self.schema)
+        arrays = [_parquet_column([row.get(f.name) for row in self._rows], f.type) for f in self.schema]
+        self._writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parquet_schema(types):
+    '''
+    Returns a Parquet schema of nullable columns, storing columns of unknown (null) type as strings.
+
+            Parameters:
+                    - 'types' (dict): Column name to pyarrow type, or None for a string column
+
+            Returns:
+                    - 'schema' (pyarrow.Schema): Schema to pass to ParquetSink
+    '''
+    if pyarrow is None:
+        raise ImportError('Writing Parquet requires pyarrow. Install it with "pip install pyarrow".')
+    return pyarrow.schema([pyarrow.field(name, pyarrow.string() if t is None or pyarrow.types.is_null(t) else t, nullable=True)
+                           for name, t in types.items()])
+
+
+def _parquet_column(values, type):
+    if pyarrow.types.is_string(type) or pyarrow.types.is_large_string(type):
+        values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+    return pyarrow.array(values, type=type)
+
+
+SINKS = {'csv': CsvSink, 'jsonl': JsonLinesSink, 'parquet': ParquetSink}
+
+# Formats whose files can be appended to, e.g. when resuming an interrupted export
+APPENDABLE = ('csv', 'jsonl')
+
+
+def sink_format(output, format=None):
+    '''Returns the given format, or the format of an output path from its extension (JSON Lines if unknown)'''
+    if format is not None:
+        return format
+    if isinstance(output, str):
+        for name in ('csv', 'parquet'):
+            if output.endswith('.' + name):
+                return name
+    return 'jsonl'
+
+
+def open_sink(output, format=None, append=False):
+    '''
+    Returns a sink writing to the given output, choosing the format from the file extension if not given.
+
+            Parameters:
+                    - 'output' (str or file): Path of the output file, '-' for stdout, or an open text file
+                    - 'format' (str): Optional output format, one of 'csv', 'jsonl' or 'parquet'
+                    - 'append' (bool): Append to an existing CSV or JSON Lines file instead of replacing it
+
+            Returns:
+                    - 'sink' (object): Sink with write(record) and close() methods
+    '''
+    format = sink_format(output, format)
+    if append:
+        if format not in APPENDABLE:
+            raise ValueError('Only CSV and JSON Lines output can be appended to.')
+        return SINKS[format](output, append=True)
+    return SINKS[format](output)
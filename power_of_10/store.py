@@ -0,0 +1,288 @@
+import json
+import sqlite3
+import threading
+import time
+import numpy as np
+from urllib.parse import urlsplit, parse_qsl
+from .marks import parse_mark
+from .table import parse_date
+
+
+__all__ = ['LocalStore']
+
+
+KINDS = ('athlete', 'athlete_search', 'coach_search', 'rankings', 'meeting_search', 'results')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS documents (
+    kind TEXT,
+    key TEXT,
+    data TEXT,
+    stored_at REAL,
+    PRIMARY KEY (kind, key));
+CREATE TABLE IF NOT EXISTS athletes (
+    athlete_id TEXT PRIMARY KEY,
+    firstname TEXT,
+    surname TEXT,
+    club TEXT,
+    gender TEXT,
+    age_group TEXT,
+    county TEXT,
+    region TEXT,
+    nation TEXT,
+    lead_coach TEXT,
+    about TEXT);
+CREATE INDEX IF NOT EXISTS athletes_club ON athletes (club);
+CREATE TABLE IF NOT EXISTS pbs (
+    athlete_id TEXT,
+    event TEXT,
+    value TEXT,
+    mark REAL);
+CREATE INDEX IF NOT EXISTS pbs_athlete ON pbs (athlete_id);
+CREATE INDEX IF NOT EXISTS pbs_event ON pbs (event);
+CREATE TABLE IF NOT EXISTS performances (
+    athlete_id TEXT,
+    event TEXT,
+    value TEXT,
+    mark REAL,
+    position TEXT,
+    race TEXT,
+    venue TEXT,
+    meeting TEXT,
+    date TEXT,
+    meeting_id TEXT);
+CREATE INDEX IF NOT EXISTS performances_athlete ON performances (athlete_id);
+CREATE INDEX IF NOT EXISTS performances_event ON performances (event, date);
+CREATE INDEX IF NOT EXISTS performances_venue ON performances (venue);
+CREATE INDEX IF NOT EXISTS performances_date ON performances (date);
+CREATE INDEX IF NOT EXISTS performances_meeting ON performances (meeting_id);
+CREATE TABLE IF NOT EXISTS meetings (
+    meeting_id TEXT PRIMARY KEY,
+    title TEXT,
+    venue TEXT,
+    type TEXT,
+    date TEXT);
+CREATE INDEX IF NOT EXISTS meetings_venue ON meetings (venue);
+CREATE INDEX IF NOT EXISTS meetings_date ON meetings (date);
+CREATE TABLE IF NOT EXISTS results (
+    meeting_id TEXT,
+    event TEXT,
+    event_age_group TEXT,
+    race TEXT,
+    pos TEXT,
+    perf TEXT,
+    mark REAL,
+    name TEXT,
+    athlete_id TEXT,
+    age_group TEXT,
+    gender TEXT,
+    year TEXT,
+    coach TEXT,
+    club TEXT,
+    sb TEXT,
+    pb TEXT);
+CREATE INDEX IF NOT EXISTS results_meeting ON results (meeting_id);
+CREATE INDEX IF NOT EXISTS results_athlete ON results (athlete_id);
+CREATE INDEX IF NOT EXISTS results_club ON results (club);
+CREATE INDEX IF NOT EXISTS results_event ON results (event);
+CREATE TABLE IF NOT EXISTS rankings (
+    query TEXT,
+    event TEXT,
+    year TEXT,
+    rank INTEGER,
+    performance TEXT,
+    mark REAL,
+    name TEXT,
+    athlete_id TEXT,
+    club TEXT,
+    venue TEXT,
+    date TEXT,
+    meeting_id TEXT);
+CREATE INDEX IF NOT EXISTS rankings_query ON rankings (query);
+CREATE INDEX IF NOT EXISTS rankings_athlete ON rankings (athlete_id);
+CREATE INDEX IF NOT EXISTS rankings_event ON rankings (event, year);
+'''
+
+
+def _date(value):
+    date = parse_date(value)
+    return None if np.isnat(date) else str(date)
+
+
+def _mark(value, event=None):
+    mark = parse_mark(value, event).value
+    return None if mark != mark else mark
+
+
+class LocalStore:
+    '''
+    Local SQLite store of looked up data, used by PowerOf10Client when passed as 'store'.
+
+    Everything a lookup returns is ingested twice: as the original document, so the lookup
+    can be answered again without a request (read-through), and into normalised tables of
+    athletes, PBs, performances, meetings, results and rankings, indexed on athlete_id,
+    meeting_id, club, event, date and venue for the query methods below. Dates are stored
+    as 'YYYY-MM-DD' and each performance string also as a number ('mark').
+
+            Parameters:
+                    - 'path' (str): Path of the SQLite database file (':memory:' for a throwaway store)
+                    - 'max_age' (int or dict): Optional age in seconds after which stored documents are fetched
+                        again, or a dict of kind (e.g. 'rankings') to age. Documents never expire by default
+    '''
+
+    def __init__(self, path='power_of_10_store.sqlite', max_age=None):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def _expired(self, kind, stored_at):
+        max_age = self.max_age.get(kind) if isinstance(self.max_age, dict) else self.max_age
+        return max_age is not None and stored_at + max_age < time.time()
+
+    def lookup(self, kind, key):
+        '''
+        Returns the stored document for a lookup, or None if it is not stored or has expired.
+
+                Parameters:
+                        - 'kind' (str): Kind of lookup, one of 'athlete', 'athlete_search', 'coach_search',
+                          'rankings', 'meeting_search' or 'results'
+                        - 'key' (str): Athlete or meeting id, or the url of a search or ranking list
+
+                Returns:
+                        - 'data' (dict or arr): Data as originally returned by the lookup
+        '''
+        with self._lock:
+            row = self._db.execute('SELECT data, stored_at FROM documents WHERE kind = ? AND key = ?', (kind, str(key))).fetchone()
+        if row is None or self._expired(kind, row['stored_at']):
+            return None
+        return json.loads(row['data'])
+
+    def ingest(self, kind, key, data):
+        '''
+        Stores the data returned by a lookup and indexes it into the normalised tables.
+
+                Parameters:
+                        - 'kind' (str): Kind of lookup (see lookup)
+                        - 'key' (str): Athlete or meeting id, or the url of a search or ranking list
+                        - 'data' (dict or arr): Data returned by the lookup
+        '''
+        if kind not in KINDS:
+            raise ValueError(f'Unknown kind {kind!r}. Choose from {", ".join(KINDS)}.')
+        key = str(key)
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)',
+                             (kind, key, json.dumps(data, ensure_ascii=False), time.time()))
+            getattr(self, '_ingest_' + kind)(key, data)
+            self._db.commit()
+
+    def _ingest_athlete(self, athlete_id, athlete):
+        self._db.execute('''INSERT INTO athletes (athlete_id, club, gender, age_group, county, region, nation, lead_coach, about)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (athlete_id) DO UPDATE SET club = excluded.club, gender = excluded.gender,
+            age_group = excluded.age_group, county = excluded.county, region = excluded.region, nation = excluded.nation,
+            lead_coach = excluded.lead_coach, about = excluded.about''', (
+            athlete_id, athlete.get('club'), athlete.get('gender'), athlete.get('age_group'), athlete.get('county'),
+            athlete.get('region'), athlete.get('nation'), athlete.get('lead coach'), athlete.get('about')))
+        if 'pb' in athlete:
+            self._db.execute('DELETE FROM pbs WHERE athlete_id = ?', (athlete_id,))
+            self._db.executemany('INSERT INTO pbs VALUES (?, ?, ?, ?)', [
+                (athlete_id, pb['event'], pb['value'], _mark(pb['value'], pb['event'])) for pb in athlete['pb']])
+        if 'performances' in athlete:
+            self._db.execute('DELETE FROM performances WHERE athlete_id = ?', (athlete_id,))
+            self._db.executemany('INSERT INTO performances VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+                (athlete_id, p['event'], p['value'], _mark(p['value'], p['event']), p['position'][0], p['position'][1],
+                 p['venue'], p['meeting'], _date(p['date']), p.get('meeting_id') or None) for p in athlete['performances']])
+
+    def _ingest_athlete_search(self, url, athletes):
+        self._db.executemany('''INSERT INTO athletes (athlete_id, firstname, surname, club, gender) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (athlete_id) DO UPDATE SET firstname = excluded.firstname, surname = excluded.surname,
+            club = excluded.club, gender = excluded.gender''', [
+            (a['athlete_id'], a['firstname'], a['surname'], a['club'], a['sex']) for a in athletes if a.get('athlete_id')])
+
+    def _ingest_coach_search(self, url, coaches):
+        pass
+
+    def _ingest_meeting_search(self, url, meetings):
+        self._db.executemany('''INSERT INTO meetings (meeting_id, title, venue, type, date) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (meeting_id) DO UPDATE SET title = excluded.title, venue = excluded.venue,
+            type = excluded.type, date = excluded.date''', [
+            (m['meeting_id'], m['meeting'], m['venue'], m['type'], _date(m['date'])) for m in meetings if m.get('meeting_id')])
+
+    def _ingest_results(self, meeting_id, meeting):
+        self._db.execute('''INSERT INTO meetings (meeting_id, title, venue, date) VALUES (?, ?, ?, ?)
+            ON CONFLICT (meeting_id) DO UPDATE SET title = excluded.title, venue = excluded.venue, date = excluded.date''',
+            (meeting_id, meeting['title'], meeting['location'], _date(meeting['date'])))
+        self._db.execute('DELETE FROM results WHERE meeting_id = ?', (meeting_id,))
+        self._db.executemany('INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+            (meeting_id, race['event'], race['age_group'], str(race['race']), r['pos'], r['perf'], _mark(r['perf'], race['event']),
+             r['name'], r['athlete_id'] or None, r['age_group'], r['gender'], r['year'], r['coach'], r['club'], r['sb'], r['pb'])
+            for race in meeting['results'] for r in race['results']])
+
+    def _ingest_rankings(self, url, ranks):
+        query = dict(parse_qsl(urlsplit(url).query))
+        event, year = query.get('event'), query.get('year')
+        self._db.execute('DELETE FROM rankings WHERE query = ?', (url,))
+        self._db.executemany('INSERT INTO rankings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+            (url, event, year, int(r['rank']) if r['rank'].isdigit() else None, r['performance'], _mark(r['performance'], event),
+             r['name'], r['athlete_id'] or None, r['club'], r['venue'], _date(r['date']), r['meeting_id'] or None)
+            for r in ranks])
+
+    def query(self, sql, params=()):
+        '''Returns the rows of an SQL query against the store as a list of dicts'''
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params).fetchall()]
+
+    def _select(self, table, order, **filters):
+        clauses, params = [], []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if column == 'since':
+                clauses.append('date >= ?')
+            elif column == 'until':
+                clauses.append('date <= ?')
+            else:
+                clauses.append(f'{column} = ?')
+            params.append(str(value))
+        where = f' WHERE {" AND ".join(clauses)}' if clauses else ''
+        return self.query(f'SELECT * FROM {table}{where} ORDER BY {order}', params)
+
+    def athlete(self, athlete_id):
+        '''Returns the stored profile of an athlete, as returned by get_athlete, or None'''
+        return self.lookup('athlete', athlete_id)
+
+    def athletes(self, club=None):
+        '''Returns the stored athletes, optionally only those of a club'''
+        return self._select('athletes', 'surname, firstname', club=club)
+
+    def pbs(self, athlete_id=None, event=None):
+        '''Returns stored personal bests of an athlete or for an event'''
+        return self._select('pbs', 'event, mark', athlete_id=athlete_id, event=event)
+
+    def performances(self, athlete_id=None, event=None, venue=None, since=None, until=None):
+        '''Returns stored performances filtered by athlete, event, venue and date ('YYYY-MM-DD'), newest first'''
+        return self._select('performances', 'date DESC', athlete_id=athlete_id, event=event, venue=venue, since=since, until=until)
+
+    def meetings(self, venue=None, since=None, until=None):
+        '''Returns stored meetings filtered by venue and date ('YYYY-MM-DD'), newest first'''
+        return self._select('meetings', 'date DESC', venue=venue, since=since, until=until)
+
+    def results(self, meeting_id=None, athlete_id=None, club=None, event=None):
+        '''Returns stored meeting results filtered by meeting, athlete, club and event'''
+        return self._select('results', 'meeting_id, event, race, mark', meeting_id=meeting_id, athlete_id=athlete_id, club=club, event=event)
+
+    def rankings(self, athlete_id=None, event=None, year=None):
+        '''Returns stored ranking list entries filtered by athlete, event and year'''
+        return self._select('rankings', 'query, rank', athlete_id=athlete_id, event=event, year=year)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
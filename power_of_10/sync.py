@@ -0,0 +1,232 @@
+import datetime
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import numpy as np
+from .catalogue import normalise_age_group, normalise_event, normalise_gender, normalise_region, normalise_year
+from .client import get_client
+from .rankings import _rankings_url, parse_ranking_list
+from .results import _search_event_url, _results_url, parse_meeting_search, parse_meeting_results
+from .table import parse_date
+
+
+__all__ = ['content_hash', 'SyncState', 'Syncer']
+
+
+def content_hash(data):
+    '''Returns a stable hash of parsed page data, so changes to markup that don't change the data are ignored'''
+    return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _result_rows(meeting):
+    rows = {}
+    for race in meeting['results']:
+        for result in race['results']:
+            key = '|'.join([race['event'], race['age_group'], str(race['race']), result['athlete_id'] or result['name']])
+            rows[key] = dict(result, event=race['event'], event_age_group=race['age_group'], race=race['race'])
+    return rows
+
+
+def _ranking_rows(ranks):
+    return {r['athlete_id'] or r['name']: r for r in ranks}
+
+
+class SyncState:
+    '''
+    SQLite store of what has already been synced: known meetings with a content hash of their
+    results, and the last seen ranking list for each query.
+
+            Parameters:
+                    - 'path' (str): Path of the SQLite database file (':memory:' for a throwaway store)
+    '''
+
+    def __init__(self, path='power_of_10_sync.sqlite'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('''CREATE TABLE IF NOT EXISTS meetings (
+            meeting_id TEXT PRIMARY KEY,
+            date TEXT,
+            hash TEXT,
+            results TEXT,
+            synced_at REAL)''')
+        self._db.execute('''CREATE TABLE IF NOT EXISTS rankings (
+            query TEXT PRIMARY KEY,
+            hash TEXT,
+            ranks TEXT,
+            synced_at REAL)''')
+        self._db.commit()
+
+    def meeting(self, meeting_id):
+        '''Returns the stored (hash, rows, date) of a meeting, or None if it has never been synced'''
+        with self._lock:
+            row = self._db.execute('SELECT hash, results, date FROM meetings WHERE meeting_id = ?', (str(meeting_id),)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def save_meeting(self, meeting_id, date, digest, rows):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO meetings VALUES (?, ?, ?, ?, ?)',
+                             (str(meeting_id), date, digest, json.dumps(rows), time.time()))
+            self._db.commit()
+
+    def ranking(self, query):
+        '''Returns the stored (hash, rows) of a ranking list query, or None if it has never been synced'''
+        with self._lock:
+            row = self._db.execute('SELECT hash, ranks FROM rankings WHERE query = ?', (query,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def save_ranking(self, query, digest, rows):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO rankings VALUES (?, ?, ?, ?)', (query, digest, json.dumps(rows), time.time()))
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+class Syncer:
+    '''
+    Incrementally syncs meetings and ranking lists against a SyncState, yielding only what changed.
+
+    Each change is a dict with:
+        - 'kind' (str): 'meeting', 'result' or 'ranking'
+        - 'change' (str): 'added', 'changed', 'removed' or, for rankings, 'moved'
+        - 'meeting_id' or 'query' (str): Meeting or ranking list the change belongs to
+        - 'key' (str): Row key within the meeting or ranking list
+        - 'old' and 'new' (dict): Row before and after the change (None when added or removed)
+
+    A meeting or ranking list is marked as synced once all of its changes have been consumed,
+    so a run that is interrupted reports the same changes again next time.
+
+            Parameters:
+                    - 'state' (SyncState or str): State store, or the path of one
+                    - 'client' (PowerOf10Client): Optional client to fetch with (defaults to the shared client)
+                    - 'recheck_days' (int): Known meetings held within this many days are fetched again, as
+                        results are often corrected soon after a meeting. Older known meetings are skipped
+    '''
+
+    def __init__(self, state='power_of_10_sync.sqlite', client=None, recheck_days=14):
+        self.state = SyncState(state) if isinstance(state, str) else state
+        self.client = client
+        self.recheck_days = recheck_days
+
+    def sync_meetings(self, **query):
+        '''
+        Yields changes to the meetings matching a search_event query and to their results.
+        New meetings are fetched and all their results reported as added. Known meetings are
+        fetched again only while recent, and diffed only if their content hash changed.
+
+                Parameters:
+                        - '**query': Any search_event parameters, e.g. date_from='01/06/2024', date_to='02/06/2024'
+
+                Returns:
+                        - generator of changes
+        '''
+        url = _search_event_url(**{k: query.get(k) for k in ('event', 'meeting', 'venue', 'date_from', 'year', 'date_to', 'meeting_type', 'terrain')})
+        meetings = parse_meeting_search(get_client(self.client).get(url).content)
+        cutoff = np.datetime64(datetime.date.today(), 'D') - np.timedelta64(self.recheck_days, 'D')
+
+        for meeting in meetings:
+            meeting_id = meeting['meeting_id']
+            if not meeting_id:
+                continue
+            known = self.state.meeting(meeting_id)
+            if known is not None:
+                date = parse_date(meeting['date'])
+                if not np.isnat(date) and date < cutoff:
+                    continue
+            yield from self.sync_meeting(meeting_id, date=meeting['date'])
+
+    def sync_meeting(self, meeting_id, date=None):
+        '''
+        Fetches one meeting's results and yields what changed since it was last synced.
+
+                Parameters:
+                        - 'meeting_id' (int): Reference id of meeting (used by PowerOf10)
+                        - 'date' (str): Optional date of the meeting, stored to decide later rechecks
+
+                Returns:
+                        - generator of changes
+        '''
+        known = self.state.meeting(meeting_id)
+        results = parse_meeting_results(get_client(self.client).get(_results_url(meeting_id)).content)
+        digest = content_hash(results)
+        if known is not None and known[0] == digest:
+            return
+
+        rows = _result_rows(results)
+        meeting_id = str(meeting_id)
+        if known is None:
+            yield {'kind': 'meeting', 'change': 'added', 'meeting_id': meeting_id, 'key': meeting_id, 'old': None,
+                   'new': {k: results[k] for k in ('title', 'location', 'date')}}
+            old_rows = {}
+        else:
+            old_rows = known[1]
+
+        for key, row in rows.items():
+            old = old_rows.get(key)
+            if old is None:
+                yield {'kind': 'result', 'change': 'added', 'meeting_id': meeting_id, 'key': key, 'old': None, 'new': row}
+            elif old != row:
+                yield {'kind': 'result', 'change': 'changed', 'meeting_id': meeting_id, 'key': key, 'old': old, 'new': row}
+        for key, old in old_rows.items():
+            if key not in rows:
+                yield {'kind': 'result', 'change': 'removed', 'meeting_id': meeting_id, 'key': key, 'old': old, 'new': None}
+
+        self.state.save_meeting(meeting_id, date if date is not None else results['date'], digest, rows)
+
+    def sync_rankings(self, year, gender, age_group, event, region=None):
+        '''
+        Fetches a ranking list and yields what changed since it was last synced: athletes who
+        entered or left the list, moved rank, or changed performance at the same rank.
+
+                Parameters:
+                        - 'year' (int): Year of event rankings
+                        - 'gender' (str): Gender for event rankings
+                        - 'age_group' (str): Age group of event rankings
+                        - 'event' (str): Event for rankings
+                        - 'region' (str): Region for event rankings
+
+                Returns:
+                        - generator of changes
+        '''
+        url = _rankings_url(year, gender, age_group, event, region)
+        # Keyed by the normalised query, so e.g. '400m' and '400' share one snapshot
+        query = '|'.join(str(v) for v in (normalise_year(year), normalise_gender(gender), normalise_age_group(age_group),
+                                          normalise_event(event), None if region is None else normalise_region(region)))
+        ranks = parse_ranking_list(get_client(self.client).get(url).content)
+        digest = content_hash(ranks)
+        known = self.state.ranking(query)
+        if known is not None and known[0] == digest:
+            return
+
+        rows = _ranking_rows(ranks)
+        old_rows = known[1] if known is not None else {}
+        for key, row in rows.items():
+            old = old_rows.get(key)
+            if old is None:
+                yield {'kind': 'ranking', 'change': 'added', 'query': query, 'key': key, 'old': None, 'new': row}
+            elif old['rank'] != row['rank']:
+                yield {'kind': 'ranking', 'change': 'moved', 'query': query, 'key': key, 'old': old, 'new': row}
+            elif old != row:
+                yield {'kind': 'ranking', 'change': 'changed', 'query': query, 'key': key, 'old': old, 'new': row}
+        for key, old in old_rows.items():
+            if key not in rows:
+                yield {'kind': 'ranking', 'change': 'removed', 'query': query, 'key': key, 'old': old, 'new': None}
+
+        self.state.save_ranking(query, digest, rows)
+
+    def close(self):
+        self.state.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
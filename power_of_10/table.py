@@ -0,0 +1,149 @@
+from datetime import datetime
+import numpy as np
+from .marks import parse_mark, parse_marks
+
+
+__all__ = ['DATE_FORMATS', 'parse_performance', 'parse_date', 'Table']
+
+
+DATE_FORMATS = ['%d %b %y', '%d %b %Y', '%d %B %Y', '%d %B %y', '%a %d %b %Y', '%d/%m/%Y', '%Y-%m-%d']
+
+
+def parse_performance(perf):
+    '''
+    Returns a performance as a float of seconds (for times) or metres/points (for distances and scores).
+
+            Parameters:
+                    - 'perf' (str): Performance as shown on Power of 10, e.g. '10.23', '1:52.34', '2:05:12', '7.46w'
+
+            Returns:
+                    - 'value' (float): Performance in seconds, metres or points, or nan if there is no mark (e.g. 'DNF')
+    '''
+    return parse_mark(perf).value
+
+
+def parse_date(date):
+    '''
+    Returns a Power of 10 date as a numpy datetime64.
+
+            Parameters:
+                    - 'date' (str): Date as shown on Power of 10, e.g. '8 Feb 16' or '12 June 2016'
+
+            Returns:
+                    - 'date' (numpy.datetime64): Date with day precision, or NaT if it cannot be read
+    '''
+    date = (date or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return np.datetime64(datetime.strptime(date, fmt).date(), 'D')
+        except ValueError:
+            continue
+    return np.datetime64('NaT', 'D')
+
+
+def _parse_int(value):
+    digits = ''.join(c for c in str(value or '') if c.isdigit())
+    return int(digits) if digits else -1
+
+
+_CONVERTERS = {
+    'int': (_parse_int, np.int64),
+    'date': (parse_date, 'datetime64[D]'),
+}
+
+
+def _column(values, kind):
+    if kind == 'str':
+        return np.array(['' if v is None else str(v) for v in values], dtype=str)
+    if kind == 'float':
+        return parse_marks(values)['value']
+    convert, dtype = _CONVERTERS[kind]
+    # Pages repeat the same strings (dates, ids) many times, so each distinct value is converted once
+    uniques, inverse = np.unique(np.array(['' if v is None else str(v) for v in values], dtype=str), return_inverse=True)
+    converted = np.array([convert(u) for u in uniques], dtype=dtype)
+    return converted[inverse.reshape(-1)] if len(values) else np.array([], dtype=dtype)
+
+
+class Table:
+    '''
+    Table of typed, numpy array backed columns.
+
+    Columns are read with table['column'], rows with table[i] (as a dict), and any boolean
+    mask, index array or slice returns a new Table, so sorting, filtering and aggregating
+    work on whole columns at once:
+
+        fast = table[table['performance'] < 48]
+        fast.sort('date')['name']
+
+            Parameters:
+                    - 'columns' (dict): Column name to numpy array, all of equal length
+    '''
+
+    def __init__(self, columns):
+        self._columns = dict(columns)
+        lengths = {len(c) for c in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError('All columns must have the same length.')
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_records(cls, records, schema):
+        '''
+        Returns a table built from a list of dicts.
+
+                Parameters:
+                        - 'records' (arr): List of dicts as returned by the lookup functions
+                        - 'schema' (dict): Column name to type, one of 'str', 'int', 'float' or 'date'.
+                          'float' columns are read as performances, 'int' columns keep their digits
+                          and use -1 for missing values.
+
+                Returns:
+                        - 'table' (Table): Typed table with one column per schema entry
+        '''
+        return cls({name: _column([r.get(name) for r in records], kind) for name, kind in schema.items()})
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def __len__(self):
+        return self._length
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self[i]
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._columns[key]
+        if isinstance(key, (int, np.integer)):
+            return {name: column[key].item() for name, column in self._columns.items()}
+        return Table({name: column[key] for name, column in self._columns.items()})
+
+    def __repr__(self):
+        return f'<Table {self._length} rows: {", ".join(self._columns)}>'
+
+    def sort(self, by, descending=False):
+        '''
+        Returns a new table sorted by one or more columns.
+
+                Parameters:
+                        - 'by' (str or arr): Column name, or list of names with the most significant first
+                        - 'descending' (bool): Sort largest first
+
+                Returns:
+                        - 'table' (Table): Sorted table
+        '''
+        keys = [by] if isinstance(by, str) else list(by)
+        order = np.lexsort([self._columns[k] for k in reversed(keys)])
+        return self[order[::-1] if descending else order]
+
+    def head(self, n=5):
+        return self[:n]
+
+    def to_records(self):
+        '''Returns the table as a list of dicts'''
+        return list(self)
@@ -35,5 +35,14 @@ setuptools.setup(
     ],
     packages=['power_of_10'],
     python_requires=">=3.6",
-    install_requires=install_reqs
+    install_requires=install_reqs,
+    entry_points={
+        'console_scripts': ['powerof10=power_of_10.cli:main'],
+    },
+    extras_require={
+        'async': ['aiohttp>=3.7'],
+        'fast': ['lxml>=4.6'],
+        'parquet': ['pyarrow>=5.0'],
+        'zstd': ['zstandard>=0.15'],
+    }
 )
\ No newline at end of file
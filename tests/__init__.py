@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+import requests
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'fixtures')
+
+
+def fixture(name):
+    '''Returns the body of a saved page in benchmarks/fixtures, as bytes'''
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+class FixtureSession(requests.Session):
+    '''
+    Session answering requests with saved pages instead of fetching them from the site. The url
+    of every request is kept in 'urls'.
+
+            Parameters:
+                    - 'pages' (str or dict or function): Name of the fixture served for every url, a dict of url
+                      fragment to the fixture served for urls containing it, or a function of the url returning
+                      a fixture name or the body as bytes
+                    - 'delay' (float): Seconds each request takes
+    '''
+
+    def __init__(self, pages=None, delay=0):
+        super().__init__()
+        self.pages = pages
+        self.delay = delay
+        self.urls = []
+        self._bodies = {}
+        self._lock = threading.Lock()
+
+    def body(self, url):
+        '''Returns the body served for a url'''
+        if callable(self.pages):
+            name = self.pages(url)
+        elif isinstance(self.pages, dict):
+            name = [name for fragment, name in self.pages.items() if fragment in url][0]
+        else:
+            name = self.pages
+        if isinstance(name, bytes):
+            return name
+        if name not in self._bodies:
+            self._bodies[name] = fixture(name)
+        return self._bodies[name]
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.urls.append(url)
+        if self.delay:
+            time.sleep(self.delay)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = self.body(url)
+        response.encoding = 'utf-8'
+        return response
@@ -0,0 +1,97 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from power_of_10 import archive, bulk, cache, client, rankings
+from tests import FixtureSession
+
+
+class Archive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'archive')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_write_and_read(self):
+        with archive.ArchiveWriter(self.path) as writer:
+            writer.write('https://www.thepowerof10.info/athletes/profile.aspx?athleteid=1', b'<html>old</html>', fetched_at=100)
+            writer.write('https://www.thepowerof10.info/athletes/profile.aspx?athleteid=1', b'<html>new</html>', fetched_at=200)
+            writer.write('https://www.thepowerof10.info/athletes/profile.aspx?athleteid=2', b'<html>two</html>', fetched_at=150)
+
+        with archive.ArchiveReader(self.path) as reader:
+            self.assertEqual(len(reader), 3)
+            self.assertEqual(reader.get('https://WWW.thepowerof10.info/athletes/profile.aspx?athleteid=1'), b'<html>new</html>')
+            self.assertEqual(reader.get('https://www.thepowerof10.info/athletes/profile.aspx?athleteid=1', at=150), b'<html>old</html>')
+            self.assertIsNone(reader.get('https://www.thepowerof10.info/athletes/profile.aspx?athleteid=3'))
+            self.assertEqual([body for _, _, body in reader], [b'<html>old</html>', b'<html>new</html>', b'<html>two</html>'])
+
+        with open(os.path.join(self.path, 'pages-00000.gz'), 'rb') as f:
+            self.assertIn(b'<html>two</html>', gzip.decompress(f.read()))
+
+    def test_segments_and_rebuild(self):
+        with archive.ArchiveWriter(self.path, segment_size=200) as writer:
+            for i in range(5):
+                writer.write(f'https://www.thepowerof10.info/results/results.aspx?meetingid={i}', os.urandom(150))
+        segments = sorted(n for n in os.listdir(self.path) if n.startswith('pages-'))
+        self.assertEqual(len(segments), 5)
+
+        with archive.ArchiveReader(self.path) as reader:
+            before = list(reader)
+        os.remove(os.path.join(self.path, archive.INDEX))
+        self.assertEqual(archive.rebuild_index(self.path), 5)
+        with archive.ArchiveReader(self.path) as reader:
+            self.assertEqual(list(reader), before)
+
+        with archive.ArchiveWriter(self.path, segment_size=200) as writer:
+            writer.write('https://www.thepowerof10.info/results/results.aspx?meetingid=9', b'more')
+        with archive.ArchiveReader(self.path) as reader:
+            self.assertEqual(len(reader), 6)
+
+    def test_rebuild_large_and_cut_short(self):
+        bodies = [os.urandom(200 * 1024) for _ in range(3)] + [b'<html>small</html>'] * 20
+        with archive.ArchiveWriter(self.path) as writer:
+            for i, body in enumerate(bodies):
+                writer.write(f'https://www.thepowerof10.info/results/results.aspx?meetingid={i}', body)
+        os.remove(os.path.join(self.path, archive.INDEX))
+        self.assertEqual(archive.rebuild_index(self.path), len(bodies))
+        with archive.ArchiveReader(self.path) as reader:
+            self.assertEqual([body for _, _, body in reader], bodies)
+
+        segment = os.path.join(self.path, 'pages-00000.gz')
+        with open(segment, 'r+b') as f:
+            f.truncate(os.path.getsize(segment) - 5)
+        self.assertEqual(archive.rebuild_index(self.path), len(bodies) - 1)
+
+    def test_rebuild_zstd_without_zstandard(self):
+        os.makedirs(self.path)
+        with open(os.path.join(self.path, 'pages-00000.zst'), 'wb') as f:
+            f.write(b'not read')
+        with mock.patch.object(archive, 'zstandard', None):
+            self.assertRaises(ImportError, archive.rebuild_index, self.path)
+
+    def test_client_archive_and_replay(self):
+        session = FixtureSession('rankings_400_u20.html')
+        c = client.PowerOf10Client(session=session, archive=self.path)
+        ranks = rankings.get_rankings(2016, 'M', 'U20', '400', client=c)
+        c.archive.close()
+
+        with archive.ArchiveReader(self.path) as reader:
+            self.assertEqual(reader.get(session.urls[0]), session.body(session.urls[0]))
+            records = list(reader.replay())
+        self.assertEqual(records[0]['page_type'], 'ranking_list')
+        self.assertEqual(records[0]['data'], ranks)
+
+        pages = list(bulk.iter_pages(self.path))
+        self.assertEqual(pages, [(cache.normalise_url(session.urls[0]), session.body(session.urls[0]))])
+
+    def test_bad_compression(self):
+        with self.assertRaises(ValueError):
+            archive.ArchiveWriter(self.path, compression='bz2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import time
+import unittest
+from power_of_10 import async_client, rankings
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+
+RANKING_PAGE = '''<html><body><span id="cphBody_lblCachedRankingList"><table>
+<tr><td colspan="13">400 U20 Men</td></tr>
+<tr><td>Rank</td><td>Perf</td><td></td><td></td><td>PB</td><td></td><td>Name</td><td></td><td>Year</td><td>Coach</td><td>Club</td><td>Venue</td><td>Date</td></tr>
+<tr><td>1</td><td>47.10</td><td></td><td></td><td>46.90</td><td></td><td><a href="/athletes/profile.aspx?athleteid=123">A Runner</a></td><td>U20</td><td>2</td><td>B Coach</td><td>Sutton</td><td><a href="/results/results.aspx?meetingid=456&amp;event=400">Lee Valley</a></td><td>12 Jun 16</td></tr>
+</table></span></body></html>'''
+
+
+@unittest.skipIf(web is None, 'aiohttp is not installed')
+class AsyncClient(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.hits = 0
+
+        async def handler(request):
+            self.hits += 1
+            return web.Response(text=RANKING_PAGE, content_type='text/html')
+
+        app = web.Application()
+        app.router.add_get('/rankings/rankinglist.aspx', handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base = 'http://127.0.0.1:%d' % site._server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    async def test_output_matches_sync_parser(self):
+        async with async_client.AsyncPowerOf10Client(rate=None) as c:
+            text, _, redirected = await c.get(self.base + '/rankings/rankinglist.aspx?event=400')
+        self.assertFalse(redirected)
+        self.assertEqual(rankings.parse_ranking_list(text), rankings.parse_ranking_list(RANKING_PAGE))
+        self.assertEqual(rankings.parse_ranking_list(text)[0]['athlete_id'], '123')
+
+    async def test_get_rankings_marks(self):
+        async with async_client.AsyncPowerOf10Client(rate=None, transport=self.base) as c:
+            ranks = await c.get_rankings(2016, 'M', 'U20', 'shot put', marks=True)
+        self.assertEqual(ranks[0]['performance_mark'].value, 47.10)
+        self.assertEqual(ranks[0]['performance_mark'].unit, 'm')
+
+    async def test_rate_limit_spaces_requests(self):
+        async with async_client.AsyncPowerOf10Client(rate=20) as c:
+            start = time.monotonic()
+            for _ in range(5):
+                await c.get(self.base + '/rankings/rankinglist.aspx?event=400')
+            elapsed = time.monotonic() - start
+        self.assertEqual(self.hits, 5)
+        self.assertGreaterEqual(elapsed, 4 / 20 - 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import threading
+import time
+import unittest
+from power_of_10 import batch, exceptions
+
+
+class FetchMany(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def lookup(self, i, client=None):
+        with self.lock:
+            self.calls.append(i)
+        time.sleep(0.05)
+        if i == 111111:
+            raise exceptions.QueryError('Profile not found. Please input a valid athlete id')
+        return {'athlete_id': i}
+
+    def test_dedupes_and_keeps_going(self):
+        res = dict(batch.fetch_many(self.lookup, [1, 2, 111111, 2, 3, 1], workers=4))
+        self.assertEqual(sorted(self.calls), [1, 2, 3, 111111])
+        self.assertEqual(res[3], {'athlete_id': 3})
+        self.assertIsInstance(res[111111], exceptions.QueryError)
+
+    def test_runs_in_parallel(self):
+        start = time.monotonic()
+        res = list(batch.fetch_many(self.lookup, range(16), workers=8))
+        self.assertEqual(len(res), 16)
+        self.assertLess(time.monotonic() - start, 16 * 0.05 / 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import contextlib
+import importlib.util
+import io
+import os
+import unittest
+from power_of_10 import dom
+
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks')
+
+
+def load_bench():
+    spec = importlib.util.spec_from_file_location('bench_parsers', os.path.join(BENCHMARKS, 'bench_parsers.py'))
+    bench = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(bench)
+    return bench
+
+
+class Baseline(unittest.TestCase):
+    @unittest.skipIf('lxml' not in dom.PARSERS, 'baseline was recorded with lxml')
+    def test_memory_within_baseline(self):
+        bench = load_bench()
+        previous = dom.get_parser().name
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                status = bench.main(['--parser', 'lxml', '--min-time', '0.01', '--memory-only',
+                                     '--baseline', os.path.join(BENCHMARKS, 'baseline.json')])
+        finally:
+            dom.set_parser(previous)
+        self.assertEqual(status, 0, output.getvalue())
+
+    def test_compare(self):
+        bench = load_bench()
+        baseline = {'case': {'pages_per_sec': 100.0, 'peak_memory': 1000}}
+        self.assertEqual(bench.compare({'case': {'pages_per_sec': 90.0, 'peak_memory': 1100}}, baseline, 0.25), [])
+        self.assertEqual(len(bench.compare({'case': {'pages_per_sec': 50.0, 'peak_memory': 2000}}, baseline, 0.25)), 2)
+        self.assertEqual(len(bench.compare({'case': {'pages_per_sec': 50.0, 'peak_memory': 1000}}, baseline, 0.25, memory_only=True)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import io
+import json
+import os
+import pathlib
+import shutil
+import tarfile
+import tempfile
+import unittest
+import power_of_10
+from power_of_10 import bulk, rankings, results
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'fixtures')
+
+
+class DetectPageType(unittest.TestCase):
+    def test_fixtures(self):
+        expected = {
+            'athletes_search.html': 'athlete_search',
+            'coaches_search.html': 'coach_search',
+            'profile_small.html': 'athlete_profile',
+            'rankings_400_u20.html': 'ranking_list',
+            'meeting_search.html': 'meeting_search',
+            'meeting_results_small.html': 'meeting_results',
+        }
+        for name, page_type in expected.items():
+            with open(os.path.join(FIXTURES, name), 'rb') as f:
+                self.assertEqual(bulk.detect_page_type(f.read()), page_type, name)
+
+    def test_unrecognised(self):
+        self.assertIsNone(bulk.detect_page_type('<html><body>Hello</body></html>'))
+
+
+class ParseArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.pages = os.path.join(self.tmp, 'pages')
+        os.makedirs(os.path.join(self.pages, 'rankings'))
+        shutil.copy(os.path.join(FIXTURES, 'rankings_400_u20.html'), os.path.join(self.pages, 'rankings'))
+        shutil.copy(os.path.join(FIXTURES, 'meeting_results_small.html'), self.pages)
+        with open(os.path.join(self.pages, 'other.html'), 'w') as f:
+            f.write('<html></html>')
+        with open(os.path.join(self.pages, 'notes.txt'), 'w') as f:
+            f.write('not a page')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def read(self, path):
+        with open(path, encoding='utf-8') as f:
+            return {r['source']: r for r in map(json.loads, f)}
+
+    def check(self, records):
+        self.assertEqual(len(records), 3)
+        ranking = records[os.path.join('rankings', 'rankings_400_u20.html')]
+        self.assertEqual(ranking['page_type'], 'ranking_list')
+        self.assertEqual(ranking['data'], rankings.parse_ranking_list(pathlib.Path(FIXTURES, 'rankings_400_u20.html')))
+        meeting = records['meeting_results_small.html']
+        self.assertEqual(meeting['data'], results.parse_meeting_results(pathlib.Path(FIXTURES, 'meeting_results_small.html')))
+        self.assertEqual(records['other.html']['error'], 'Unrecognised page')
+
+    def test_directory(self):
+        output = os.path.join(self.tmp, 'out.jsonl')
+        counts = bulk.parse_archive(self.pages, output, workers=2, chunksize=1)
+        self.assertEqual(counts['pages'], 3)
+        self.assertEqual(counts['errors'], 1)
+        self.assertEqual(counts['ranking_list'], 1)
+        self.check(self.read(output))
+
+    def test_tarball(self):
+        archive = os.path.join(self.tmp, 'pages.tar.gz')
+        with tarfile.open(archive, 'w:gz') as tar:
+            tar.add(self.pages, arcname='.')
+        output = os.path.join(self.tmp, 'out.jsonl')
+        bulk.main([archive, output, '--workers', '1'])
+        records = {os.path.normpath(k): v for k, v in self.read(output).items()}
+        self.check(records)
+
+    def test_sink_object(self):
+        buffer = io.StringIO()
+        bulk.parse_archive(os.path.join(self.pages, 'meeting_results_small.html'), buffer, workers=1)
+        record = json.loads(buffer.getvalue())
+        self.assertEqual(record['page_type'], 'meeting_results')
+
+
+class Exports(unittest.TestCase):
+    def test_main_is_not_exported(self):
+        self.assertIs(power_of_10.parse_archive, bulk.parse_archive)
+        self.assertIn('main', bulk.__all__)
+        self.assertFalse(hasattr(power_of_10, 'main'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import requests
+from power_of_10 import cache, client
+
+
+class ETagSession(requests.Session):
+    def __init__(self, body=b'<html>page</html>'):
+        super().__init__()
+        self.body = body
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(dict(headers or {}))
+        response = requests.Response()
+        response.url = url
+        response.encoding = 'utf-8'
+        response.headers['ETag'] = '"v1"'
+        if (headers or {}).get('If-None-Match') == '"v1"':
+            response.status_code = 304
+            response._content = b''
+        else:
+            response.status_code = 200
+            response._content = self.body
+        return response
+
+
+class NormaliseUrl(unittest.TestCase):
+    def test_query_order_and_blanks(self):
+        a = cache.normalise_url('https://www.thepowerof10.info/athletes/athleteslookup.aspx?surname=smith&firstname=john&')
+        b = cache.normalise_url('HTTPS://WWW.thepowerof10.info/athletes/athleteslookup.aspx?firstname=john&club=&surname=smith')
+        self.assertEqual(a, b)
+
+
+class DefaultTTL(unittest.TestCase):
+    def test_past_year_rankings_live_longer(self):
+        old = cache.default_ttl('https://www.thepowerof10.info/rankings/rankinglist.aspx?event=400&year=2014')
+        new = cache.default_ttl('https://www.thepowerof10.info/rankings/rankinglist.aspx?event=400&year=9999')
+        self.assertGreater(old, new)
+
+
+class CachedClient(unittest.TestCase):
+    url = 'https://www.thepowerof10.info/results/results.aspx?meetingid=105700'
+
+    def test_fresh_entry_served_without_request(self):
+        session = ETagSession()
+        c = client.PowerOf10Client(session=session, cache=cache.ResponseCache(':memory:'))
+        self.assertEqual(c.get(self.url).text, '<html>page</html>')
+        self.assertEqual(c.get(self.url).text, '<html>page</html>')
+        self.assertEqual(len(session.requests), 1)
+        stats = c.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_stale_entry_revalidated(self):
+        session = ETagSession()
+        c = client.PowerOf10Client(session=session, cache=cache.ResponseCache(':memory:', ttl={'results.aspx': -1}))
+        c.get(self.url)
+        self.assertEqual(c.get(self.url).text, '<html>page</html>')
+        self.assertEqual(session.requests[1].get('If-None-Match'), '"v1"')
+        self.assertEqual(c.cache.stats()['revalidated'], 1)
+
+    def test_lru_eviction(self):
+        session = ETagSession(body=b'x' * 100)
+        c = client.PowerOf10Client(session=session, cache=cache.ResponseCache(':memory:', max_size=250))
+        for i in range(3):
+            c.get(f'https://www.thepowerof10.info/athletes/profile.aspx?athleteid={i}')
+        stats = c.cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertIsNone(c.cache.lookup('https://www.thepowerof10.info/athletes/profile.aspx?athleteid=0'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from power_of_10 import catalogue, exceptions, rankings, results
+
+
+class Normalise(unittest.TestCase):
+    def test_aliases_and_case(self):
+        self.assertEqual(catalogue.normalise_gender('Women'), 'W')
+        self.assertEqual(catalogue.normalise_age_group('u20'), 'U20')
+        self.assertEqual(catalogue.normalise_region('Northern  Ireland'), 'north ireland')
+        self.assertEqual(catalogue.normalise_meeting_type('uk calendar'), 'UK Calendar')
+        self.assertEqual(catalogue.normalise_terrain('Cross Country'), 'xc')
+
+    def test_events(self):
+        expected = {400: '400', '400m': '400', 'sp7.26k': 'SP7.26K', 'mar': 'Mar', 'Half Marathon': 'HM', '10m': '10M',
+                    'hepi': 'HepI', '3000sc': '3000SC', '110H': '110H', 'mile': 'Mile', '20KW': '20KW',
+                    '400M': '400', '4x100': '4x100', '4X400': '4x400', '4 x 400m': '4x400'}
+        for event, code in expected.items():
+            self.assertEqual(catalogue.normalise_event(event), code, event)
+
+    def test_invalid(self):
+        for check, value in [(catalogue.normalise_event, '123'), (catalogue.normalise_gender, 'S'), (catalogue.normalise_age_group, 'U99'),
+                             (catalogue.normalise_region, 'japan'), (catalogue.normalise_year, 'gsgs')]:
+            with self.assertRaises(exceptions.InvalidQueryError):
+                check(value)
+        with self.assertRaises(KeyError):
+            catalogue.normalise_terrain('sdfsd')
+        with self.assertRaises(exceptions.QueryError):
+            catalogue.normalise_meeting_type('fsfsdfs')
+
+
+class Urls(unittest.TestCase):
+    def test_rankings_url(self):
+        self.assertEqual(rankings._rankings_url(2016, 'men', 'u20', '400m', 'London'),
+                         'https://www.thepowerof10.info/rankings/rankinglist.aspx?event=400&agegroup=U20&sex=M&year=2016&areaid=67')
+        self.assertIs(rankings._rankings_url(2016, 'M', 'U20', '400', None), rankings._rankings_url(2016, 'M', 'U20', '400', None))
+        with self.assertRaises(exceptions.QueryError):
+            rankings._rankings_url(2016, 'M', 'U20', None, None)
+
+    def test_search_event_url(self):
+        url = results._search_event_url('400', None, 'Lee Valley', '01/06/2024', None, '02/06/2024', 'BMC', 'Track')
+        self.assertEqual(url, 'https://www.thepowerof10.info/results/resultslookup.aspx?event=400&venue=Lee+Valley'
+                              '&datefrom=01%2F06%2F2024&dateto=02%2F06%2F2024&bmc=y&terraintypecodes=T')
+
+    def test_fails_before_request(self):
+        class NoRequests:
+            def stored(self, *args):
+                raise AssertionError('a request was made')
+
+        with self.assertRaises(exceptions.InvalidQueryError):
+            rankings.get_rankings(2016, 'M', 'U20', '123', client=NoRequests())
+        with self.assertRaises(exceptions.InvalidQueryError):
+            results.search_event(year=2014, terrain='moon', client=NoRequests())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import requests
+from power_of_10 import cli, client, sinks
+from tests import FixtureSession
+
+
+class ProfileSession(FixtureSession):
+    '''Serves meeting results and the coach profile, dropping the connection for the ids given in fail'''
+
+    def __init__(self, fail=()):
+        super().__init__({'meetingid=': 'meeting_results_small.html', '': 'profile_coach.html'})
+        self.fail = fail
+
+    def get(self, url, **kwargs):
+        if any(f'id={i}' in url for i in self.fail):
+            self.urls.append(url)
+            raise requests.ConnectionError('connection dropped')
+        return super().get(url, **kwargs)
+
+
+class ParseIds(unittest.TestCase):
+    def test_values(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write('7\n# a comment\n\n8-9  # a range\n')
+        try:
+            ids = cli.parse_ids(['1', '3-5', '@' + f.name, '-', 'Smith-Jones'], stdin=io.StringIO('10\n11-12\n'))
+            self.assertEqual(list(ids), ['1', '3', '4', '5', '7', '8', '9', '10', '11', '12', 'Smith-Jones'])
+        finally:
+            os.remove(f.name)
+
+
+class CsvSink(unittest.TestCase):
+    def test_append(self):
+        tmp = tempfile.mkdtemp()
+        path = os.path.join(tmp, 'rows.csv')
+        try:
+            with sinks.open_sink(path) as sink:
+                sink.write({'a': 1, 'b': [1, 2]})
+            with sinks.open_sink(path, append=True) as sink:
+                sink.write({'b': 'x', 'a': 2, 'c': 3})
+            with open(path, newline='', encoding='utf-8') as f:
+                self.assertEqual(list(csv.reader(f)), [['a', 'b'], ['1', '[1, 2]'], ['2', 'x']])
+        finally:
+            shutil.rmtree(tmp)
+
+
+class ParquetSink(unittest.TestCase):
+    @unittest.skipIf(sinks.pyarrow is None, 'needs pyarrow')
+    def test_column_empty_in_first_row_group(self):
+        tmp = tempfile.mkdtemp()
+        path = os.path.join(tmp, 'rows.parquet')
+        try:
+            with sinks.ParquetSink(path, batch_size=2) as sink:
+                for i, error in enumerate([None, None, 'Unrecognised page']):
+                    sink.write({'page': i, 'error': error})
+            table = sinks.pyarrow.parquet.read_table(path)
+            self.assertEqual(table.column('error').to_pylist(), [None, None, 'Unrecognised page'])
+            self.assertEqual(table.column('page').to_pylist(), [0, 1, 2])
+        finally:
+            shutil.rmtree(tmp)
+
+
+class CachePath(unittest.TestCase):
+    def test_file_or_directory(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            self.assertEqual(cli._cache_path(os.path.join(tmp, 'pages.sqlite')), os.path.join(tmp, 'pages.sqlite'))
+            self.assertEqual(cli._cache_path(tmp), os.path.join(tmp, 'cache.sqlite'))
+            path = cli._cache_path(os.path.join(tmp, 'new') + os.sep)
+            self.assertEqual(path, os.path.join(tmp, 'new', 'cache.sqlite'))
+            client.PowerOf10Client(cache=path).cache.close()
+            self.assertTrue(os.path.exists(path))
+        finally:
+            shutil.rmtree(tmp)
+
+
+class Export(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.tmp, 'export.checkpoint')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def run_cli(self, argv, session):
+        return cli.main(argv + ['--quiet', '--checkpoint', self.checkpoint], client=client.PowerOf10Client(session=session))
+
+    def test_results_resume(self):
+        output = os.path.join(self.tmp, 'results.csv')
+        self.assertEqual(self.run_cli(['results', '1-4', '-o', output], ProfileSession(fail=['3'])), 0)
+        with open(self.checkpoint) as f:
+            self.assertEqual(sorted(f.read().split()), ['1', '2', '4'])
+
+        session = ProfileSession()
+        self.assertEqual(self.run_cli(['results', '1-4', '-o', output], session), 0)
+        self.assertEqual(session.urls, ['https://www.thepowerof10.info/results/results.aspx?meetingid=3'])
+        with open(output, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 4 * 63)
+        self.assertEqual(sorted({r['meeting_id'] for r in rows}), ['1', '2', '3', '4'])
+        self.assertTrue(all(r['event'] and r['name'] for r in rows))
+
+    def test_coaches(self):
+        output = os.path.join(self.tmp, 'coaching.jsonl')
+        self.assertEqual(self.run_cli(['coaches', '5', '-o', output], ProfileSession()), 0)
+        with open(output, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 60)
+        self.assertTrue(all(r['coach_id'] == '5' for r in rows))
+
+    def test_parquet_resume(self):
+        with open(self.checkpoint, 'w') as f:
+            f.write('1\n')
+        with self.assertRaises(ValueError):
+            self.run_cli(['athletes', '1-2', '-o', os.path.join(self.tmp, 'athletes.parquet')], ProfileSession())
+
+    def test_all_failed(self):
+        self.assertEqual(self.run_cli(['athletes', '1', '-o', os.path.join(self.tmp, 'a.jsonl')], ProfileSession(fail=['1'])), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
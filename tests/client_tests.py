@@ -0,0 +1,50 @@
+import unittest
+import requests
+from power_of_10 import client, rankings
+
+
+class RecordingSession(requests.Session):
+    def __init__(self, text=''):
+        super().__init__()
+        self.text = text
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = self.text.encode('utf-8')
+        response.encoding = 'utf-8'
+        return response
+
+
+class PooledClient(unittest.TestCase):
+    def test_adapter_pool_and_retries(self):
+        c = client.PowerOf10Client(pool_size=25, retries=4)
+        adapter = c.session.get_adapter(client.BASE_URL)
+        self.assertEqual(adapter._pool_maxsize, 25)
+        self.assertEqual(adapter.max_retries.total, 4)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+
+    def test_module_function_uses_given_client(self):
+        session = RecordingSession('<html></html>')
+        c = client.PowerOf10Client(session=session)
+        ranks = rankings.get_rankings(year=2016, gender='M', age_group='U20', event='400', region='london', client=c)
+        self.assertEqual(ranks, [])
+        self.assertEqual(len(session.urls), 1)
+        self.assertIn('rankinglist.aspx', session.urls[0])
+
+    def test_default_client(self):
+        session = RecordingSession('<html></html>')
+        previous = client.get_default_client()
+        client.set_default_client(client.PowerOf10Client(session=session))
+        try:
+            rankings.get_rankings(year=2016, gender='M', age_group='U20', event='400', region='london')
+            self.assertEqual(len(session.urls), 1)
+        finally:
+            client.set_default_client(previous)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import threading
+import time
+import unittest
+from power_of_10 import athletes, client, coalesce, rankings
+from tests import FixtureSession
+
+
+def run_threads(func, n=8):
+    results = [None] * n
+    barrier = threading.Barrier(n)
+
+    def run(i):
+        barrier.wait()
+        results[i] = func()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class SingleFlight(unittest.TestCase):
+    def test_shares_one_call(self):
+        flights = coalesce.SingleFlight()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'value': 1}
+
+        results = run_threads(lambda: flights.do('key', fetch))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual(flights.shared, 7)
+        self.assertEqual(flights.in_flight(), 0)
+
+    def test_shares_errors(self):
+        flights = coalesce.SingleFlight()
+
+        def fetch():
+            time.sleep(0.1)
+            raise ValueError('failed')
+
+        def call():
+            try:
+                flights.do('key', fetch)
+            except ValueError as e:
+                return e
+
+        results = run_threads(call, 4)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(flights.do('key', lambda: 2), 2)
+
+
+class MemoCache(unittest.TestCase):
+    def test_lru(self):
+        memo = coalesce.MemoCache(max_size=2, ttl=None)
+        memo.put('a', 1)
+        memo.put('b', 2)
+        memo.get('a')
+        memo.put('c', 3)
+        self.assertEqual(memo.get('a'), 1)
+        self.assertIsNone(memo.get('b'))
+        self.assertEqual((memo.hits, memo.misses), (2, 1))
+
+    def test_ttl(self):
+        memo = coalesce.MemoCache(ttl=0.05)
+        memo.put('a', 1)
+        self.assertEqual(memo.get('a'), 1)
+        time.sleep(0.06)
+        self.assertIsNone(memo.get('a'))
+        self.assertEqual(len(memo), 0)
+
+
+class ClientCoalescing(unittest.TestCase):
+    def test_get_athlete(self):
+        session = FixtureSession('profile_coach.html', delay=0.1)
+        c = client.PowerOf10Client(session=session)
+        results = run_threads(lambda: athletes.get_athlete(1, client=c, sections=['coaching']))
+        self.assertEqual(len(session.urls), 1)
+        self.assertEqual(len(results[0]['coaching']), 60)
+
+        athletes.get_athlete(1, client=c, sections=['coaching'])
+        self.assertEqual(len(session.urls), 2)
+
+    def test_get_rankings(self):
+        session = FixtureSession('rankings_400_u20.html', delay=0.1)
+        c = client.PowerOf10Client(session=session)
+        queries = [(2016, 'M', 'U20', '400'), (2016, 'M', 'U20', '400', 'london')] * 4
+        barrier = threading.Barrier(len(queries))
+
+        def run(query):
+            barrier.wait()
+            rankings.get_rankings(*query, client=c)
+
+        threads = [threading.Thread(target=run, args=(q,)) for q in queries]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(session.urls), 2)
+
+    def test_memo(self):
+        session = FixtureSession('rankings_400_u20.html')
+        c = client.PowerOf10Client(session=session, memo_size=8)
+        first = rankings.get_rankings(2016, 'M', 'U20', '400', client=c)
+        with_marks = rankings.get_rankings(2016, 'M', 'U20', '400', client=c, marks=True)
+        self.assertEqual(len(session.urls), 1)
+        self.assertIn('performance_mark', with_marks[0])
+        self.assertNotIn('performance_mark', first[0])
+
+    def test_disabled(self):
+        session = FixtureSession('rankings_400_u20.html', delay=0.1)
+        c = client.PowerOf10Client(session=session, coalesce=False)
+        run_threads(lambda: rankings.get_rankings(2016, 'M', 'U20', '400', client=c), 4)
+        self.assertEqual(len(session.urls), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import requests
+from power_of_10 import client, crawler, ratelimit
+
+
+RANKING_PAGE = '''<html><body><span id="cphBody_lblCachedRankingList"><table>
+<tr><td colspan="13">{event} U20 Men</td></tr>
+<tr><td>Rank</td><td>Perf</td><td></td><td></td><td>PB</td><td></td><td>Name</td><td></td><td>Year</td><td>Coach</td><td>Club</td><td>Venue</td><td>Date</td></tr>
+<tr><td>1</td><td>1:47.10</td><td></td><td></td><td>1:46.90</td><td></td><td><a href="/athletes/profile.aspx?athleteid=123">A Runner</a></td><td>U20</td><td>2</td><td>B Coach</td><td>Sutton</td><td><a href="/results/results.aspx?meetingid=456">Lee Valley</a></td><td>12 Jun 16</td></tr>
+<tr><td>2</td><td>1:48.00</td><td></td><td></td><td>1:48.00</td><td></td><td><a href="/athletes/profile.aspx?athleteid=124">B Runner</a></td><td>U20</td><td>1</td><td></td><td>Sutton</td><td><a href="/results/results.aspx?meetingid=457">Eton</a></td><td>1 Jul 16</td></tr>
+</table></span></body></html>'''
+
+
+class RankingSession(requests.Session):
+    def __init__(self, fail=None):
+        super().__init__()
+        self.fail = fail
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        if self.fail and self.fail in url:
+            raise requests.ConnectionError('connection dropped')
+        event = url.split('event=')[1].split('&')[0]
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = RANKING_PAGE.format(event=event).encode('utf-8')
+        response.encoding = 'utf-8'
+        return response
+
+
+class Crawler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmp, 'rankings.jsonl')
+        self.checkpoint = os.path.join(self.tmp, 'crawl.checkpoint')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def crawler(self, session):
+        return crawler.RankingCrawler([2015, 2016], ['800', '1500'], ['U20'], ['M'], regions=[None, 'london'], workers=2,
+                                      rate=None, checkpoint=self.checkpoint, client=client.PowerOf10Client(session=session))
+
+    def rows(self):
+        with open(self.output, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_slices(self):
+        slices = crawler.ranking_slices([2016], ['800', '1500'], ['U20'], ['M', 'W'], ['london'])
+        self.assertEqual(len(slices), 4)
+        self.assertIn((2016, 'W', 'U20', '1500', 'london'), slices)
+
+    def test_typed_rows(self):
+        session = RankingSession()
+        counts = self.crawler(session).run(self.output)
+        self.assertEqual(counts, {'slices': 8, 'rows': 16, 'errors': 0, 'skipped': 0})
+        self.assertTrue(all('limit=0' in url for url in session.urls))
+        self.assertEqual(sum('areaid=' in url for url in session.urls), 4)
+        row = [r for r in self.rows() if r['season'] == 2016 and r['event'] == '800' and r['region'] is None][0]
+        self.assertEqual(row['rank'], 1)
+        self.assertEqual(row['performance_value'], 107.1)
+        self.assertEqual(row['date'], '2016-06-12')
+
+    def test_resume(self):
+        counts = self.crawler(RankingSession(fail='event=1500&agegroup=U20&sex=M&year=2016')).run(self.output)
+        self.assertEqual(counts['errors'], 2)
+        self.assertEqual(counts['slices'], 6)
+
+        session = RankingSession()
+        counts = self.crawler(session).run(self.output)
+        self.assertEqual(counts, {'slices': 2, 'rows': 4, 'errors': 0, 'skipped': 6})
+        self.assertEqual(len(session.urls), 2)
+        self.assertEqual(len(self.rows()), 16)
+
+
+class Limiter(unittest.TestCase):
+    def test_rate(self):
+        limiter = ratelimit.RateLimiter(50)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50 - 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
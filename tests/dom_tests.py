@@ -0,0 +1,36 @@
+import unittest
+from power_of_10 import dom, rankings
+
+
+PAGE = '''<html><body><span id="cphBody_lblMeetingDetails"><b>BMC Grand Prix &amp; Miles</b><br />Lee Valley<br />12 Jun 16</span>
+<table id="t" class="alternatingrowspanel x"><tr><td><a class="profilelink" href="/athletes/profile.aspx?athleteid=522041&amp;x=1">Show</a></td></tr></table>
+</body></html>'''
+
+
+class Parsers(unittest.TestCase):
+    def parsers(self):
+        yield dom.SoupParser()
+        if dom.lxml is not None:
+            yield dom.LxmlParser()
+
+    def test_backends_agree(self):
+        for parser in self.parsers():
+            root = parser.parse(PAGE)
+            span = parser.find(root, 'span', id='cphBody_lblMeetingDetails')
+            self.assertEqual(parser.inner_html(span), '<b>BMC Grand Prix &amp; Miles</b><br/>Lee Valley<br/>12 Jun 16')
+            table = parser.find(root, 'table', **{'class': 'alternatingrowspanel'})
+            self.assertEqual(parser.link_param(parser.find_all(table, 'td')[0], 'athleteid'), '522041')
+            self.assertEqual(parser.text(table), 'Show')
+
+    def test_set_parser(self):
+        previous = dom.get_parser().name
+        try:
+            dom.set_parser('html.parser')
+            self.assertIsInstance(dom.get_parser(), dom.SoupParser)
+            self.assertEqual(rankings.parse_ranking_list('<html></html>'), [])
+        finally:
+            dom.set_parser(previous)
+
+
+if __name__ == '__main__':
+    unittest.main()
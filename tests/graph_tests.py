@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from power_of_10 import client, graph
+from tests import FixtureSession
+
+
+def profile_page(url):
+    '''Serves the coach profile for athlete 1, a missing page for athlete 404 and the veteran profile otherwise'''
+    if 'meetingid=' in url:
+        return 'meeting_results_small.html'
+    if url.endswith('athleteid=1'):
+        return 'profile_coach.html'
+    if url.endswith('athleteid=404'):
+        return b'<html><body></body></html>'
+    return 'profile_veteran.html'
+
+
+class BuildGraph(unittest.TestCase):
+    def setUp(self):
+        self.session = FixtureSession(profile_page)
+        self.client = client.PowerOf10Client(session=self.session)
+
+    def test_coaching(self):
+        g = graph.build_graph([1], depth=1, relations=('coaching', 'club'), client=self.client)
+        coached = g.neighbours('athlete', 1, edge='coaches')
+        self.assertEqual(len(coached), 60)
+        self.assertIn(('athlete', '254541'), coached)
+        self.assertIn(('club', 'Newham & Essex Beagles'), g.neighbours('athlete', 1))
+        self.assertEqual(g.node(g._index[('athlete', '254541')])['name'], 'Adam Qureshi')
+        self.assertEqual(len(self.session.urls), 61)
+
+    def test_depth_and_budget(self):
+        g = graph.build_graph([1], depth=0, relations=('coaching',), client=self.client)
+        self.assertEqual(len(self.session.urls), 1)
+        self.assertEqual(len(g.nodes('athlete')), 61)
+
+        self.session.urls = []
+        graph.build_graph([1], depth=3, relations=('coaching',), max_athletes=10, client=self.client)
+        self.assertEqual(len(self.session.urls), 10)
+
+    def test_meetings(self):
+        g = graph.build_graph([1], depth=1, follow=('meetings',), relations=('meetings',), max_athletes=1, max_meetings=20,
+                              client=self.client)
+        meetings = g.neighbours('athlete', 1, edge='competed_at')
+        self.assertEqual(len(meetings), 278)
+        self.assertEqual(len([u for u in self.session.urls if 'meetingid=' in u]), 20)
+
+        self.session.urls = []
+        graph.build_graph([1], depth=3, follow=('meetings',), relations=('meetings',), max_athletes=5, max_meetings=30, client=self.client)
+        self.assertEqual(len([u for u in self.session.urls if 'meetingid=' in u]), 30)
+        self.assertEqual(len([u for u in self.session.urls if 'athleteid=' in u]), 5)
+
+    def test_clubs_fetched_once(self):
+        # Every athlete found in the club search is in the same club again
+        self.session.pages = lambda url: 'athletes_search.html' if 'athleteslookup.aspx' in url else 'profile_coach.html'
+        graph.build_graph([1], depth=3, follow=('club',), relations=('club',), client=self.client)
+        searches = [u for u in self.session.urls if 'athleteslookup.aspx' in u]
+        self.assertTrue(searches)
+        self.assertEqual(len(searches), len(set(searches)))
+
+        self.session.urls = []
+        graph.build_graph([1], depth=3, follow=('club',), relations=('club',), max_clubs=0, client=self.client)
+        self.assertEqual(len(self.session.urls), 1)
+
+    def test_errors(self):
+        g = graph.build_graph([1, 404], depth=0, relations=('coaching',), client=self.client)
+        self.assertIn(('athlete', '404'), g.errors)
+        self.assertNotIn(('athlete', '404'), g)
+
+    def test_export(self):
+        g = graph.Graph()
+        a = g.add_node('athlete', 1, 'A Coach')
+        b = g.add_node('athlete', 2)
+        c = g.add_node('club', 'Sutton')
+        g.add_edge('coaches', a, b)
+        g.add_edge('coaches', a, b)
+        g.add_edge('member_of', b, c)
+
+        edges = g.edges()
+        self.assertEqual(edges['source'].dtype, np.int64)
+        self.assertEqual(edges['source'].tolist(), [0, 1])
+        self.assertEqual(edges['kind'].tolist(), [0, 1])
+        self.assertEqual(g.to_dict()['edges'], [[0, 1, 'coaches'], [1, 2, 'member_of']])
+        self.assertEqual(g.to_dict()['nodes'][0], {'id': 0, 'kind': 'athlete', 'key': '1', 'name': 'A Coach'})
+
+        g.add_edge('coaches', b, a)
+        g.add_edge('member_of', b, c)
+        self.assertEqual(len(g.edges()['source']), 3)
+        self.assertEqual(g.to_dict()['edges'][2], [1, 0, 'coaches'])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'graph.npz')
+            g.save(path)
+            saved = np.load(path)
+            self.assertEqual(saved['node_keys'].tolist(), ['1', '2', 'Sutton'])
+            self.assertEqual(saved['target'].tolist(), [1, 2, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
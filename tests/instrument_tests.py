@@ -0,0 +1,95 @@
+import threading
+import unittest
+import requests
+from power_of_10 import athletes, client, instrument, rankings, results, store
+from tests import FixtureSession, fixture
+
+
+class DroppedSession(requests.Session):
+    def get(self, url, **kwargs):
+        raise requests.ConnectionError('connection dropped')
+
+
+class Events(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+
+    def test_get_rankings(self):
+        c = client.PowerOf10Client(session=FixtureSession('rankings_400_u20.html', delay=0.02), hooks=[self.events.append])
+        ranks = rankings.get_rankings(2016, 'M', 'U20', '400', client=c)
+        event, = self.events
+        self.assertEqual(event['kind'], 'rankings')
+        self.assertEqual(event['source'], 'network')
+        self.assertEqual(event['rows'], len(ranks))
+        self.assertEqual(event['bytes'], len(fixture('rankings_400_u20.html')))
+        self.assertEqual(event['status'], 200)
+        self.assertGreaterEqual(event['latency'], 0.02)
+        self.assertGreater(event['parse'], 0)
+        self.assertGreater(event['extract'], 0)
+        self.assertAlmostEqual(event['total'], event['latency'] + event['parse'] + event['extract'])
+        self.assertIsNone(event['cache'])
+        self.assertIsNone(event['error'])
+
+    def test_get_results_rows(self):
+        c = client.PowerOf10Client(session=FixtureSession('meeting_results_small.html'), hooks=[self.events.append])
+        meeting = results.get_results(1, client=c)
+        self.assertEqual(self.events[0]['rows'], sum(len(race['results']) for race in meeting['results']))
+
+    def test_sources(self):
+        c = client.PowerOf10Client(session=FixtureSession('profile_coach.html'), hooks=[self.events.append],
+                                   store=store.LocalStore(':memory:'))
+        athletes.get_athlete(1, client=c)
+        athletes.get_athlete(1, client=c)
+        self.assertEqual([e['source'] for e in self.events], ['network', 'store'])
+
+        c = client.PowerOf10Client(session=FixtureSession('profile_coach.html', delay=0.1), hooks=[self.events.append])
+        self.events.clear()
+        threads = [threading.Thread(target=athletes.get_athlete, args=(1,), kwargs={'client': c}) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(e['source'] for e in self.events), ['coalesced', 'coalesced', 'network'])
+
+    def test_page_and_error(self):
+        c = client.PowerOf10Client(session=FixtureSession('profile_coach.html'), hooks=[self.events.append])
+        list(athletes.iter_performances(1, client=c))
+        self.assertEqual(self.events[0]['kind'], 'page')
+        self.assertEqual(self.events[0]['source'], 'network')
+
+        self.events.clear()
+        with self.assertRaises(requests.ConnectionError):
+            rankings.get_rankings(2016, 'M', 'U20', '400', client=client.PowerOf10Client(
+                session=DroppedSession(), hooks=[self.events.append]))
+        self.assertEqual(self.events[0]['error'], 'ConnectionError')
+        self.assertIsNone(self.events[0]['source'])
+
+
+class Metrics(unittest.TestCase):
+    def test_snapshot_and_prometheus(self):
+        c = client.PowerOf10Client(session=FixtureSession('rankings_400_u20.html'), metrics=True, memo_size=4)
+        rankings.get_rankings(2016, 'M', 'U20', '400', client=c)
+        rankings.get_rankings(2016, 'M', 'U20', '400', client=c)
+
+        snapshot = c.metrics.snapshot()
+        calls = {s['labels']['source']: s['value'] for s in snapshot['counters']['calls']}
+        self.assertEqual(calls, {'network': 1, 'memo': 1})
+        self.assertEqual(snapshot['histograms']['total']['rankings']['count'], 2)
+        self.assertEqual(snapshot['histograms']['latency']['rankings']['count'], 1)
+        self.assertEqual(snapshot['histograms']['parse']['rankings']['buckets'][float('inf')], 1)
+
+        text = c.metrics.to_prometheus()
+        self.assertIn('# TYPE powerof10_total_seconds histogram', text)
+        self.assertIn('powerof10_calls_total{kind="rankings",source="memo"} 1', text)
+        self.assertIn('powerof10_total_seconds_count{kind="rankings"} 2', text)
+        self.assertIn('powerof10_response_bytes_bucket{kind="rankings",le="+Inf"} 1', text)
+
+    def test_histogram(self):
+        h = instrument.Histogram((1, 5))
+        for v in (0.5, 1, 3, 10):
+            h.observe(v)
+        self.assertEqual(h.snapshot(), {'count': 4, 'sum': 14.5, 'buckets': {1: 2, 5: 3, float('inf'): 4}})
+
+
+if __name__ == '__main__':
+    unittest.main()
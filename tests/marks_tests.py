@@ -0,0 +1,79 @@
+import math
+import unittest
+import numpy as np
+from power_of_10 import client, marks, rankings
+from tests import FixtureSession
+
+
+class ParseMark(unittest.TestCase):
+    def test_times(self):
+        self.assertEqual(marks.parse_mark('14:32.45').value, 872.45)
+        self.assertEqual(marks.parse_mark('14:32.45').unit, 's')
+        self.assertEqual(marks.parse_mark('2:03:11', 'Mar').value, 7391)
+        self.assertEqual(marks.parse_mark('10.23', '100').value, 10.23)
+
+    def test_flags(self):
+        mark = marks.parse_mark('10.8w', '100')
+        self.assertTrue(mark.wind_assisted)
+        self.assertTrue(mark.hand_timed)
+        self.assertFalse(mark.legal)
+        mark = marks.parse_mark('7.12i', 'LJ')
+        self.assertEqual((mark.value, mark.unit), (7.12, 'm'))
+        self.assertTrue(mark.indoor)
+        self.assertFalse(mark.hand_timed)
+        self.assertTrue(mark.legal)
+
+    def test_points(self):
+        self.assertEqual(marks.parse_mark('5,432'), marks.Mark(5432.0, 'pts', False, False, False, None, '5,432'))
+        self.assertEqual(marks.parse_mark('6543', 'Dec').unit, 'pts')
+
+    def test_no_mark(self):
+        for status in ['DNF', 'DNS', 'DQ', 'NM']:
+            mark = marks.parse_mark(status, '400')
+            self.assertEqual(mark.status, status)
+            self.assertTrue(math.isnan(mark.value))
+            self.assertFalse(mark.legal)
+        self.assertIsNone(marks.parse_mark('').status)
+
+    def test_event_unit(self):
+        self.assertEqual(marks.event_unit('SP7.26K'), 'm')
+        self.assertEqual(marks.event_unit('HepI'), 'pts')
+        self.assertEqual(marks.event_unit('HM'), 's')
+        self.assertIsNone(marks.event_unit(None))
+
+
+class ParseMarks(unittest.TestCase):
+    def test_matches_single(self):
+        values = ['10.8w', '7.12i', 'DNF', '10.8w', '1:52.34', '5,432']
+        columns = marks.parse_marks(values, '100')
+        for i, value in enumerate(values):
+            mark = marks.parse_mark(value, '100')
+            np.testing.assert_equal(columns['value'][i], mark.value)
+            self.assertEqual(columns['wind_assisted'][i], mark.wind_assisted)
+            self.assertEqual(columns['indoor'][i], mark.indoor)
+            self.assertEqual(columns['hand_timed'][i], mark.hand_timed)
+            self.assertEqual(columns['status'][i], mark.status or '')
+
+    def test_event_per_mark(self):
+        columns = marks.parse_marks(['7.12', '7.12'], ['LJ', '60'])
+        self.assertEqual(list(columns['unit']), ['m', 's'])
+
+    def test_empty(self):
+        self.assertEqual(len(marks.parse_marks([])['value']), 0)
+
+    def test_add_marks(self):
+        records = marks.add_marks([{'event': 'LJ', 'value': '7.12w'}], ['value'])
+        self.assertEqual(records[0]['value_mark'].unit, 'm')
+        self.assertTrue(records[0]['value_mark'].wind_assisted)
+
+
+class LookupMarks(unittest.TestCase):
+    def test_get_rankings(self):
+        c = client.PowerOf10Client(session=FixtureSession('rankings_400_full.html'))
+        ranks = rankings.get_rankings(2016, 'M', 'U20', '400', region='london', client=c, marks=True)
+        self.assertEqual(ranks[0]['performance_mark'], marks.parse_mark(ranks[0]['performance'], '400'))
+        self.assertEqual(ranks[0]['pb_mark'].unit, 's')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import datetime
+import itertools
+import os
+import pathlib
+import unittest
+from power_of_10 import athletes, coaches, dom, rankings, results, exceptions
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'fixtures')
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+class ParseFixtures(unittest.TestCase):
+    def parse_all(self, func, name):
+        outputs = []
+        for parser in ['html.parser', 'lxml'] if dom.lxml is not None else ['html.parser']:
+            previous = dom.get_parser().name
+            dom.set_parser(parser)
+            try:
+                outputs.append(func(fixture(name)))
+            finally:
+                dom.set_parser(previous)
+        for output in outputs[1:]:
+            self.assertEqual(output, outputs[0])
+        return outputs[0]
+
+    def test_athlete_search(self):
+        aths = self.parse_all(athletes.parse_athlete_search, 'athletes_search.html')
+        self.assertEqual(len(aths), 120)
+        self.assertTrue(aths[0]['athlete_id'].isdigit())
+
+    def test_broad_athlete_search(self):
+        with self.assertRaises(exceptions.BroadQueryError):
+            athletes.parse_athlete_search(fixture('athletes_search_broad.html'))
+
+    def test_coach_search(self):
+        self.assertEqual(len(self.parse_all(coaches.parse_coach_search, 'coaches_search.html')), 225)
+
+    def test_profile(self):
+        ath = self.parse_all(athletes.parse_athlete_profile, 'profile_small.html')
+        self.assertEqual(ath['nation'], 'England')
+        self.assertEqual(len(ath['pb']), 6)
+        self.assertEqual(len(ath['rankings']), 14)
+        self.assertEqual(len(ath['performances']), 48)
+
+    def test_coach_profile(self):
+        ath = self.parse_all(athletes.parse_athlete_profile, 'profile_coach.html')
+        self.assertEqual(len(ath['coaching']), 60)
+        self.assertNotIn('lead coach', ath)
+
+    def test_rankings(self):
+        ranks = self.parse_all(rankings.parse_ranking_list, 'rankings_400_u20.html')
+        self.assertEqual(len(ranks), 64)
+        self.assertEqual(ranks[0]['rank'], '1')
+        self.assertTrue(ranks[0]['meeting_id'].isdigit())
+
+    def test_meeting_search(self):
+        self.assertEqual(len(self.parse_all(results.parse_meeting_search, 'meeting_search.html')), 59)
+
+    def test_meeting_results(self):
+        res = self.parse_all(results.parse_meeting_results, 'meeting_results_small.html')
+        self.assertEqual(len(res['results']), 7)
+        self.assertEqual(res['location'], 'Manchester (SportCity)')
+
+
+class ParseSources(unittest.TestCase):
+    def test_text_bytes_and_path_agree(self):
+        path = pathlib.Path(FIXTURES, 'rankings_400_full.html')
+        with open(path, 'rb') as f:
+            raw = f.read()
+        from_text = rankings.parse_ranking_list(raw.decode('utf-8'))
+        self.assertEqual(rankings.parse_ranking_list(raw), from_text)
+        self.assertEqual(rankings.parse_ranking_list(path), from_text)
+
+    def test_text_is_never_a_path(self):
+        self.assertEqual(rankings.parse_ranking_list('Service unavailable'), [])
+        self.assertEqual(rankings.parse_ranking_list(os.path.join(FIXTURES, 'rankings_400_full.html')), [])
+
+    def test_memory_mapped_file(self):
+        path = pathlib.Path(FIXTURES, 'profile_veteran.html')
+        previous = dom.MMAP_THRESHOLD
+        dom.MMAP_THRESHOLD = 1
+        try:
+            mapped = athletes.parse_athlete_profile(path)
+        finally:
+            dom.MMAP_THRESHOLD = previous
+        self.assertEqual(mapped, athletes.parse_athlete_profile(fixture('profile_veteran.html')))
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class LazyProfile(unittest.TestCase):
+    def test_matches_eager(self):
+        eager = athletes.parse_athlete_profile(fixture('profile_veteran.html'))
+        lazy = athletes.parse_athlete_profile(fixture('profile_veteran.html'), lazy=True)
+        self.assertIsInstance(lazy, athletes.AthleteProfile)
+        self.assertEqual(lazy, eager)
+        self.assertEqual(lazy.to_dict(), eager)
+
+    def test_sections_parsed_on_access(self):
+        profile = athletes.AthleteProfile(fixture('profile_coach.html'))
+        self.assertEqual(profile._parsed, {})
+        club = profile['club']
+        pb = profile['pb']
+        self.assertEqual(list(profile._parsed), ['pb'])
+        self.assertIs(profile['pb'], pb)
+        self.assertEqual(club, athletes.parse_athlete_profile(fixture('profile_coach.html'))['club'])
+
+    def test_sections(self):
+        eager = athletes.parse_athlete_profile(fixture('profile_small.html'))
+        pbs = athletes.parse_athlete_profile(fixture('profile_small.html'), sections=['pb'])
+        self.assertEqual(pbs['pb'], eager['pb'])
+        self.assertNotIn('performances', pbs)
+        self.assertEqual(pbs['club'], eager['club'])
+        with self.assertRaises(exceptions.QueryError):
+            athletes.parse_athlete_profile(fixture('profile_small.html'), sections=['pbs'])
+
+
+class IterPerformances(unittest.TestCase):
+    def setUp(self):
+        self.performances = athletes.parse_athlete_profile(fixture('profile_veteran.html'))['performances']
+
+    def test_all(self):
+        self.assertEqual(list(athletes.parse_performances(fixture('profile_veteran.html'))), self.performances)
+
+    def test_since_stops_at_earlier_year(self):
+        latest = [p for p in itertools.takewhile(lambda p: p['date'].endswith(' 24'), self.performances)]
+        since = list(athletes.parse_performances(fixture('profile_veteran.html'), since=datetime.date(2024, 1, 1)))
+        self.assertEqual(since, latest)
+        self.assertLess(len(since), len(self.performances))
+
+    def test_event(self):
+        since = athletes.parse_performances(fixture('profile_veteran.html'), since='2023-01-01', event='400', marks=True)
+        for performance in since:
+            self.assertEqual(performance['event'], '400')
+            self.assertEqual(performance['value_mark'].unit, 's')
@@ -0,0 +1,117 @@
+import datetime
+import os
+import tempfile
+import threading
+import unittest
+from urllib.parse import parse_qs, urlsplit
+import requests
+from power_of_10 import client, exceptions, planner
+
+
+ATHLETES = [('John', 'Smith'), ('Jane', 'Smith'), ('Anna', 'Smith'), ('Paul', 'Smith'), ('Zoe', 'Smith'), ('Tom', 'Smithson'),
+            ('Amy', 'Smyth'), ('Ian', 'Smart'), ('Ed', 'Small'), ('Di', 'Smalley'), ('Jo', 'Smee'), ('Sam', 'Stone'),
+            ('Ann', 'Jones'), ('Pat', "O'Brien"), ('Christine', 'Ohuruogu'), ('Jess', 'Ennis'), ('Mo', 'Farah'),
+            ('Bo', 'De Souza'), ('Cy', 'De Grasse'), ('Al', 'Dean'), ('Ty', 'Dee'), ('Li', 'Deng'), ('Ro', 'Denny'),
+            ('Éva', 'Érdi'), ('Ugo', 'Ürün')]
+MEETINGS = {i: datetime.date(2014, 1, 1) + datetime.timedelta(days=2 * i) for i in range(1, 150)}
+MAX_ROWS = 5
+
+BROAD = '<html><body><div id="cphBody_pnlResults"><table><tr><td><span id="cphBody_lblResultsErrorMessage" class="errormessage">Too many {0} found. Please narrow your search.</span></td></tr></table></div></body></html>'
+ATHLETE = '<tr><td>{0}</td><td>{1}</td><td>SEN</td><td>SEN</td><td>SEN</td><td>W</td><td>Club</td><td><a href="/athletes/profile.aspx?athleteid={2}">Show</a></td></tr>'
+MEETING = '<tr><td>{0:%d %b %y}</td><td>Meeting {1}</td><td><a href="results.aspx?meetingid={1}">Eton</a></td><td>T</td></tr>'
+
+
+class SiteSession(requests.Session):
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self.lock:
+            self.urls.append(url)
+        query = {k: v[0] for k, v in parse_qs(urlsplit(url).query).items()}
+        if 'athleteslookup' in url:
+            found = [(i, f, s) for i, (f, s) in enumerate(ATHLETES)
+                     if s.lower().startswith(query.get('surname', '').lower()) and f.lower().startswith(query.get('firstname', '').lower())]
+            if len(found) > MAX_ROWS:
+                html = BROAD.format('athletes')
+            else:
+                rows = ''.join(ATHLETE.format(f, s, i) for i, f, s in found)
+                html = f'<html><body><div id="cphBody_pnlResults"><table><tr><td>First</td></tr>{rows}<tr><td></td></tr></table></div></body></html>'
+        else:
+            start = datetime.datetime.strptime(query['datefrom'], '%d-%b-%Y').date()
+            end = datetime.datetime.strptime(query['dateto'], '%d-%b-%Y').date()
+            found = [(d, i) for i, d in MEETINGS.items() if start <= d <= end]
+            if len(found) > MAX_ROWS:
+                html = BROAD.format('meetings')
+            elif not found:
+                html = '<html><body></body></html>'
+            else:
+                rows = ''.join(MEETING.format(d, i) for d, i in found)
+                html = f'<html><body><table id="cphBody_dgMeetings"><tr><td>Date</td></tr>{rows}</table></body></html>'
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = html.encode('utf-8')
+        response.encoding = 'utf-8'
+        return response
+
+
+class Planner(unittest.TestCase):
+    def setUp(self):
+        self.session = SiteSession()
+        self.client = client.PowerOf10Client(session=self.session)
+
+    def test_search_event_by_date(self):
+        plan = planner.QueryPlanner(client=self.client)
+        meetings = plan.search_event(date_from='1-Jan-2014', date_to='30-Jun-2014')
+        expected = sorted(i for i, d in MEETINGS.items() if d <= datetime.date(2014, 6, 30))
+        self.assertEqual([int(m['meeting_id']) for m in meetings], expected)
+        self.assertLessEqual(plan.granularity['search_event:date_from,date_to']['days'], 2 * MAX_ROWS)
+
+        probes = len(self.session.urls)
+        self.session.urls = []
+        self.assertEqual(plan.search_event(date_from='1-Jul-2014', date_to='30-Sep-2014')[0]['meeting_id'], '91')
+        self.assertFalse(any('datefrom=1-Jul-2014&dateto=30-Sep-2014' in u for u in self.session.urls))
+        self.assertLess(len(self.session.urls), probes)
+
+    def test_search_event_year(self):
+        meetings = planner.QueryPlanner(client=self.client).search_event(year=2014)
+        self.assertEqual(len(meetings), len(MEETINGS))
+
+    def test_search_athletes(self):
+        with self.assertRaises(exceptions.BroadQueryError):
+            client.PowerOf10Client(session=SiteSession()).search_athletes(club='Club')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'planner.json')
+            found = planner.QueryPlanner(client=self.client, path=path).search_athletes(club='Club')
+            self.assertEqual(sorted((a['firstname'], a['surname']) for a in found), sorted(ATHLETES))
+            self.assertEqual(len({a['athlete_id'] for a in found}), len(ATHLETES))
+
+            self.session.urls = []
+            planner.QueryPlanner(client=self.client, path=path).search_athletes(club='Other')
+            self.assertTrue(self.session.urls)
+            self.assertFalse(any(u.endswith('athleteslookup.aspx?club=Other') for u in self.session.urls))
+
+    def test_search_athletes_by_surname(self):
+        found = planner.QueryPlanner(client=self.client).search_athletes(surname='Smith')
+        self.assertEqual(sorted(a['firstname'] for a in found), ['Anna', 'Jane', 'John', 'Paul', 'Tom', 'Zoe'])
+
+    def test_max_queries(self):
+        with self.assertRaises(exceptions.BroadQueryError):
+            planner.QueryPlanner(client=self.client, max_queries=20).search_athletes(club='Club')
+
+    def test_invalid_query(self):
+        with self.assertRaises(exceptions.InvalidQueryError):
+            planner.QueryPlanner(client=self.client).search_event(event='not an event', year=2014)
+        self.assertEqual(self.session.urls, [])
+
+    def test_unsplittable(self):
+        with self.assertRaises(exceptions.BroadQueryError):
+            planner.QueryPlanner(client=self.client, min_days=30).search_event(date_from='1-Jan-2014', date_to='30-Jan-2014', terrain='track')
+
+
+if __name__ == '__main__':
+    unittest.main()
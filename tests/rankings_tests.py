@@ -19,24 +19,24 @@ class GetRankings(unittest.TestCase):
         self.assertEqual(ranks, [])
 
     def test_invalid_year(self):
-        ranks = rankings.get_rankings(year='gsgs', gender='M', age_group='U20', event='400')
-        self.assertEqual(ranks, [])
+        with self.assertRaises(exceptions.InvalidQueryError):
+            rankings.get_rankings(year='gsgs', gender='M', age_group='U20', event='400')
 
     def test_invalid_region(self):
         with self.assertRaises(exceptions.QueryError):
             rankings.get_rankings(year=2016, region='japan', gender='M', age_group='U20', event='400')
 
     def test_invalid_gender(self):
-        ranks = rankings.get_rankings(year=2016, gender='S', age_group='U20', event='400')
-        self.assertEqual(ranks, [])
+        with self.assertRaises(exceptions.InvalidQueryError):
+            rankings.get_rankings(year=2016, gender='S', age_group='U20', event='400')
 
     def test_invalid_age_group(self):
-        ranks = rankings.get_rankings(year=2016, gender='M', age_group='U99', event='400')
-        self.assertEqual(ranks, [])
+        with self.assertRaises(exceptions.InvalidQueryError):
+            rankings.get_rankings(year=2016, gender='M', age_group='U99', event='400')
 
     def test_invalid_event(self):
-        ranks = rankings.get_rankings(year=2016, gender='M', age_group='U20', event='123')
-        self.assertEqual(ranks, [])
+        with self.assertRaises(exceptions.InvalidQueryError):
+            rankings.get_rankings(year=2016, gender='M', age_group='U20', event='123')
 
     def test_empty_search(self):
         with self.assertRaises(TypeError):
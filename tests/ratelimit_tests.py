@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import requests
+from power_of_10 import client, ratelimit, replay
+from tests import FIXTURES
+
+
+def _acquire_many(path, n):
+    limiter = ratelimit.RateLimiter(50, path=path)
+    for _ in range(n):
+        limiter.acquire()
+
+
+class StatusSession(requests.Session):
+    def __init__(self, status):
+        super().__init__()
+        self.status = status
+
+    def get(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = self.status
+        response.url = url
+        response._content = b'<html></html>'
+        return response
+
+
+class Limiter(unittest.TestCase):
+    def test_stats(self):
+        limiter = ratelimit.RateLimiter(100)
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = limiter.stats()
+        self.assertEqual(stats['acquired'], 5)
+        self.assertEqual(stats['waiting'], 0)
+        self.assertGreater(stats['waited'], 0)
+
+    def test_rate_must_be_positive(self):
+        for rate in (0, -1):
+            with self.assertRaises(ValueError):
+                ratelimit.RateLimiter(rate)
+        with self.assertRaises(ValueError):
+            client.PowerOf10Client(rate_limit=0)
+
+    def test_shared_without_fcntl(self):
+        with mock.patch.object(ratelimit, 'fcntl', None), self.assertRaises(OSError):
+            ratelimit.RateLimiter(10, path='limit')
+
+    @unittest.skipIf(ratelimit.fcntl is None, 'needs fcntl')
+    def test_shared_between_processes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'limit')
+            start = time.monotonic()
+            processes = [multiprocessing.Process(target=_acquire_many, args=(path, 10)) for _ in range(2)]
+            for p in processes:
+                p.start()
+            for p in processes:
+                p.join()
+            self.assertGreaterEqual(time.monotonic() - start, 19 / 50 - 0.02)
+
+
+class Adaptive(unittest.TestCase):
+    def test_backs_off_and_recovers(self):
+        limiter = ratelimit.AdaptiveRateLimiter(8, increase=1)
+        limiter.record(0.1, error=True)
+        self.assertEqual(limiter.rate, 4)
+        for _ in range(3):
+            limiter.record(0.1, error=True)
+        self.assertEqual(limiter.rate, 0.8)
+        for _ in range(20):
+            limiter.record(0.1)
+        self.assertEqual(limiter.rate, 8)
+        self.assertEqual(limiter.stats()['errors'], 4)
+
+    def test_latency_spike(self):
+        limiter = ratelimit.AdaptiveRateLimiter(8, increase=0)
+        for _ in range(5):
+            limiter.record(0.5)
+        limiter.record(0.9)
+        self.assertEqual(limiter.rate, 8)
+        limiter.record(2.0)
+        self.assertEqual(limiter.rate, 4)
+        self.assertEqual(limiter.stats()['slow'], 1)
+
+    @unittest.skipIf(ratelimit.fcntl is None, 'needs fcntl')
+    def test_shared_rate(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'limit')
+            a = ratelimit.AdaptiveRateLimiter(8, path=path)
+            b = ratelimit.AdaptiveRateLimiter(8, path=path)
+            a.record(0.1, error=True)
+            b.acquire()
+            self.assertEqual(b.rate, 4)
+
+
+class ClientRateLimit(unittest.TestCase):
+    def test_errors_slow_the_client(self):
+        c = client.PowerOf10Client(session=StatusSession(503), rate_limit=100)
+        self.assertIsInstance(c.rate_limit, ratelimit.AdaptiveRateLimiter)
+        c.get('https://www.thepowerof10.info/athletes/profile.aspx?athleteid=1')
+        self.assertEqual(c.rate_limit.rate, 50)
+        self.assertEqual(c.rate_limit.stats()['acquired'], 1)
+
+    def test_healthy_responses(self):
+        limiter = ratelimit.AdaptiveRateLimiter(100, min_rate=1, max_rate=200, increase=10)
+        c = client.PowerOf10Client(session=StatusSession(200), rate_limit=limiter)
+        for _ in range(3):
+            c.get('https://www.thepowerof10.info/athletes/profile.aspx?athleteid=1')
+        self.assertEqual(limiter.rate, 130)
+
+
+    def test_retries_wait_for_the_limiter(self):
+        limiter = ratelimit.AdaptiveRateLimiter(100, min_rate=1)
+        with replay.ReplayServer(FIXTURES, error_rate=1.0) as server:
+            c = client.PowerOf10Client(transport=server.url, retries=2, backoff_factor=0, rate_limit=limiter)
+            self.assertEqual(c.get('https://www.thepowerof10.info/results/results.aspx?meetingid=1').status_code, 503)
+            self.assertEqual(server.site.stats['errors'], 3)
+        self.assertEqual(limiter.stats()['acquired'], 3)
+        self.assertEqual(limiter.errors, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import tracemalloc
+import unittest
+from power_of_10 import athletes, client, exceptions, marks, rankings, records, results
+from tests import FixtureSession, fixture
+
+
+class RoundTrip(unittest.TestCase):
+    def check(self, rows, record):
+        converted = records.to_records(rows, record)
+        self.assertEqual([r.to_dict() for r in converted], rows)
+        self.assertFalse(hasattr(converted[0], '__dict__'))
+        return converted
+
+    def test_ranking_entries(self):
+        entries = self.check(rankings.parse_ranking_list(fixture('rankings_400_full.html')), records.RankingEntry)
+        clubs = {}
+        for e in entries:
+            self.assertIs(clubs.setdefault(e.club, e.club), e.club)
+        self.assertEqual(entries[0].mark('performance', '400').unit, 's')
+
+    def test_performances(self):
+        performances = self.check(athletes.parse_athlete_profile(fixture('profile_veteran.html'))['performances'], records.Performance)
+        self.assertIsInstance(performances[0].position, tuple)
+        self.assertEqual(performances[0].mark('value'), marks.parse_mark(performances[0].value, performances[0].event))
+
+    def test_meetings_and_results(self):
+        self.check(results.parse_meeting_search(fixture('meeting_search.html')), records.Meeting)
+        self.check(athletes.parse_athlete_search(fixture('athletes_search.html')), records.AthleteSummary)
+        meeting = results.parse_meeting_results(fixture('meeting_results_large.html'))
+        self.check([r for race in meeting['results'] for r in race['results']], records.MeetingResult)
+
+    def test_memory(self):
+        html = fixture('rankings_5000_full.html')
+        tracemalloc.start()
+        rows = [r for _ in range(4) for r in rankings.parse_ranking_list(html)]
+        as_dicts = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        entries = [r for _ in range(4) for r in records.to_records(rankings.parse_ranking_list(html), records.RankingEntry)]
+        as_records = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.assertEqual(len(entries), len(rows))
+        self.assertLess(as_records * 2.5, as_dicts)
+
+
+class Lookups(unittest.TestCase):
+    def test_get_rankings(self):
+        c = client.PowerOf10Client(session=FixtureSession('rankings_400_u20.html'))
+        entries = rankings.get_rankings(2016, 'M', 'U20', '400', client=c, records=True)
+        self.assertIsInstance(entries[0], records.RankingEntry)
+        self.assertEqual([e.to_dict() for e in entries], rankings.get_rankings(2016, 'M', 'U20', '400', client=c))
+        with self.assertRaises(exceptions.QueryError):
+            rankings.get_rankings(2016, 'M', 'U20', '400', client=c, records=True, marks=True)
+
+    def test_get_results(self):
+        c = client.PowerOf10Client(session=FixtureSession('meeting_results_small.html'))
+        meeting = results.get_results(1, client=c, records=True)
+        self.assertIsInstance(meeting['results'][0]['results'][0], records.MeetingResult)
+        self.assertEqual(meeting.to_table()['name'].tolist(), results.get_results(1, client=c).to_table()['name'].tolist())
+
+    def test_get_athlete(self):
+        c = client.PowerOf10Client(session=FixtureSession('profile_coach.html'))
+        athlete = athletes.get_athlete(1, client=c, records=True)
+        self.assertIsInstance(athlete['performances'][0], records.Performance)
+        self.assertIsInstance(athlete['pb'][0], dict)
+        self.assertIsInstance(athletes.get_athlete(1, client=c)['performances'][0], dict)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+import power_of_10
+from power_of_10 import archive, async_client, athletes, client, rankings, replay, results
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'fixtures')
+
+
+class ReplaySite(unittest.TestCase):
+    def setUp(self):
+        self.site = replay.ReplaySite(FIXTURES)
+
+    def test_pages(self):
+        with open(os.path.join(FIXTURES, 'profile_small.html'), 'rb') as f:
+            self.assertEqual(self.site.page('https://www.thepowerof10.info/athletes/profile.aspx?athleteid=522041'), f.read())
+        with open(os.path.join(FIXTURES, 'profile_coach.html'), 'rb') as f:
+            self.assertEqual(self.site.page('https://www.thepowerof10.info/athletes/profile.aspx?athleteid=1'), f.read())
+        self.assertIsNone(self.site.page('https://www.thepowerof10.info/other.aspx'))
+        self.assertEqual(self.site.respond('https://www.thepowerof10.info/other.aspx')[0], 404)
+
+    def test_errors(self):
+        site = replay.ReplaySite(FIXTURES, error_rate=0.5, seed=1)
+        statuses = [site.respond('https://www.thepowerof10.info/results/results.aspx?meetingid=1')[0] for _ in range(200)]
+        self.assertEqual(set(statuses), {200, 503})
+        self.assertTrue(60 < statuses.count(503) < 140)
+        self.assertEqual(site.stats['errors'], statuses.count(503))
+        again = replay.ReplaySite(FIXTURES, error_rate=0.5, seed=1)
+        self.assertEqual([again.respond('https://www.thepowerof10.info/results/results.aspx?meetingid=1')[0] for _ in range(200)], statuses)
+
+    def test_throttling(self):
+        site = replay.ReplaySite(FIXTURES, rate=10, burst=3)
+        statuses = [site.respond('https://www.thepowerof10.info/results/results.aspx?meetingid=1')[0] for _ in range(5)]
+        self.assertEqual(statuses, [200, 200, 200, 429, 429])
+        time.sleep(0.15)
+        self.assertEqual(site.respond('https://www.thepowerof10.info/results/results.aspx?meetingid=1')[0], 200)
+
+    def test_latency(self):
+        site = replay.ReplaySite(FIXTURES, latency=0.05, jitter=0.02)
+        start = time.monotonic()
+        site.respond('https://www.thepowerof10.info/results/results.aspx?meetingid=1')
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+
+    def test_archive(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            with archive.ArchiveWriter(tmp) as writer:
+                writer.write('https://www.thepowerof10.info/results/results.aspx?meetingid=7', b'<html>seven</html>')
+            site = replay.ReplaySite(tmp)
+            self.assertEqual(site.page('https://www.thepowerof10.info/results/results.aspx?meetingid=7'), b'<html>seven</html>')
+            self.assertEqual(site.page('https://www.thepowerof10.info/results/results.aspx?meetingid=8'), b'<html>seven</html>')
+            site.close()
+        finally:
+            shutil.rmtree(tmp)
+
+
+class Transport(unittest.TestCase):
+    def test_adapter(self):
+        site = replay.ReplaySite(FIXTURES)
+        c = client.PowerOf10Client(transport=replay.ReplayAdapter(site))
+        meeting = results.get_results(105701, client=c)
+        self.assertEqual(meeting, results.parse_meeting_results(pathlib.Path(FIXTURES, 'meeting_results_small.html')))
+        self.assertEqual(site.stats['served'], 1)
+
+    def test_error_body_is_not_a_path(self):
+        site = replay.ReplaySite(FIXTURES, error_rate=1.0)
+        c = client.PowerOf10Client(transport=replay.ReplayAdapter(site), retries=0)
+        self.assertEqual(rankings.get_rankings(2016, 'M', 'U20', '400', client=c), [])
+
+    def test_server(self):
+        with replay.ReplayServer(FIXTURES) as server:
+            c = client.PowerOf10Client(transport=server.url)
+            self.assertEqual(c.get('https://www.thepowerof10.info/athletes/profile.aspx?athleteid=1').url,
+                             'https://www.thepowerof10.info/athletes/profile.aspx?athleteid=1')
+            athlete = athletes.get_athlete(522041, client=c)
+            self.assertEqual(athlete, athletes.parse_athlete_profile(pathlib.Path(FIXTURES, 'profile_small.html')))
+            ranks = rankings.get_rankings(2016, 'M', 'U20', '400', client=c)
+            self.assertEqual(ranks, rankings.parse_ranking_list(pathlib.Path(FIXTURES, 'rankings_400_full.html')))
+            self.assertEqual(server.site.stats['served'], 3)
+
+    def test_server_retries(self):
+        with replay.ReplayServer(FIXTURES, error_rate=1.0) as server:
+            c = client.PowerOf10Client(transport=server.url, retries=2, backoff_factor=0)
+            self.assertEqual(c.get('https://www.thepowerof10.info/results/results.aspx?meetingid=1').status_code, 503)
+            self.assertEqual(server.site.stats['errors'], 3)
+
+    def test_stop_without_start(self):
+        server = replay.ReplayServer(FIXTURES)
+        stopping = threading.Thread(target=server.stop, daemon=True)
+        stopping.start()
+        stopping.join(5)
+        self.assertFalse(stopping.is_alive())
+
+    def test_async(self):
+        async def fetch(url):
+            async with async_client.AsyncPowerOf10Client(rate=None, transport=url) as c:
+                return await asyncio.gather(*(c.get_results(i) for i in (1, 2, 3)))
+
+        with replay.ReplayServer(FIXTURES) as server:
+            meetings = asyncio.run(fetch(server.url))
+            self.assertEqual(server.site.stats['served'], 3)
+        self.assertEqual(meetings[0]['title'], meetings[2]['title'])
+
+
+class Exports(unittest.TestCase):
+    def test_package_namespace(self):
+        self.assertIs(power_of_10.ReplayServer, replay.ReplayServer)
+        self.assertIs(power_of_10.DATE_FORMATS, power_of_10.table.DATE_FORMATS)
+        for name in ('main', 'np', 'os', 'json', 'requests', 'sqlite3', 'datetime'):
+            self.assertFalse(hasattr(power_of_10, name), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
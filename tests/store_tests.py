@@ -0,0 +1,83 @@
+import pathlib
+import unittest
+from power_of_10 import athletes, client, rankings, results, store
+from tests import FIXTURES, FixtureSession
+
+
+class ReadThrough(unittest.TestCase):
+    def setUp(self):
+        self.session = FixtureSession({
+            'profile.aspx': 'profile_coach.html',
+            'results.aspx': 'meeting_results_small.html',
+            'rankinglist.aspx': 'rankings_400_u20.html',
+            'athleteslookup.aspx': 'athletes_search.html',
+        })
+        self.client = client.PowerOf10Client(session=self.session, store=store.LocalStore(':memory:'))
+
+    def test_athlete(self):
+        first = athletes.get_athlete(123, client=self.client)
+        second = athletes.get_athlete(123, client=self.client)
+        self.assertEqual(first, second)
+        self.assertEqual(first, athletes.parse_athlete_profile(pathlib.Path(FIXTURES, 'profile_coach.html')))
+        self.assertEqual(len(self.session.urls), 1)
+
+        pbs = athletes.get_athlete(123, client=self.client, sections=['pb'])
+        self.assertEqual(set(pbs) & set(athletes.SECTIONS), {'pb'})
+        self.assertEqual(len(self.session.urls), 1)
+
+    def test_results_and_rankings(self):
+        meeting = results.get_results(456, client=self.client)
+        self.assertIsInstance(results.get_results(456, client=self.client), results.MeetingResults)
+        self.assertEqual(results.get_results(456, client=self.client), meeting)
+        ranks = rankings.get_rankings(2016, 'M', 'U20', '400', region='london', client=self.client)
+        self.assertEqual(rankings.get_rankings(2016, 'M', 'U20', '400', region='london', client=self.client), ranks)
+        self.assertEqual(len(self.session.urls), 2)
+
+    def test_max_age(self):
+        self.client.store.max_age = {'athlete': -1}
+        athletes.get_athlete(123, client=self.client)
+        athletes.get_athlete(123, client=self.client)
+        self.assertEqual(len(self.session.urls), 2)
+
+
+class Queries(unittest.TestCase):
+    def setUp(self):
+        self.store = store.LocalStore(':memory:')
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_performances_and_pbs(self):
+        athlete = athletes.parse_athlete_profile(pathlib.Path(FIXTURES, 'profile_veteran.html'))
+        self.store.ingest('athlete', '42', athlete)
+        self.assertEqual(self.store.athlete(42), athlete)
+        self.assertEqual(len(self.store.pbs(athlete_id=42)), len(athlete['pb']))
+
+        rows = self.store.performances(athlete_id=42, event='400', since='2020-01-01')
+        self.assertTrue(rows)
+        self.assertTrue(all(r['event'] == '400' and r['date'] >= '2020-01-01' for r in rows))
+        self.assertEqual([r['date'] for r in rows], sorted((r['date'] for r in rows), reverse=True))
+        self.assertIsInstance(rows[0]['mark'], float)
+
+    def test_results_by_club_and_meetings_by_venue(self):
+        meeting = results.parse_meeting_results(pathlib.Path(FIXTURES, 'meeting_results_small.html'))
+        self.store.ingest('results', '456', meeting)
+        club = meeting['results'][0]['results'][0]['club']
+        rows = self.store.results(club=club)
+        self.assertEqual(len(rows), sum(r['club'] == club for race in meeting['results'] for r in race['results']))
+        self.assertEqual(self.store.meetings(venue=meeting['location'])[0]['meeting_id'], '456')
+
+    def test_athletes_by_club(self):
+        found = athletes.parse_athlete_search(pathlib.Path(FIXTURES, 'athletes_search.html'))
+        self.store.ingest('athlete_search', 'https://www.thepowerof10.info/athletes/athleteslookup.aspx?surname=smith', found)
+        club = found[0]['club']
+        self.assertEqual({a['athlete_id'] for a in self.store.athletes(club=club)},
+                         {a['athlete_id'] for a in found if a['club'] == club})
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            self.store.ingest('coach', '1', {})
+
+
+if __name__ == '__main__':
+    unittest.main()
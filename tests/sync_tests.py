@@ -0,0 +1,90 @@
+import datetime
+import unittest
+from power_of_10 import client, sync
+from tests import FixtureSession, fixture
+
+
+RANKING_ROW = '<tr><td>{rank}</td><td>{perf}</td><td></td><td></td><td>46.90</td><td></td><td><a href="/athletes/profile.aspx?athleteid={id}">{name}</a></td><td>U20</td><td>2</td><td>B Coach</td><td>Sutton</td><td><a href="/results/results.aspx?meetingid=456">Lee Valley</a></td><td>12 Jun 16</td></tr>'
+RANKING_PAGE = '''<html><body><span id="cphBody_lblCachedRankingList"><table>
+<tr><td colspan="13">400 U20 Men</td></tr>
+<tr><td>Rank</td><td>Perf</td><td></td><td></td><td>PB</td><td></td><td>Name</td><td></td><td>Year</td><td>Coach</td><td>Club</td><td>Venue</td><td>Date</td></tr>
+{rows}
+</table></span></body></html>'''
+
+SEARCH_PAGE = '''<html><body><table class="alternatingrowspanel" id="cphBody_dgMeetings">
+<tr class="tableheader"><td>Date</td><td>Meeting</td><td>Venue</td><td>Type</td></tr>
+<tr><td>{date}</td><td>Open Meeting</td><td><a href="results.aspx?meetingid=1001">Eton</a></td><td>T</td></tr>
+</table></body></html>'''
+
+
+def ranking_page(*athletes):
+    rows = [RANKING_ROW.format(rank=i + 1, perf=perf, id=athlete_id, name=name) for i, (athlete_id, name, perf) in enumerate(athletes)]
+    return RANKING_PAGE.format(rows='\n'.join(rows))
+
+
+class PageSession(FixtureSession):
+    '''Serves the page text in 'pages' whose key is in the url'''
+
+    def __init__(self):
+        super().__init__({})
+
+    def body(self, url):
+        return [text for name, text in self.pages.items() if name in url][0].encode('utf-8')
+
+
+class Sync(unittest.TestCase):
+    def setUp(self):
+        self.session = PageSession()
+        self.syncer = sync.Syncer(':memory:', client=client.PowerOf10Client(session=self.session))
+
+    def tearDown(self):
+        self.syncer.close()
+
+    def test_rankings(self):
+        self.session.pages['rankinglist.aspx'] = ranking_page(('1', 'A Runner', '47.10'), ('2', 'B Runner', '47.50'))
+        changes = list(self.syncer.sync_rankings(2016, 'M', 'U20', '400', 'london'))
+        self.assertEqual([(c['change'], c['key']) for c in changes], [('added', '1'), ('added', '2')])
+
+        self.assertEqual(list(self.syncer.sync_rankings(2016, 'M', 'U20', '400', 'london')), [])
+
+        self.session.pages['rankinglist.aspx'] = ranking_page(('2', 'B Runner', '47.40'), ('3', 'C Runner', '47.60'))
+        changes = {(c['change'], c['key']) for c in self.syncer.sync_rankings(2016, 'M', 'U20', '400', 'london')}
+        self.assertEqual(changes, {('added', '3'), ('moved', '2'), ('removed', '1')})
+
+    def test_equivalent_ranking_queries(self):
+        self.session.pages['rankinglist.aspx'] = ranking_page(('1', 'A Runner', '47.10'))
+        self.assertEqual(len(list(self.syncer.sync_rankings(2016, 'M', 'U20', '400', 'london'))), 1)
+        self.assertEqual(list(self.syncer.sync_rankings('2016', 'm', 'u20', '400m', 'London')), [])
+
+    def test_meetings(self):
+        page = fixture('meeting_results_small.html').decode('utf-8')
+        today = datetime.date.today().strftime('%d %b %Y')
+        self.session.pages['resultslookup.aspx'] = SEARCH_PAGE.format(date=today)
+        self.session.pages['results.aspx'] = page
+
+        changes = list(self.syncer.sync_meetings(year=2016))
+        self.assertEqual(changes[0]['kind'], 'meeting')
+        self.assertEqual(changes[0]['change'], 'added')
+        self.assertTrue(all(c['change'] == 'added' for c in changes))
+        self.assertGreater(len(changes), 1)
+
+        self.assertEqual(list(self.syncer.sync_meetings(year=2016)), [])
+
+        self.session.pages['results.aspx'] = page.replace('<td>7.21</td>', '<td>7.01</td>', 1)
+        changes = list(self.syncer.sync_meetings(year=2016))
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0]['change'], 'changed')
+        self.assertEqual((changes[0]['old']['perf'], changes[0]['new']['perf']), ('7.21', '7.01'))
+
+    def test_old_known_meetings_are_skipped(self):
+        self.session.pages['results.aspx'] = fixture('meeting_results_small.html').decode('utf-8')
+        self.session.pages['resultslookup.aspx'] = SEARCH_PAGE.format(date='10 Oct 16')
+
+        list(self.syncer.sync_meetings(year=2016))
+        fetched = len(self.session.urls)
+        self.assertEqual(list(self.syncer.sync_meetings(year=2016)), [])
+        self.assertEqual(len(self.session.urls), fetched + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import pathlib
+import unittest
+import numpy as np
+from power_of_10 import rankings, results, table
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks', 'fixtures')
+
+
+class ParseValues(unittest.TestCase):
+    def test_performance(self):
+        self.assertEqual(table.parse_performance('10.23'), 10.23)
+        self.assertEqual(table.parse_performance('1:52.34'), 112.34)
+        self.assertEqual(table.parse_performance('2:05:12'), 7512)
+        self.assertEqual(table.parse_performance('7.46w'), 7.46)
+        self.assertEqual(table.parse_performance('6543'), 6543)
+        self.assertTrue(np.isnan(table.parse_performance('DNF')))
+        self.assertTrue(np.isnan(table.parse_performance('')))
+
+    def test_date(self):
+        self.assertEqual(table.parse_date('8 Feb 16'), np.datetime64('2016-02-08'))
+        self.assertEqual(table.parse_date('12 June 2016'), np.datetime64('2016-06-12'))
+        self.assertTrue(np.isnat(table.parse_date('')))
+
+
+class Tables(unittest.TestCase):
+    def setUp(self):
+        self.ranks = rankings.parse_ranking_list(pathlib.Path(FIXTURES, 'rankings_400_full.html'))
+        self.table = table.Table.from_records(self.ranks, rankings.RANKING_COLUMNS)
+
+    def test_columns_are_typed(self):
+        self.assertEqual(len(self.table), len(self.ranks))
+        self.assertEqual(self.table['rank'].dtype, np.int64)
+        self.assertEqual(self.table['performance'].dtype, np.float64)
+        self.assertEqual(self.table['date'].dtype, np.dtype('datetime64[D]'))
+        self.assertEqual(self.table['athlete_id'][0], int(self.ranks[0]['athlete_id']))
+        self.assertEqual(self.table[0]['name'], self.ranks[0]['name'])
+
+    def test_filter_and_sort(self):
+        fast = self.table[self.table['performance'] < 45]
+        self.assertEqual(len(fast), sum(table.parse_performance(r['performance']) < 45 for r in self.ranks))
+        ordered = self.table.sort('performance')
+        self.assertTrue(np.all(np.diff(ordered['performance']) >= 0))
+        self.assertEqual(ordered.sort('rank', descending=True)[0]['rank'], self.table['rank'].max())
+
+    def test_meeting_results(self):
+        meeting = results.parse_meeting_results(pathlib.Path(FIXTURES, 'meeting_results_small.html'))
+        self.assertIsInstance(meeting, dict)
+        rows = meeting.to_table()
+        self.assertEqual(len(rows), sum(len(race['results']) for race in meeting['results']))
+        self.assertEqual(rows[0]['event'], meeting['results'][0]['event'])
+        self.assertEqual(rows[0]['perf'], table.parse_performance(meeting['results'][0]['results'][0]['perf']))
+
+
+if __name__ == '__main__':
+    unittest.main()